@@ -0,0 +1,41 @@
+/// <reference types="vitest" />
+import { render, screen } from '@testing-library/react';
+import { vi } from 'vitest';
+import ChangeHeatmap from './ChangeHeatmap';
+
+// A 150x200 scene in 64 px cells is a 3x4 grid (see test_change_heatmap_round_trip)
+const heatmap = {
+  event_id: 7,
+  location: 'Hyderabad',
+  detected_at: '2025-05-09 12:00:00',
+  cell_size: 64,
+  height: 150,
+  width: 200,
+  grid_rows: 3,
+  grid_cols: 4,
+  old_road: [[640, 640, 640, 80], [0, 0, 0, 0], [0, 0, 0, 0]],
+  new_road: [[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 80]],
+  max_new_road: 80,
+};
+
+describe('ChangeHeatmap', () => {
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it('renders the heatmap of the change event', async () => {
+    const fetchMock = vi.spyOn(global, 'fetch').mockResolvedValue(
+      new Response(JSON.stringify(heatmap), { status: 200 })
+    );
+    render(<ChangeHeatmap eventId={7} />);
+    expect(await screen.findByLabelText(/Change heatmap for Hyderabad/i)).toBeInTheDocument();
+    expect(screen.getByText(/3 × 4 cells of 64 px/i)).toBeInTheDocument();
+    expect(fetchMock).toHaveBeenCalledWith('http://localhost:5000/api/user/change-events/7/heatmap');
+  });
+
+  it('says so when the event has no heatmap', async () => {
+    vi.spyOn(global, 'fetch').mockResolvedValue(new Response('{}', { status: 404 }));
+    render(<ChangeHeatmap eventId={8} />);
+    expect(await screen.findByText(/No change heatmap available/i)).toBeInTheDocument();
+  });
+});
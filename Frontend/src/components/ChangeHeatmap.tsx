@@ -0,0 +1,88 @@
+import React, { useEffect, useRef, useState } from 'react';
+
+interface Heatmap {
+  event_id: number;
+  location: string;
+  detected_at: string;
+  cell_size: number;
+  height: number;
+  width: number;
+  grid_rows: number;
+  grid_cols: number;
+  old_road: number[][];
+  new_road: number[][];
+  max_new_road: number;
+}
+
+interface ChangeHeatmapProps {
+  eventId: number;
+}
+
+// Change heatmap of one change event: existing roads in grey, new roads in
+// red scaled to the busiest cell, one canvas pixel per cell
+const ChangeHeatmap: React.FC<ChangeHeatmapProps> = ({ eventId }) => {
+  const [heatmap, setHeatmap] = useState<Heatmap | null>(null);
+  const [error, setError] = useState<string | null>(null);
+  const canvasRef = useRef<HTMLCanvasElement>(null);
+
+  useEffect(() => {
+    setHeatmap(null);
+    setError(null);
+    const fetchHeatmap = async () => {
+      try {
+        const response = await fetch(`http://localhost:5000/api/user/change-events/${eventId}/heatmap`);
+        if (response.status === 404) {
+          setError('No change heatmap available for this alert');
+          return;
+        }
+        if (!response.ok) throw new Error('Failed to fetch heatmap');
+        setHeatmap(await response.json());
+      } catch (err) {
+        setError('Failed to load change heatmap');
+      }
+    };
+    fetchHeatmap();
+  }, [eventId]);
+
+  useEffect(() => {
+    const context = canvasRef.current?.getContext('2d');
+    if (!heatmap || !context) return;
+
+    const cellArea = heatmap.cell_size * heatmap.cell_size;
+    const image = context.createImageData(heatmap.grid_cols, heatmap.grid_rows);
+    heatmap.new_road.forEach((row, r) => {
+      row.forEach((newRoad, c) => {
+        const i = (r * heatmap.grid_cols + c) * 4;
+        const existing = Math.min(1, (heatmap.old_road[r][c] / cellArea) * 4);
+        const change = heatmap.max_new_road > 0 ? newRoad / heatmap.max_new_road : 0;
+        image.data[i] = Math.round(255 * change + 120 * existing * (1 - change));
+        image.data[i + 1] = Math.round(120 * existing * (1 - change));
+        image.data[i + 2] = Math.round(120 * existing * (1 - change));
+        image.data[i + 3] = Math.round(255 * Math.max(change, existing * 0.6));
+      });
+    });
+    context.putImageData(image, 0, 0);
+  }, [heatmap]);
+
+  if (error) return <p className="text-sm text-gray-500">{error}</p>;
+  if (!heatmap) return <p className="text-sm text-gray-500">Loading change heatmap...</p>;
+
+  return (
+    <div>
+      <canvas
+        ref={canvasRef}
+        width={heatmap.grid_cols}
+        height={heatmap.grid_rows}
+        aria-label={`Change heatmap for ${heatmap.location}`}
+        className="w-full border border-light-olive rounded"
+        style={{ imageRendering: 'pixelated', aspectRatio: `${heatmap.width} / ${heatmap.height}` }}
+      />
+      <p className="text-xs text-gray-500 mt-2">
+        {heatmap.grid_rows} × {heatmap.grid_cols} cells of {heatmap.cell_size} px, detected {heatmap.detected_at}.
+        Red: new roads, grey: existing roads.
+      </p>
+    </div>
+  );
+};
+
+export default ChangeHeatmap;
@@ -41,7 +41,7 @@ const LoginModal: React.FC<LoginModalProps> = ({ isOpen, onClose }) => {
       });
   
       if (response.status === 200) {
-        login(userName, email, role);
+        login(userName, email, role, response.data.token);
   
         if (role === 'Admin') {
           navigate('/admin');
@@ -6,7 +6,8 @@ interface UserContextType {
   isLoggedIn: boolean;
   userName: string | null;
   userRole: UserRole;
-  login: (name: string, email: string, role: UserRole) => void;
+  token: string | null;
+  login: (name: string, email: string, role: UserRole, token?: string | null) => void;
   logout: () => void;
   isAdmin: () => boolean;
 }
@@ -19,12 +20,14 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
   const [userName, setUserName] = useState<string | null>(null);
   const [userRole, setUserRole] = useState<UserRole>(null);
   const [userEmail, setUserEmail] = useState<string | null>(null);
+  const [token, setToken] = useState<string | null>(null);
 
-  const login = (name: string, email: string, role: UserRole) => {
+  const login = (name: string, email: string, role: UserRole, sessionToken: string | null = null) => {
     setIsLoggedIn(true);
     setUserName(name);
     setUserRole(role);
     setUserEmail(email);
+    setToken(sessionToken);
   };
 
   const logout = () => {
@@ -32,6 +35,7 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
     setUserName(null);
     setUserRole(null);
     setUserEmail(null);
+    setToken(null);
   };
 
   const isAdmin = () => {
@@ -39,7 +43,7 @@ export const UserProvider: React.FC<{ children: ReactNode }> = ({ children }) =>
   };
 
   return (
-    <UserContext.Provider value={{ isLoggedIn, userName, userRole, login, logout, isAdmin }}>
+    <UserContext.Provider value={{ isLoggedIn, userName, userRole, token, login, logout, isAdmin }}>
       {children}
     </UserContext.Provider>
   );
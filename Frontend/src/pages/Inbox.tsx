@@ -1,6 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { AlertCircle, MapPin, Info } from 'lucide-react';
 import { Link } from 'react-router-dom';
+import { useUser } from '../context/UserContext';
+import ChangeHeatmap from '../components/ChangeHeatmap';
 
 interface Alert {
   id: string;
@@ -11,6 +13,7 @@ interface Alert {
   latitude?: number | null;
   longitude?: number | null;
   user_id?: string | null;
+  change_event_id?: number | null;
 }
 
 const Index: React.FC = () => {
@@ -18,11 +21,20 @@ const Index: React.FC = () => {
   const [selectedAlert, setSelectedAlert] = useState<Alert | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const { token } = useUser();
 
   useEffect(() => {
     const fetchAlerts = async () => {
+      if (!token) {
+        setError('Log in to see alerts for your regions');
+        setLoading(false);
+        return;
+      }
       try {
-        const response = await fetch('http://localhost:5000/api/user/notifications');
+        // Alerts are filtered by the session's regions
+        const response = await fetch('http://localhost:5000/api/user/notifications', {
+          headers: { Authorization: `Bearer ${token}` },
+        });
         if (!response.ok) throw new Error('Failed to fetch alerts');
         const data: Alert[] = await response.json();
         setAlerts(data);
@@ -33,7 +45,7 @@ const Index: React.FC = () => {
       }
     };
     fetchAlerts();
-  }, []);
+  }, [token]);
 
   if (loading) return <div>Loading...</div>;
   if (error) return <div>Error: {error}</div>;
@@ -101,6 +113,13 @@ const Index: React.FC = () => {
                     <p><span className="font-medium">Latitude:</span> {selectedAlert.latitude ?? 'N/A'}</p>
                     <p><span className="font-medium">Longitude:</span> {selectedAlert.longitude ?? 'N/A'}</p>
                   </div>
+
+                  {selectedAlert.change_event_id != null && (
+                    <div className="bg-gray-50 rounded-lg p-4">
+                      <h3 className="text-lg font-semibold text-forest-green mb-3">Where Roads Changed</h3>
+                      <ChangeHeatmap eventId={selectedAlert.change_event_id} />
+                    </div>
+                  )}
                 </div>
               ) : (
                 <div className="flex flex-col items-center justify-center h-96 text-gray-500">
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AlertCircle, MapPin, Info } from 'lucide-react';
 import { Link } from 'react-router-dom';
+import { useUser } from '../context/UserContext';
 
 interface Alert {
   id: string;
@@ -18,11 +19,20 @@ const Index: React.FC = () => {
   const [selectedAlert, setSelectedAlert] = useState<Alert | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const { token } = useUser();
 
   useEffect(() => {
     const fetchAlerts = async () => {
+      if (!token) {
+        setError('Log in to see alerts for your regions');
+        setLoading(false);
+        return;
+      }
       try {
-        const response = await fetch('http://localhost:5000/api/user/notifications');
+        // Alerts are filtered by the session's regions
+        const response = await fetch('http://localhost:5000/api/user/notifications', {
+          headers: { Authorization: `Bearer ${token}` },
+        });
         if (!response.ok) throw new Error('Failed to fetch alerts');
         const data: Alert[] = await response.json();
         setAlerts(data);
@@ -33,7 +43,7 @@ const Index: React.FC = () => {
       }
     };
     fetchAlerts();
-  }, []);
+  }, [token]);
 
   if (loading) return <div>Loading...</div>;
   if (error) return <div>Error: {error}</div>;
@@ -1,24 +1,24 @@
 from flask import Blueprint, request, jsonify
-from services.admin_service  import get_access_requests, get_user_access_data, update_request_status, grant_access_to_user
+from services.admin_service  import get_admin_dashboard, invalidate_admin_dashboard, update_request_status, grant_access_to_user
+from services.admin_service  import bulk_update_requests
+from services.session import require_session
 
 
 admin_bp = Blueprint("admin", __name__)
 
+MAX_BULK_REQUESTS = 1000
+
 @admin_bp.route("/access-requests", methods=["GET"])
 def list_requests():
     print("[+] Access requests route hit")
-    requests = get_access_requests()
-    access_data = get_user_access_data()
-
-    j = jsonify({"accessRequests":requests, "userAccesses":access_data})
-    print(j)
-    return j, 200
+    return jsonify(get_admin_dashboard()), 200
 
 
 
 @admin_bp.route("/approve/<request_id>", methods=["POST"])
 def approve_request(request_id):
     success = grant_access_to_user(request_id)
+    invalidate_admin_dashboard()
     if success:
         return jsonify({"message": "Request approved"}), 200
     return jsonify({"error": "Approval failed"}), 400
@@ -26,6 +26,31 @@ def approve_request(request_id):
 @admin_bp.route("/reject/<request_id>", methods=["POST"])
 def reject_request(request_id):
     success = update_request_status(request_id, "rejected")
+    invalidate_admin_dashboard()
     if success:
         return jsonify({"message": "Request rejected"}), 200
     return jsonify({"error": "Rejection failed"}), 400
+
+
+@admin_bp.route("/bulk", methods=["POST"])
+@require_session("admin")
+def bulk_update():
+    """
+    Body: {"approve": [request ids], "reject": [request ids]}
+    Returns the outcome for every id.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        approve_ids = [int(i) for i in data.get("approve", [])]
+        reject_ids = [int(i) for i in data.get("reject", [])]
+    except (TypeError, ValueError):
+        return jsonify({"error": "Request ids must be integers"}), 400
+
+    if not approve_ids and not reject_ids:
+        return jsonify({"error": "No request ids given"}), 400
+    if len(approve_ids) + len(reject_ids) > MAX_BULK_REQUESTS:
+        return jsonify({"error": f"At most {MAX_BULK_REQUESTS} requests per call"}), 400
+
+    results = bulk_update_requests(approve_ids, reject_ids)
+    invalidate_admin_dashboard()
+    return jsonify({"results": {str(k): v for k, v in sorted(results.items())}}), 200
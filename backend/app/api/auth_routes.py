@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from services.auth_service import create_user, login_user, login_admin
+from services.user_service import get_accessible_locations
+from services.session import issue_token, revoke_token, require_session, SESSION_TTL
 auth_bp = Blueprint('auth', __name__)
 
 
@@ -18,12 +20,46 @@ def signup():
         return jsonify({"error": str(e)}), 500
 
 
+def _session_response(row):
+    username, role = row
+    # Same source as every region check: user_regions, not the legacy users.regions CSV
+    regions = get_accessible_locations(username)
+    return jsonify({
+        "message": "User logged in successfully",
+        "token": issue_token(username, role, regions),
+        "expiresIn": SESSION_TTL,
+        "username": username,
+        "role": role,
+        "regions": regions,
+    }), 200
+
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     try:
-        login_user(data)  # this function will handle everything except file stuff
-        return jsonify({"message": "User logged in successfully"}), 200
+        result = login_user(data)  # this function will handle everything except file stuff
+        if result is None:
+            return jsonify({"error": "Invalid credentials"}), 401
+        return _session_response(result)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@auth_bp.route('/admin/login', methods=['POST'])
+def admin_login():
+    data = request.get_json()
+    try:
+        result = login_admin(data)
+        if result is None:
+            return jsonify({"error": "Invalid credentials or not an admin"}), 401
+        return _session_response(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    return jsonify({'message': 'Login successful', 'role': 'user'}), 200
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@require_session()
+def logout():
+    revoke_token(g.session)
+    return jsonify({"message": "Logged out"}), 200
@@ -0,0 +1,35 @@
+import time
+
+from flask import Blueprint, Response, g, request
+from services.metrics import inc_counter, observe, render_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.before_app_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def record_request(response):
+    start = g.pop("request_start", None)
+    if start is None:
+        return response
+
+    # Label by the route pattern, not the raw path, so /approve/<id> stays one series
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    if route == "/metrics":
+        return response
+
+    labels = {"method": request.method, "route": route}
+    inc_counter("http_requests_total", dict(labels, status=response.status_code),
+                help_text="HTTP requests by route, method and status")
+    observe("http_request_duration_seconds", time.perf_counter() - start, labels,
+            help_text="HTTP request latency by route")
+    return response
+
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -1,15 +1,23 @@
 #send requests to the/ backend
 #send notifications to the frontend from model
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from flask_cors import cross_origin
 user_bp = Blueprint('user', __name__)
 print("user_dashboard_routes.py loaded!")
 # Assuming you have this function defined somewhere
 from services.user_service import register_request  
 from services.user_service import get_notifications
+from services.change_service import get_change_events, get_location_summaries, get_location_summary
+from services.change_service import get_events_in_bbox, get_event_clusters
+from services.change_service import get_change_heatmap, get_latest_change_heatmap
+from services.geo import cluster_precision
+from services.session import require_session
 # At top with imports
 
+# Below this web-map zoom level the map endpoint returns clusters instead of events
+CLUSTER_BELOW_ZOOM = 12
+
 @user_bp.route('/request-access', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def request_access():
@@ -30,10 +38,117 @@ def request_access():
 
 @user_bp.route('/notifications', methods=['GET'])
 @cross_origin()
+@require_session()
 def fetch_notifications():
+    """
+    Notifications for the session's regions. Admins may pass ?username= to
+    see another user's feed.
+    """
     try:
-        notifications = get_notifications()  # returns a list of dicts
+        username = request.args.get('username')
+        if username and g.session['role'] == 'admin':
+            notifications = get_notifications(username)
+        else:
+            # The token's region claims filter with no extra query
+            notifications = get_notifications(regions=g.session['regions'])
         return jsonify(notifications), 200
     except Exception as e:
         print("Error fetching notifications:", e)
-        return jsonify({'error': 'Internal server error'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), 500
+
+@user_bp.route('/change-events', methods=['GET'])
+@cross_origin()
+def fetch_change_events():
+    try:
+        events = get_change_events(
+            location=request.args.get('location'),
+            since=request.args.get('since'),
+            significant_only=request.args.get('significant') in ('1', 'true'),
+            limit=min(request.args.get('limit', 100, type=int), 1000),
+        )
+        return jsonify(events), 200
+    except Exception as e:
+        print("Error fetching change events:", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@user_bp.route('/change-summary', methods=['GET'])
+@cross_origin()
+def fetch_change_summaries():
+    try:
+        return jsonify(get_location_summaries()), 200
+    except Exception as e:
+        print("Error fetching change summaries:", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@user_bp.route('/change-summary/<location>', methods=['GET'])
+@cross_origin()
+def fetch_change_summary(location):
+    try:
+        summary = get_location_summary(location)
+        if summary is None:
+            return jsonify({'error': 'No change events for this location'}), 404
+        return jsonify(summary), 200
+    except Exception as e:
+        print("Error fetching change summary:", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@user_bp.route('/change-events/<int:event_id>/heatmap', methods=['GET'])
+@cross_origin()
+def fetch_change_heatmap(event_id):
+    """
+    Per-cell road and new-road pixel counts of one comparison, for a heatmap
+    layer. Notifications carry the change_event_id to pass here.
+    """
+    try:
+        heatmap = get_change_heatmap(event_id)
+        if heatmap is None:
+            return jsonify({'error': 'No heatmap for this change event'}), 404
+        return jsonify(heatmap), 200
+    except Exception as e:
+        print("Error fetching change heatmap:", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@user_bp.route('/change-heatmap/<location>', methods=['GET'])
+@cross_origin()
+def fetch_latest_change_heatmap(location):
+    try:
+        heatmap = get_latest_change_heatmap(location)
+        if heatmap is None:
+            return jsonify({'error': 'No heatmap for this location'}), 404
+        return jsonify(heatmap), 200
+    except Exception as e:
+        print("Error fetching change heatmap:", e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@user_bp.route('/change-events/map', methods=['GET'])
+@cross_origin()
+def fetch_map_events():
+    """
+    Events in ?south=&west=&north=&east=. With ?zoom= below CLUSTER_BELOW_ZOOM
+    (or ?cluster=1) they are grouped into geohash cells.
+    """
+    try:
+        south, west, north, east = (float(request.args[k]) for k in ('south', 'west', 'north', 'east'))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'south, west, north and east are required numbers'}), 400
+
+    zoom = request.args.get('zoom', type=float)
+    cluster = request.args.get('cluster') in ('1', 'true') or (zoom is not None and zoom < CLUSTER_BELOW_ZOOM)
+    significant_only = request.args.get('significant') in ('1', 'true')
+
+    try:
+        if cluster:
+            precision = cluster_precision(zoom if zoom is not None else CLUSTER_BELOW_ZOOM - 1)
+            clusters = get_event_clusters(south, west, north, east, precision, significant_only)
+            return jsonify({'clusters': clusters, 'precision': precision}), 200
+
+        limit = min(request.args.get('limit', 500, type=int), 5000)
+        events = get_events_in_bbox(south, west, north, east, significant_only, limit)
+        return jsonify({'events': events}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
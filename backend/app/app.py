@@ -5,6 +5,8 @@ from flask_cors import CORS
 from api.auth_routes import auth_bp
 from api.user_dashboard_routes import user_bp
 from api.admin_dashboard_routes import admin_bp  
+from api.metrics_routes import metrics_bp
+from services.job_queues import register_queue_gauges
 
 def create_app():
     app = Flask(__name__)
@@ -17,6 +19,8 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(user_bp, url_prefix="/api/user")
     app.register_blueprint(admin_bp, url_prefix="/api/admin")
+    app.register_blueprint(metrics_bp)
+    register_queue_gauges()
 
     print("ALL FLASK ROUTES:")
     for rule in app.url_map.iter_rules():
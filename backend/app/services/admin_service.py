@@ -1,56 +1,73 @@
+import os
 from datetime import datetime
 import mysql.connector
 from mysql.connector import Error
+from .metrics import timed_query, traced_connection
+from .cache import TTLCache
+from .user_service import split_regions, replace_user_regions, invalidate_user_regions
+from .session import revoke_user
+
+# The dashboard payload is shared by every admin for a few seconds;
+# approve/reject invalidate it immediately
+_dashboard_cache = TTLCache("admin_dashboard", float(os.environ.get("ADMIN_DASHBOARD_TTL", 5)))
+
+# Pending and approved requests in one round-trip, dates formatted by MySQL
+# (db/bench_indexes.py times this statement)
+DASHBOARD_QUERY = """
+    SELECT id, full_name, department, locations,
+           DATE_FORMAT(submitted_at, '%Y-%m-%d %H:%i:%s') AS submitted_at, status
+    FROM permission_requests WHERE status IN ('pending', 'approved')
+"""
+
 def connect_db():
-    return mysql.connector.connect(
+    return traced_connection(mysql.connector.connect(
         host='localhost',
         database='change_detection',
         user='root',
         password='root'
-    )
+    ))
 
-def get_access_requests():
-    print("[+] Fetching access requests...")
+@timed_query
+def _load_admin_dashboard():
+    conn = None
     try:
         conn = connect_db()
         cursor = conn.cursor(dictionary=True)
-        query = "SELECT id, full_name, department, locations, submitted_at, status FROM permission_requests WHERE status = 'pending'"
-        cursor.execute(query)
-        requests = cursor.fetchall()
-        for d in requests:
-            d["submitted_at"] = d["submitted_at"].strftime("%Y-%m-%d %H:%M:%S")
-        print(requests)
-        return requests
-    except Error as e:
-        print("Error fetching access requests:", e)
-        return []
+        cursor.execute(DASHBOARD_QUERY)
+        rows = cursor.fetchall()
     finally:
-        if conn.is_connected():
+        if conn is not None and conn.is_connected():
             cursor.close()
             conn.close()
 
+    access_requests = []
+    user_accesses = []
+    for row in rows:
+        if row["status"] == "pending":
+            access_requests.append(row)
+        else:
+            user_accesses.append({"full_name": row["full_name"], "status": row["status"],
+                                  "submitted_at": row["submitted_at"]})
+    return {"accessRequests": access_requests, "userAccesses": user_accesses}
 
-def get_user_access_data():
+
+def get_admin_dashboard():
+    """
+    Payload for the admin dashboard: pending requests and approved accesses,
+    served from a short-lived cache.
+    """
     try:
-        conn = connect_db()
-        cursor = conn.cursor(dictionary=True)
-        query = "SELECT full_name, status, submitted_at FROM permission_requests WHERE status = 'approved'"
-        cursor.execute(query)
-        user_requests = cursor.fetchall()
-        print("[+] USer access data returned")
-        for d in user_requests:
-            d["submitted_at"] = d["submitted_at"].strftime("%Y-%m-%d %H:%M:%S")
-
-        print(user_requests)
-        return user_requests
+        return _dashboard_cache.get("dashboard", _load_admin_dashboard)
     except Error as e:
-        print("Error fetching user access data:", e)
-        return []
-    finally:
-        if conn.is_connected():
-            cursor.close()
-            conn.close()
+        print("Error fetching admin dashboard:", e)
+        return {"accessRequests": [], "userAccesses": []}
+
+
+def invalidate_admin_dashboard():
+    _dashboard_cache.invalidate()
+
 
+@timed_query
 def update_request_status(request_id, new_status):
     try:
         conn = connect_db()
@@ -67,6 +84,7 @@ def update_request_status(request_id, new_status):
             cursor.close()
             conn.close()
 
+@timed_query
 def grant_access_to_user(request_id):
     try:
         conn = connect_db()
@@ -85,12 +103,16 @@ def grant_access_to_user(request_id):
         locations = request_data[6]  
         update_query = "UPDATE users SET regions = %s WHERE username = %s"
         cursor.execute(update_query, (locations, user_id))
+        replace_user_regions(cursor, user_id, split_regions(locations))
         
         # Update the request status to 'approved'
         update_request_query = "UPDATE permission_requests SET status = 'approved' WHERE id = %s"
         cursor.execute(update_request_query, (request_id,))
         
         conn.commit()
+        invalidate_user_regions(user_id)
+        # Sessions carry region claims; make the user log in again to pick up the grant
+        revoke_user(user_id)
         return True
     except Error as e:
         print("Error granting access:", e)
@@ -99,3 +121,114 @@ def grant_access_to_user(request_id):
         if conn.is_connected():
             cursor.close()
             conn.close()
+
+
+@timed_query
+def bulk_update_requests(approve_ids, reject_ids):
+    """
+    Approve and reject many permission requests in one transaction.
+
+    Approvals grant the request's locations to the user exactly as
+    grant_access_to_user does; when one user has several approved requests
+    in the batch, the newest one wins. Only pending requests change: one
+    already approved or rejected (e.g. by another admin) is left as it is.
+
+    Args:
+        approve_ids: Request IDs to approve
+        reject_ids: Request IDs to reject
+
+    Returns:
+        dict: request id -> 'approved', 'rejected', 'not_found',
+        'already_processed' (no longer pending), 'conflict' (listed for both
+        actions) or 'error' (the transaction was rolled back)
+    """
+    approve_ids = set(approve_ids)
+    reject_ids = set(reject_ids)
+    conflicts = approve_ids & reject_ids
+    approve_ids -= conflicts
+    reject_ids -= conflicts
+
+    results = {request_id: "conflict" for request_id in conflicts}
+    requested = sorted(approve_ids | reject_ids)
+    if not requested:
+        return results
+
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor()
+        conn.start_transaction()
+
+        placeholders = ", ".join(["%s"] * len(requested))
+        # Locks the rows, so a concurrent approve/reject of the same ids waits and then sees them processed
+        cursor.execute(f"SELECT id, full_name, status FROM permission_requests WHERE id IN ({placeholders}) FOR UPDATE",
+                       tuple(requested))
+        rows = cursor.fetchall()
+        names = {request_id: name for request_id, name, status in rows if status == 'pending'}
+        processed = {request_id for request_id, name, status in rows if status != 'pending'}
+        found = set(names)
+
+        approved = sorted(approve_ids & found)
+        rejected = sorted(reject_ids & found)
+
+        if approved:
+            approve_placeholders = ", ".join(["%s"] * len(approved))
+            newest_approval = f"""
+                p.id IN ({approve_placeholders})
+                AND p.id = (SELECT MAX(q.id) FROM permission_requests q
+                            WHERE q.full_name = p.full_name AND q.id IN ({approve_placeholders}))
+            """
+            cursor.execute(f"""
+                UPDATE users u
+                JOIN permission_requests p ON u.username = p.full_name
+                SET u.regions = p.locations
+                WHERE {newest_approval}
+            """, tuple(approved) * 2)
+            cursor.execute(f"""
+                DELETE r FROM user_regions r
+                JOIN permission_requests p ON r.username = p.full_name
+                WHERE p.id IN ({approve_placeholders})
+            """, tuple(approved))
+            cursor.execute(f"""
+                INSERT IGNORE INTO user_regions (username, location)
+                SELECT u.username, TRIM(j.location)
+                FROM permission_requests p
+                JOIN users u ON u.username = p.full_name,
+                JSON_TABLE(CONCAT('["', REPLACE(REPLACE(p.locations, '"', ''), ',', '","'), '"]'),
+                           '$[*]' COLUMNS (location varchar(100) PATH '$')) j
+                WHERE {newest_approval} AND TRIM(j.location) <> ''
+            """, tuple(approved) * 2)
+
+        if found:
+            found_ids = sorted(found)
+            cursor.execute(f"""
+                UPDATE permission_requests
+                SET status = CASE WHEN id IN ({", ".join(["%s"] * len(approved)) or "NULL"}) THEN 'approved'
+                                  ELSE 'rejected' END
+                WHERE id IN ({", ".join(["%s"] * len(found_ids))})
+            """, tuple(approved) + tuple(found_ids))
+
+        conn.commit()
+        if approved:
+            invalidate_user_regions()
+            for username in {names[request_id] for request_id in approved}:
+                revoke_user(username)
+
+        results.update({request_id: "approved" for request_id in approved})
+        results.update({request_id: "rejected" for request_id in rejected})
+        results.update({request_id: "already_processed" for request_id in processed})
+        results.update({request_id: "not_found" for request_id in requested
+                        if request_id not in found and request_id not in processed})
+        return results
+
+    except Error as e:
+        print("Error applying bulk update:", e)
+        if conn is not None and conn.is_connected():
+            conn.rollback()
+        results.update({request_id: "error" for request_id in requested})
+        return results
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
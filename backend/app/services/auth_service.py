@@ -1,16 +1,19 @@
 import mysql.connector
 from mysql.connector import Error
+from .metrics import timed_query, traced_connection
+from .user_service import split_regions, add_user_regions, invalidate_user_regions
 
 
+@timed_query
 def create_user(data):
     print("[+] Creating user...")  
     try:
-        connection = mysql.connector.connect(
+        connection = traced_connection(mysql.connector.connect(
             host='localhost',
             database='change_detection',
             user='root',
             password='root'
-        )
+        ))
 
         if connection.is_connected():
             cursor = connection.cursor()
@@ -36,8 +39,10 @@ def create_user(data):
                 data.get('accessReason'),
                 data.get('supervisorContact'),
             ))
+            add_user_regions(cursor, data.get('username'), split_regions(','.join(data.get('regions'))))
 
             connection.commit()
+            invalidate_user_regions(data.get('username'))
             print("[+] User created successfully")
 
     except Error as e:
@@ -49,21 +54,23 @@ def create_user(data):
             connection.close()
 
 
+@timed_query
 def login_user(data):
     print("[+] Logging in user...")
     try:
-        connection = mysql.connector.connect(
+        connection = traced_connection(mysql.connector.connect(
             host='localhost',
             database='change_detection',
             user='root',
             password='root'
-        )
+        ))
 
         if connection.is_connected():
             cursor = connection.cursor()
 
+            # Only the session identity is needed; regions come from user_regions
             select_query = """
-                SELECT * FROM users WHERE email = %s AND password = %s"""
+                SELECT username, role FROM users WHERE email = %s AND password = %s"""
             cursor.execute(select_query, (
                 data.get('email'),
                 (data.get('password')),  # safe hash
@@ -85,20 +92,21 @@ def login_user(data):
             connection.close()
 
 
+@timed_query
 def login_admin(data):
     print("[+] Logging in admin...")
     try:
-        connection = mysql.connector.connect(
+        connection = traced_connection(mysql.connector.connect(
             host='localhost',
             database='change_detection',   
              user='root',
             password='root'
-        )
+        ))
         if connection.is_connected():
             cursor = connection.cursor()
 
             select_query = """
-                SELECT * FROM users WHERE username = %s AND password = %s AND role = 'admin'
+                SELECT username, role FROM users WHERE username = %s AND password = %s AND role = 'admin'
             """
             cursor.execute(select_query, (
                 data.get('username'),
@@ -0,0 +1,52 @@
+import time
+import threading
+
+from .metrics import inc_counter
+
+
+class TTLCache:
+    """
+    Small in-process cache whose entries expire after `ttl` seconds.
+    Hits and misses are counted in cache_requests_total{cache=name}.
+    """
+
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """
+        Return the cached value for key, calling loader() to fill it on a miss
+        or after expiry.
+        """
+        now = time.monotonic()
+        with self._lock:
+            generation = self._generation
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                inc_counter("cache_requests_total", {"cache": self.name, "result": "hit"},
+                            help_text="In-process cache lookups by result")
+                return entry[0]
+
+        inc_counter("cache_requests_total", {"cache": self.name, "result": "miss"},
+                    help_text="In-process cache lookups by result")
+        value = loader()
+        with self._lock:
+            # An invalidation while loading means the value may already be stale
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drop one key, or every entry when key is None.
+        """
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
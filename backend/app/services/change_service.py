@@ -0,0 +1,267 @@
+import sys
+import zlib
+from array import array
+
+import mysql.connector
+from mysql.connector import Error
+from .metrics import timed_query, traced_connection
+from .geo import covering_prefixes
+
+def connect_db():
+    return traced_connection(mysql.connector.connect(
+        host='localhost',
+        database='change_detection',
+        user='root',
+        password='root'
+    ))
+
+
+def _format_dates(rows, *fields):
+    for row in rows:
+        for field in fields:
+            if row.get(field) is not None:
+                row[field] = row[field].strftime("%Y-%m-%d %H:%M:%S")
+    return rows
+
+
+@timed_query
+def get_change_events(location=None, since=None, significant_only=False, limit=100):
+    """
+    Most recent change events, newest first.
+
+    Args:
+        location: Only events for this location
+        since: Only events detected at or after this datetime / 'YYYY-MM-DD HH:MM:SS'
+        significant_only: Only events above the significance threshold
+        limit: Maximum number of events returned
+    """
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor(dictionary=True)
+
+        query = "SELECT * FROM change_events WHERE 1 = 1"
+        params = []
+        if location:
+            query += " AND location = %s"
+            params.append(location)
+        if since:
+            query += " AND detected_at >= %s"
+            params.append(since)
+        if significant_only:
+            query += " AND is_significant = 1"
+        query += " ORDER BY detected_at DESC, id DESC LIMIT %s"
+        params.append(int(limit))
+
+        cursor.execute(query, tuple(params))
+        return _format_dates(cursor.fetchall(), "detected_at")
+
+    except Error as e:
+        print(f"[!] MySQL Error: {e}")
+        return []
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+@timed_query
+def get_location_summaries():
+    """
+    Precomputed per-location aggregates, one row per location.
+    """
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM location_change_summary ORDER BY location")
+        return _format_dates(cursor.fetchall(), "last_detected_at")
+
+    except Error as e:
+        print(f"[!] MySQL Error: {e}")
+        return []
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+@timed_query
+def get_location_summary(location):
+    """
+    Aggregates for one location by primary key, or None if it has no events.
+    """
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM location_change_summary WHERE location = %s", (location,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return _format_dates([row], "last_detected_at")[0]
+
+    except Error as e:
+        print(f"[!] MySQL Error: {e}")
+        return None
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+def _bbox_filter(south, west, north, east):
+    """
+    WHERE clause for events inside a bounding box: geohash prefix ranges pick
+    the candidate rows from the index, the coordinate test trims cell edges.
+    """
+    prefixes = covering_prefixes(south, west, north, east)
+    clause = ("(" + " OR ".join(["geohash LIKE %s"] * len(prefixes)) + ")"
+              " AND latitude BETWEEN %s AND %s AND longitude BETWEEN %s AND %s")
+    params = [prefix + "%" for prefix in prefixes] + [south, north, west, east]
+    return clause, params
+
+
+@timed_query
+def get_events_in_bbox(south, west, north, east, significant_only=False, limit=500):
+    """
+    Change events inside a bounding box, newest first.
+
+    Raises:
+        ValueError: for an invalid bounding box (see geo.validate_bbox)
+    """
+    clause, params = _bbox_filter(south, west, north, east)
+    query = ("SELECT id, location, latitude, longitude, change_percentage, is_significant, detected_at"
+             " FROM change_events WHERE " + clause)
+    if significant_only:
+        query += " AND is_significant = 1"
+    query += " ORDER BY detected_at DESC LIMIT %s"
+    params.append(int(limit))
+
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, tuple(params))
+        events = _format_dates(cursor.fetchall(), "detected_at")
+        for event in events:
+            event["latitude"] = float(event["latitude"])
+            event["longitude"] = float(event["longitude"])
+        return events
+
+    except Error as e:
+        print(f"[!] MySQL Error: {e}")
+        return []
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+@timed_query
+def get_event_clusters(south, west, north, east, precision, significant_only=False):
+    """
+    Change events inside a bounding box grouped into geohash cells of the
+    given length, for zoomed-out map views.
+
+    Returns:
+        list: one dict per cell with its event count, mean position, maximum
+        change percentage and number of significant events
+
+    Raises:
+        ValueError: for an invalid bounding box (see geo.validate_bbox)
+    """
+    clause, params = _bbox_filter(south, west, north, east)
+    query = ("SELECT LEFT(geohash, %s) AS cell, COUNT(*) AS count,"
+             " AVG(latitude) AS latitude, AVG(longitude) AS longitude,"
+             " MAX(change_percentage) AS max_change_percentage, SUM(is_significant) AS significant_count"
+             " FROM change_events WHERE " + clause)
+    if significant_only:
+        query += " AND is_significant = 1"
+    query += " GROUP BY cell"
+
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, tuple([int(precision)] + params))
+        clusters = cursor.fetchall()
+        for cluster in clusters:
+            cluster["latitude"] = float(cluster["latitude"])
+            cluster["longitude"] = float(cluster["longitude"])
+            cluster["significant_count"] = int(cluster["significant_count"])
+        return clusters
+
+    except Error as e:
+        print(f"[!] MySQL Error: {e}")
+        return []
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+HEATMAP_QUERY = ("SELECT h.event_id, e.location, e.detected_at, h.cell_size, h.height, h.width,"
+                 " h.grid_rows, h.grid_cols, h.counts"
+                 " FROM change_heatmaps h JOIN change_events e ON e.id = h.event_id")
+
+
+def decode_heatmap(row):
+    """
+    Unpack a change_heatmaps row (see dl_model.events.encode_heatmap) into
+    per-cell old-road and new-road pixel counts as lists of rows.
+    """
+    counts = array("H" if row["cell_size"] ** 2 <= 0xFFFF else "I", zlib.decompress(row.pop("counts")))
+    if sys.byteorder == "big":
+        counts.byteswap()
+
+    rows, cols = row["grid_rows"], row["grid_cols"]
+    cells = rows * cols
+    row["old_road"] = [counts[r * cols:(r + 1) * cols].tolist() for r in range(rows)]
+    row["new_road"] = [counts[cells + r * cols:cells + (r + 1) * cols].tolist() for r in range(rows)]
+    row["max_new_road"] = max(counts[cells:], default=0)
+    return row
+
+
+def _fetch_heatmap(where, params):
+    conn = None
+    try:
+        conn = connect_db()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(HEATMAP_QUERY + where, params)
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return decode_heatmap(_format_dates([row], "detected_at")[0])
+
+    except Error as e:
+        print(f"[!] MySQL Error: {e}")
+        return None
+
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+@timed_query
+def get_change_heatmap(event_id):
+    """
+    Change heatmap of one event, or None if it has none.
+    """
+    return _fetch_heatmap(" WHERE h.event_id = %s", (int(event_id),))
+
+
+@timed_query
+def get_latest_change_heatmap(location):
+    """
+    Change heatmap of a location's most recent event (via its summary row),
+    or None.
+    """
+    return _fetch_heatmap(" JOIN location_change_summary s ON s.last_event_id = h.event_id"
+                          " WHERE s.location = %s", (location,))
@@ -0,0 +1,93 @@
+import math
+
+
+# Geohashes match MySQL's ST_GeoHash, which fills the geohash columns of
+# notifications and change_events (migration 0004). A bounding box is
+# covered by a few geohash prefixes, each an index range scan.
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+MAX_PRECISION = 12
+
+
+def _bits(precision):
+    """
+    Returns:
+        tuple: (longitude bits, latitude bits) of a geohash of this length
+    """
+    total = 5 * precision
+    return (total + 1) // 2, total // 2
+
+
+def _cell_index(value, low, high, bits):
+    cells = 1 << bits
+    index = int(math.floor((value - low) / (high - low) * cells))
+    return min(max(index, 0), cells - 1)
+
+
+def _cell_hash(lon_index, lat_index, precision):
+    lon_bits, lat_bits = _bits(precision)
+    chars = []
+    value = 0
+    lon_bit = lon_bits
+    lat_bit = lat_bits
+    for i in range(5 * precision):
+        # Even bits refine longitude, odd bits latitude, most significant first
+        if i % 2 == 0:
+            lon_bit -= 1
+            bit = (lon_index >> lon_bit) & 1
+        else:
+            lat_bit -= 1
+            bit = (lat_index >> lat_bit) & 1
+        value = (value << 1) | bit
+        if i % 5 == 4:
+            chars.append(BASE32[value])
+            value = 0
+    return "".join(chars)
+
+
+def encode_geohash(latitude, longitude, precision=MAX_PRECISION):
+    lon_bits, lat_bits = _bits(precision)
+    return _cell_hash(_cell_index(longitude, -180.0, 180.0, lon_bits),
+                      _cell_index(latitude, -90.0, 90.0, lat_bits), precision)
+
+
+def validate_bbox(south, west, north, east):
+    """
+    Raises:
+        ValueError: if the box is out of range, inverted or crosses the antimeridian
+    """
+    if not (-90 <= south <= north <= 90):
+        raise ValueError("Latitudes must satisfy -90 <= south <= north <= 90")
+    if not (-180 <= west <= east <= 180):
+        raise ValueError("Longitudes must satisfy -180 <= west <= east <= 180 (split boxes crossing the antimeridian)")
+
+
+def covering_prefixes(south, west, north, east, max_cells=32):
+    """
+    The longest geohash prefixes whose cells cover the bounding box, using at
+    most max_cells of them.
+
+    Returns:
+        list: geohash prefixes, all of one length
+    """
+    validate_bbox(south, west, north, east)
+    best = None
+    for precision in range(1, MAX_PRECISION + 1):
+        lon_bits, lat_bits = _bits(precision)
+        x0 = _cell_index(west, -180.0, 180.0, lon_bits)
+        x1 = _cell_index(east, -180.0, 180.0, lon_bits)
+        y0 = _cell_index(south, -90.0, 90.0, lat_bits)
+        y1 = _cell_index(north, -90.0, 90.0, lat_bits)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > max_cells:
+            break
+        best = [_cell_hash(x, y, precision) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    # Even precision 1 exceeds max_cells only for near-global boxes; cover everything
+    return best if best is not None else list(BASE32)
+
+
+def cluster_precision(zoom):
+    """
+    Geohash length to group events by at a web-map zoom level, giving clusters
+    of roughly a few dozen screen pixels.
+    """
+    return min(max(int(round(zoom * 0.4)) + 1, 1), MAX_PRECISION)
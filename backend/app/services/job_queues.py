@@ -0,0 +1,52 @@
+import os
+import sqlite3
+
+from .metrics import register_gauge
+
+# SQLite work queues written by dl_model; set the paths to expose their depth on /metrics
+TILE_QUEUE_PATH = os.environ.get("ROAD_TILE_QUEUE")            # dl_model.distributed
+INGEST_REGISTRY_PATH = os.environ.get("ROAD_INGEST_REGISTRY")  # dl_model.ingest
+
+TILE_UNIT_STATUSES = ("pending", "leased", "done", "failed")
+COMPARISON_STATUSES = ("pending", "running", "done", "failed", "superseded")
+
+
+def count_by_status(db_path, table, status):
+    """
+    Rows of a queue table in one status, read without creating or locking
+    the database file. A queue that does not exist yet is empty.
+    """
+    if not os.path.exists(db_path):
+        return 0
+
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=1)
+        return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE status = ?", (status,)).fetchone()[0]
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def register_queue_gauges(tile_queue_path=TILE_QUEUE_PATH, ingest_registry_path=INGEST_REGISTRY_PATH):
+    """
+    Register scrape-time gauges for the tile work queue and the ingest
+    comparison queue. Queues whose path is not set are skipped.
+
+    Returns:
+        list: names of the registered gauges
+    """
+    registered = []
+    if tile_queue_path:
+        for status in TILE_UNIT_STATUSES:
+            register_gauge("tile_queue_units", lambda status=status: count_by_status(tile_queue_path, "units", status),
+                           {"status": status}, help_text="Tile work units in the distributed queue by status")
+        registered.append("tile_queue_units")
+
+    if ingest_registry_path:
+        for status in COMPARISON_STATUSES:
+            register_gauge("comparison_queue_jobs",
+                           lambda status=status: count_by_status(ingest_registry_path, "comparisons", status),
+                           {"status": status}, help_text="Scheduled scene comparisons by status")
+        registered.append("comparison_queue_jobs")
+    return registered
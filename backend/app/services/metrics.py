@@ -0,0 +1,244 @@
+import os
+import time
+import threading
+from functools import wraps
+
+
+# Default Prometheus latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+_help = {}
+
+# Queries slower than this are printed; override with SLOW_QUERY_MS or set_slow_query_threshold()
+_slow_query_ms = float(os.environ.get("SLOW_QUERY_MS", 200))
+# Longest statement text printed in the slow-query log
+SLOW_QUERY_TEXT = 500
+
+# Per-thread stack of [statement_count, slowest_statement, slowest_seconds], one per timed_query call
+_local = threading.local()
+
+
+def _key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels)
+    if extra:
+        items.append(extra)
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in items)
+    return "{" + body + "}"
+
+
+def inc_counter(name, labels=None, value=1, help_text=""):
+    with _lock:
+        series = _counters.setdefault(name, {})
+        key = _key(labels)
+        series[key] = series.get(key, 0) + value
+        _help.setdefault(name, help_text)
+
+
+def observe(name, value, labels=None, help_text="", buckets=DEFAULT_BUCKETS):
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        key = _key(labels)
+        if key not in series:
+            series[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+        hist = series[key]
+        for i, bound in enumerate(hist["buckets"]):
+            if value <= bound:
+                hist["counts"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+        _help.setdefault(name, help_text)
+
+
+def set_gauge(name, value, labels=None, help_text=""):
+    with _lock:
+        _gauges.setdefault(name, {})[_key(labels)] = value
+        _help.setdefault(name, help_text)
+
+
+def inc_gauge(name, value=1, labels=None, help_text=""):
+    with _lock:
+        series = _gauges.setdefault(name, {})
+        key = _key(labels)
+        series[key] = series.get(key, 0) + value
+        _help.setdefault(name, help_text)
+
+
+def register_gauge(name, callback, labels=None, help_text=""):
+    """
+    Register a gauge whose value is read from callback() at scrape time.
+    Used by connection pools and job queues to expose their current depth.
+    """
+    with _lock:
+        _gauges.setdefault(name, {})[_key(labels)] = callback
+        _help.setdefault(name, help_text)
+
+
+def set_slow_query_threshold(threshold_ms):
+    global _slow_query_ms
+    _slow_query_ms = float(threshold_ms)
+
+
+def get_slow_query_threshold():
+    return _slow_query_ms
+
+
+def _note_statement(operation, elapsed):
+    calls = getattr(_local, "calls", None)
+    if not calls:
+        return
+    call = calls[-1]
+    call[0] += 1
+    if call[1] is None or elapsed > call[2]:
+        call[1], call[2] = operation, elapsed
+
+
+class _TracedCursor:
+    """
+    Cursor wrapper that times each statement for the enclosing timed_query
+    call. Everything else is passed through to the wrapped cursor.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            _note_statement(operation, time.perf_counter() - start)
+
+    def executemany(self, operation, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, *args, **kwargs)
+        finally:
+            _note_statement(operation, time.perf_counter() - start)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TracedConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return _TracedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def traced_connection(connection):
+    """
+    Wrap a DB connection so that the slow-query log can name the statement
+    that took longest in a timed_query call.
+    """
+    return _TracedConnection(connection)
+
+
+def _statement_text(operation):
+    text = " ".join(str(operation).split())
+    if len(text) > SLOW_QUERY_TEXT:
+        text = text[:SLOW_QUERY_TEXT] + "..."
+    return text
+
+
+def timed_query(func):
+    """
+    Record DB time and call count for a service function, and print it when
+    it exceeds the slow-query threshold, along with its slowest statement
+    (for connections opened through traced_connection).
+    """
+    labels = {"function": func.__name__}
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        # Service calls, not connections: there is no pool, each call opens its own
+        inc_gauge("db_calls_in_flight", 1, help_text="DB-backed service calls currently running")
+        if not hasattr(_local, "calls"):
+            _local.calls = []
+        _local.calls.append([0, None, 0.0])
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            statements, slowest, slowest_seconds = _local.calls.pop()
+            inc_gauge("db_calls_in_flight", -1)
+            inc_counter("db_queries_total", labels, help_text="DB-backed service calls")
+            observe("db_query_duration_seconds", elapsed, labels, help_text="Time spent in DB-backed service calls")
+            if _slow_query_ms >= 0 and elapsed * 1000 >= _slow_query_ms:
+                message = f"[!] Slow query in {func.__name__}: {elapsed * 1000:.1f} ms"
+                if slowest is not None:
+                    message += (f", {statements} statement(s), slowest {slowest_seconds * 1000:.1f} ms: "
+                                f"{_statement_text(slowest)}")
+                print(message)
+
+    return wrapper
+
+
+def render_metrics():
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    # Snapshot under the lock, render outside it: gauge callbacks may update
+    # the registry themselves, and _lock is not reentrant
+    with _lock:
+        counters = {name: sorted(series.items()) for name, series in _counters.items()}
+        gauges = {name: sorted(series.items()) for name, series in _gauges.items()}
+        histograms = {name: [(key, dict(hist, counts=list(hist["counts"]))) for key, hist in sorted(series.items())]
+                      for name, series in _histograms.items()}
+        help_texts = dict(_help)
+
+    lines = []
+    for name in sorted(counters):
+        lines.append(f"# HELP {name} {help_texts.get(name, '')}")
+        lines.append(f"# TYPE {name} counter")
+        for key, value in counters[name]:
+            lines.append(f"{name}{_format_labels(key)} {value}")
+
+    for name in sorted(gauges):
+        lines.append(f"# HELP {name} {help_texts.get(name, '')}")
+        lines.append(f"# TYPE {name} gauge")
+        for key, value in gauges[name]:
+            if callable(value):
+                try:
+                    value = value()
+                except Exception as e:
+                    print(f"[!] Gauge {name} failed: {e}")
+                    continue
+            lines.append(f"{name}{_format_labels(key)} {value}")
+
+    for name in sorted(histograms):
+        lines.append(f"# HELP {name} {help_texts.get(name, '')}")
+        lines.append(f"# TYPE {name} histogram")
+        for key, hist in histograms[name]:
+            for bound, count in zip(hist["buckets"], hist["counts"]):
+                lines.append(f"{name}_bucket{_format_labels(key, ('le', bound))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {hist['count']}")
+            lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']}")
+            lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _gauges.clear()
+        _help.clear()
@@ -0,0 +1,121 @@
+import os
+import time
+import uuid
+import secrets
+import threading
+from functools import wraps
+
+from flask import request, jsonify, g
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+
+# Sessions are signed tokens carrying the user's name, role and regions, so
+# authorizing a request needs no database query. Revocations are held in
+# memory per process until the revoked tokens would have expired anyway.
+
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 8 * 3600))
+
+_secret = os.environ.get("SESSION_SECRET")
+if not _secret:
+    print("[!] SESSION_SECRET not set; using a random key, sessions end when the server restarts")
+    _secret = secrets.token_hex(32)
+
+_serializer = URLSafeTimedSerializer(_secret, salt="session")
+
+_lock = threading.Lock()
+_revoked_tokens = {}    # token id -> time after which the entry can be dropped
+_revoked_users = {}     # username -> tokens issued at or before this time (ns) are invalid
+
+
+def issue_token(username, role, regions):
+    """
+    Returns:
+        str: a signed token valid for SESSION_TTL seconds
+    """
+    # The serializer's own timestamp is whole seconds, too coarse to tell a
+    # re-login apart from a revocation in the same second, so carry our own
+    return _serializer.dumps({"sub": username, "role": role, "regions": list(regions), "jti": uuid.uuid4().hex,
+                              "iat": time.time_ns()})
+
+
+def _prune(now):
+    for jti in [jti for jti, expires in _revoked_tokens.items() if expires < now]:
+        del _revoked_tokens[jti]
+    for username in [u for u, at in _revoked_users.items() if at / 1e9 + SESSION_TTL < now]:
+        del _revoked_users[username]
+
+
+def verify_token(token):
+    """
+    Check a token's signature, age and revocation, all in memory.
+
+    Returns:
+        dict or None: the token's claims, or None if it is not valid
+    """
+    try:
+        claims = _serializer.loads(token, max_age=SESSION_TTL)
+    except (SignatureExpired, BadSignature):
+        return None
+
+    with _lock:
+        if claims["jti"] in _revoked_tokens:
+            return None
+        revoked_at = _revoked_users.get(claims["sub"])
+    if revoked_at is not None and claims.get("iat", 0) <= revoked_at:
+        return None
+    return claims
+
+
+def revoke_token(claims):
+    """
+    Invalidate one session (logout).
+    """
+    now = time.time()
+    with _lock:
+        _prune(now)
+        _revoked_tokens[claims["jti"]] = now + SESSION_TTL
+
+
+def revoke_user(username):
+    """
+    Invalidate every session a user holds, e.g. after their regions change,
+    so stale claims are not honoured. The user logs in again to get new ones.
+    """
+    now = time.time_ns()
+    with _lock:
+        _prune(now / 1e9)
+        _revoked_users[username] = now
+
+
+def _bearer_token():
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):].strip()
+    return None
+
+
+def current_session():
+    """
+    Claims of the request's valid session token, or None.
+    """
+    token = _bearer_token()
+    return verify_token(token) if token else None
+
+
+def require_session(role=None):
+    """
+    Route decorator: reject requests without a valid 'Authorization: Bearer'
+    token (401) or whose token lacks `role` (403). The claims are in g.session.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            claims = current_session()
+            if claims is None:
+                return jsonify({"error": "Authentication required"}), 401
+            if role is not None and claims["role"] != role:
+                return jsonify({"error": "Forbidden"}), 403
+            g.session = claims
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
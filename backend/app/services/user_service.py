@@ -1,38 +1,82 @@
+import os
 import mysql.connector
 from mysql.connector import Error
+from .metrics import timed_query, traced_connection
+from .cache import TTLCache
+
+# Region sets change only on grant, which invalidates them; the TTL bounds staleness otherwise
+_region_cache = TTLCache("user_regions", float(os.environ.get("USER_REGIONS_TTL", 300)))
 
 def connect_db():
-    return mysql.connector.connect(
+    return traced_connection(mysql.connector.connect(
         host='localhost',
         database='change_detection',
         user='root',
         password='root'
-    )
+    ))
+
+
+def split_regions(regions):
+    """
+    Parse a comma-separated region list (users.regions, permission_requests.locations).
+    """
+    if not regions:
+        return []
+    return [region.strip() for region in regions.split(',') if region.strip()]
 
 
-def get_accessible_locations(user_id):
+@timed_query
+def _load_user_regions(username):
+    conn = None
     try:
         conn = connect_db()
         cursor = conn.cursor()
+        cursor.execute("SELECT location FROM user_regions WHERE username = %s ORDER BY location", (username,))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
 
-        query = "SELECT accessible_locations FROM users WHERE user_id = %s"
-        cursor.execute(query, (user_id,))
-        result = cursor.fetchone()
-
-        if result:
-            return result[0].split(',')  # Assuming it's a comma-separated string
-        return []
 
+def get_accessible_locations(username):
+    """
+    Locations a user may see, from user_regions, cached per user until the
+    next grant.
+    """
+    try:
+        return _region_cache.get(username, lambda: _load_user_regions(username))
     except Error as e:
         print(f"[!] MySQL Error: {e}")
         return []
 
-    finally:
-        if conn.is_connected():
-            cursor.close()
-            conn.close()
+
+def invalidate_user_regions(username=None):
+    """
+    Forget the cached region set of one user, or of every user.
+    """
+    _region_cache.invalidate(username)
+
+
+def add_user_regions(cursor, username, regions):
+    """
+    Add rows to user_regions on the caller's cursor, so they commit with the
+    rest of the caller's transaction.
+    """
+    if regions:
+        cursor.executemany("INSERT IGNORE INTO user_regions (username, location) VALUES (%s, %s)",
+                           [(username, region) for region in regions])
 
 
+def replace_user_regions(cursor, username, regions):
+    """
+    Make user_regions hold exactly `regions` for a user (see add_user_regions).
+    """
+    cursor.execute("DELETE FROM user_regions WHERE username = %s", (username,))
+    add_user_regions(cursor, username, regions)
+
+
+@timed_query
 def register_request(request_data):
     print("[+] Registering permission request...")
     try:
@@ -77,20 +121,41 @@ def register_request(request_data):
 
 
 
-def get_notifications():
+@timed_query
+def get_notifications(username=None, regions=None):
+    """
+    Notifications newest first. With a username, or a region list (e.g. from
+    session claims), only those for the accessible locations are read.
+    """
+    conn = None
     try:
+        if username is None and regions is None:
+            query = "SELECT * FROM notifications ORDER BY date DESC"
+            params = ()
+        else:
+            if regions is None:
+                regions = get_accessible_locations(username)
+            if not regions:
+                return []
+            query = ("SELECT * FROM notifications WHERE location IN (" + ", ".join(["%s"] * len(regions)) + ")"
+                     " ORDER BY date DESC")
+            params = tuple(regions)
+
         conn = connect_db()
         cursor = conn.cursor(dictionary=True)
-
-        query = "SELECT * FROM notifications;"
-        cursor.execute(query)
-        return cursor.fetchall()
+        cursor.execute(query, params)
+        notifications = cursor.fetchall()
+        # date is a datetime column since migration 0001; keep the old string format
+        for n in notifications:
+            if not isinstance(n["date"], str):
+                n["date"] = n["date"].strftime("%Y-%m-%d %H:%M:%S")
+        return notifications
 
     except Error as e:
         print(f"[!] MySQL Error: {e}")
         return []
 
     finally:
-        if conn.is_connected():
+        if conn is not None and conn.is_connected():
             cursor.close()
             conn.close()
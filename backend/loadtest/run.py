@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import math
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+# The app imports its packages as top-level 'api' / 'services', as when run from backend/app
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin_db  # noqa: E402
+
+
+# Boots create_app on a local threaded server backed by the SQLite stand-in,
+# drives it with concurrent clients, and reports latency percentiles and
+# throughput per route:
+#
+#   python backend/loadtest/run.py --rows 10000 --clients 200 --requests 25
+
+
+# Routes not driven here:
+#   /api/admin/bulk                       JSON_TABLE, which the stand-in cannot run
+#   /api/admin/approve/<id>, reject/<id>  one-off writes
+#   /api/auth/*, /api/user/request-access logins and writes, not hot reads
+#   /api/user/change-summary/<location>   one row of the change-summary query
+#   /api/user/change-events/<id>/heatmap, /api/user/change-heatmap/<location>
+#                                         no heatmaps are seeded
+#   /metrics                              no database access
+def build_routes(token, centre):
+    lat, lon = centre
+    bbox = f"south={lat - 0.5}&west={lon - 0.5}&north={lat + 0.5}&east={lon + 0.5}"
+    session = {"Authorization": f"Bearer {token}"}
+    return [
+        ("notifications (session)", "/api/user/notifications", session),
+        ("admin access-requests", "/api/admin/access-requests", {}),
+        ("change-summary", "/api/user/change-summary", {}),
+        ("change-events", "/api/user/change-events?limit=100", {}),
+        ("change-events map (clustered)", f"/api/user/change-events/map?{bbox}&zoom=8", {}),
+        ("change-events map (events)", f"/api/user/change-events/map?{bbox}&zoom=14&limit=500", {}),
+    ]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _request(port, path, headers, method="GET", body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        started = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        payload = response.read()
+        return response.status, time.perf_counter() - started, payload
+    finally:
+        conn.close()
+
+
+def drive(port, routes, clients, requests_per_client):
+    """
+    Run `clients` concurrent clients, each issuing requests_per_client
+    requests cycling through the routes.
+
+    Returns:
+        tuple: (list of (route name, status, seconds), wall-clock seconds)
+    """
+    results = []
+    lock = threading.Lock()
+
+    def client(client_id):
+        local = []
+        for i in range(requests_per_client):
+            name, path, headers = routes[(client_id + i) % len(routes)]
+            try:
+                status, seconds, _ = _request(port, path, headers)
+            except OSError:
+                status, seconds = 0, float("nan")
+            local.append((name, status, seconds))
+        with lock:
+            results.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return results, time.perf_counter() - started
+
+
+def summarize(results, wall_seconds):
+    """
+    Returns:
+        dict: route name -> count, errors, p50/p95/p99 in ms and requests/s
+    """
+    summary = {}
+    for name in dict.fromkeys(name for name, _, _ in results):
+        rows = [(status, seconds) for route, status, seconds in results if route == name]
+        latencies = sorted(seconds * 1000 for status, seconds in rows if status == 200)
+        summary[name] = {
+            "count": len(rows),
+            "errors": sum(1 for status, _ in rows if status != 200),
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "throughput_rps": len(rows) / wall_seconds,
+        }
+    return summary
+
+
+def print_report(summary, wall_seconds, total):
+    print(f"{'route':<32} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for name, row in summary.items():
+        print(f"{name:<32} {row['count']:>6} {row['errors']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+              f"{row['p99_ms']:>9.1f} {row['throughput_rps']:>8.1f}")
+    print(f"Total: {total} requests in {wall_seconds:.1f}s ({total / wall_seconds:.1f} req/s)")
+
+
+def run(rows=10000, clients=200, requests_per_client=25, db_path=None, quiet=True):
+    """
+    Seed a stand-in database, serve the app on a free port and drive it.
+
+    Returns:
+        dict: per-route summary (see summarize)
+    """
+    from werkzeug.serving import make_server
+
+    workdir = None
+    if db_path is None:
+        workdir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(workdir.name, "loadtest.db")
+
+    standin_db.create_database(db_path)
+    names, centres = standin_db.seed(db_path, notifications=rows, events=rows, requests=max(rows // 5, 1))
+    restore = standin_db.install(db_path)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    sink = open(os.devnull, "w") if quiet else sys.stdout
+    try:
+        with contextlib.redirect_stdout(sink):
+            from app import create_app
+            server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            port = server.server_port
+
+            status, _, payload = _request(port, "/api/auth/login", {"Content-Type": "application/json"}, "POST",
+                                          json.dumps({"email": "user1@roadmonitor.in", "password": "password"}))
+            if status != 200:
+                raise RuntimeError(f"Login against the stand-in database failed with {status}")
+            claims = json.loads(payload)
+            routes = build_routes(claims["token"], centres[claims["regions"][0]])
+
+            results, wall_seconds = drive(port, routes, clients, requests_per_client)
+            server.shutdown()
+    finally:
+        restore()
+        if quiet:
+            sink.close()
+        if workdir is not None:
+            workdir.cleanup()
+
+    summary = summarize(results, wall_seconds)
+    print_report(summary, wall_seconds, len(results))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the backend against a seeded local stand-in database")
+    parser.add_argument("--rows", type=int, default=10000, help="Notifications and change events to seed")
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=25, help="Requests per client")
+    parser.add_argument("--db", help="Keep the stand-in database at this path instead of a temporary file")
+    parser.add_argument("--json", help="Also write the summary to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own output")
+    args = parser.parse_args()
+
+    summary = run(args.rows, args.clients, args.requests, args.db, quiet=not args.verbose)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
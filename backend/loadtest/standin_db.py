@@ -0,0 +1,390 @@
+import os
+import re
+import random
+import importlib.util
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import errors
+
+
+# An embedded SQLite database behind the subset of the mysql.connector API the
+# services use (connect / cursor(dictionary=True) / execute / fetch* /
+# commit / rollback / is_connected / close). The MySQL-specific SQL in the
+# services is rewritten on the fly. Used by the load harness, never in
+# production.
+#
+# The tables are derived from db/change_detection.sql and db/migrations, so a
+# new migration reaches the stand-in without editing it. Not emulated:
+#   - triggers (seed() fills the geohash columns itself)
+#   - foreign keys, and the data backfills in migrations
+#   - JSON_TABLE, so admin_service.bulk_update_requests (/api/admin/bulk)
+#     fails here; run.py lists the routes the harness does not drive
+
+DB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "db")
+BASELINE_SQL = os.path.join(DB_DIR, "change_detection.sql")
+
+# db/migrate.py by path: backend/app, on sys.path for the services, has its own 'db' package
+_spec = importlib.util.spec_from_file_location("migrate", os.path.join(DB_DIR, "migrate.py"))
+_migrate = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_migrate)
+
+_TABLE_NAME = re.compile(r"^(?:CREATE|ALTER) TABLE `(\w+)`", re.I)
+_COLUMN = re.compile(r"^`(\w+)`\s+(\w+)(.*)$", re.S)
+_INDEX = re.compile(r"^(?:ADD\s+)?(UNIQUE\s+)?(?:KEY|INDEX)\s+`(\w+)`\s*\((.*)\)$", re.I | re.S)
+_PRIMARY_KEY = re.compile(r"^PRIMARY KEY\s*\((.*)\)$", re.I)
+_DEFAULT = re.compile(r"\bDEFAULT\s+('(?:[^']|'')*'|[\w.]+)", re.I)
+_AFTER = re.compile(r"\s+AFTER\s+`(\w+)`\s*$", re.I)
+_COMMENT = re.compile(r"\s+COMMENT\s+'(?:[^']|'')*'", re.I)
+
+
+def _split_clauses(text):
+    """
+    Split on commas outside parentheses and quotes.
+    """
+    clauses, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            clauses.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if "".join(current).strip():
+        clauses.append("".join(current).strip())
+    return clauses
+
+
+def _key_columns(text):
+    # `a`, `b`(10) -> ['a', 'b']
+    return [re.sub(r"\(\d+\)", "", column).strip().strip("`") for column in text.split(",")]
+
+
+def _column(definition):
+    match = _COLUMN.match(definition)
+    name, mysql_type, rest = match.group(1), match.group(2).lower(), _COMMENT.sub("", match.group(3))
+    if mysql_type.endswith("int"):
+        sqlite_type = "INTEGER"
+    elif mysql_type in ("decimal", "double", "float"):
+        sqlite_type = "REAL"
+    elif mysql_type in ("datetime", "timestamp", "date"):
+        sqlite_type = "DATETIME"
+    elif mysql_type.endswith("blob"):
+        sqlite_type = "BLOB"
+    else:
+        sqlite_type = "TEXT"
+    default = _DEFAULT.search(rest)
+    return name, {
+        "type": sqlite_type,
+        "not_null": "NOT NULL" in rest.upper(),
+        "default": default.group(1) if default else None,
+        "auto_increment": "AUTO_INCREMENT" in rest.upper(),
+    }
+
+
+def _create_table(tables, name, statement):
+    body = statement[statement.index("(") + 1:statement.rindex(")")]
+    table = {"columns": {}, "primary_key": [], "indexes": []}
+    for clause in _split_clauses(body):
+        if clause.startswith("`"):
+            column, definition = _column(clause)
+            table["columns"][column] = definition
+        elif _PRIMARY_KEY.match(clause):
+            table["primary_key"] = _key_columns(_PRIMARY_KEY.match(clause).group(1))
+        elif _INDEX.match(clause):
+            unique, index, columns = _INDEX.match(clause).groups()
+            table["indexes"].append((index, _key_columns(columns), bool(unique)))
+        elif not clause.upper().startswith(("CONSTRAINT", "FOREIGN KEY")):
+            raise ValueError(f"Stand-in cannot translate `{name}` clause: {clause}")
+    tables[name] = table
+
+
+def _alter_table(tables, name, statement):
+    table = tables[name]
+    for clause in _split_clauses(statement[_TABLE_NAME.match(statement).end():]):
+        upper = clause.upper()
+        if upper.startswith("ADD COLUMN") or upper.startswith("MODIFY"):
+            definition = re.sub(r"^(?:ADD COLUMN|MODIFY(?:\s+COLUMN)?)\s+", "", clause, flags=re.I)
+            after = _AFTER.search(definition)
+            column, spec = _column(_AFTER.sub("", definition))
+            columns = list(table["columns"].items())
+            if column in table["columns"]:
+                columns = [(c, spec if c == column else d) for c, d in columns]
+            elif after:
+                position = [c for c, _ in columns].index(after.group(1)) + 1
+                columns.insert(position, (column, spec))
+            else:
+                columns.append((column, spec))
+            table["columns"] = dict(columns)
+        elif _INDEX.match(clause):
+            unique, index, columns = _INDEX.match(clause).groups()
+            table["indexes"].append((index, _key_columns(columns), bool(unique)))
+        elif not upper.startswith("ADD CONSTRAINT"):
+            raise ValueError(f"Stand-in cannot translate ALTER TABLE `{name}` clause: {clause}")
+
+
+def mysql_tables():
+    """
+    Tables, columns and indexes of the baseline dump with every migration
+    applied, parsed from the SQL files.
+
+    Returns:
+        dict: table -> {"columns": {name: spec}, "primary_key": [...], "indexes": [...]}
+    """
+    scripts = [BASELINE_SQL] + [str(path) for _, _, path in _migrate.list_migrations()]
+    tables = {}
+    for script in scripts:
+        with open(script) as f:
+            statements = _migrate.split_statements(f.read())
+        for statement in statements:
+            statement = statement.strip()
+            match = _TABLE_NAME.match(statement)
+            if match is None:
+                continue  # data, triggers, /*! ... */ settings and DROP TABLE
+            if statement.upper().startswith("CREATE"):
+                _create_table(tables, match.group(1), statement)
+            else:
+                _alter_table(tables, match.group(1), statement)
+    return tables
+
+
+def sqlite_schema(tables=None):
+    """
+    SQLite DDL for mysql_tables().
+    """
+    tables = mysql_tables() if tables is None else tables
+    statements = []
+    for name, table in tables.items():
+        primary_key = table["primary_key"]
+        lines = []
+        for column, spec in table["columns"].items():
+            line = f"{column} {spec['type']}"
+            if spec["auto_increment"] and primary_key == [column]:
+                line = f"{column} INTEGER PRIMARY KEY AUTOINCREMENT"
+            if spec["not_null"]:
+                line += " NOT NULL"
+            if spec["default"] is not None:
+                line += f" DEFAULT {spec['default']}"
+            lines.append(line)
+        if primary_key and not any(spec["auto_increment"] for spec in table["columns"].values()):
+            lines.append(f"PRIMARY KEY ({', '.join(primary_key)})")
+        statements.append(f"CREATE TABLE {name} (\n    " + ",\n    ".join(lines) + "\n);")
+        for index, columns, unique in table["indexes"]:
+            statements.append(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name}_{index} ON {name} ({', '.join(columns)});")
+    return "\n".join(statements) + "\n"
+
+
+MYSQL_DATE_CODES = {"%i": "%M", "%s": "%S"}
+
+_REWRITES = [
+    (re.compile(r"\bINSERT IGNORE\b", re.I), "INSERT OR IGNORE"),
+    (re.compile(r"\s+FOR UPDATE\b", re.I), ""),
+    (re.compile(r"\bLEFT\(", re.I), "mysql_left("),
+    (re.compile(r"\bGREATEST\(", re.I), "MAX("),
+]
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_converter("DATETIME", _parse_datetime)
+sqlite3.register_adapter(datetime, lambda value: value.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def _date_format(value, fmt):
+    if value is None:
+        return None
+    for mysql_code, python_code in MYSQL_DATE_CODES.items():
+        fmt = fmt.replace(mysql_code, python_code)
+    return datetime.fromisoformat(value).strftime(fmt)
+
+
+def translate(operation, params):
+    for pattern, replacement in _REWRITES:
+        operation = pattern.sub(replacement, operation)
+    # Like mysql.connector, only interpolate when parameters are given
+    if params:
+        operation = operation.replace("%s", "?")
+    return operation
+
+
+class StandInCursor:
+    def __init__(self, connection, dictionary=False):
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, operation, params=()):
+        try:
+            self._cursor.execute(translate(operation, params), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise errors.DatabaseError(msg=str(e))
+
+    def executemany(self, operation, seq_params):
+        seq_params = list(seq_params)
+        if not seq_params:
+            return
+        try:
+            self._cursor.executemany(translate(operation, seq_params[0]), seq_params)
+        except sqlite3.Error as e:
+            raise errors.DatabaseError(msg=str(e))
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, detect_types=sqlite3.PARSE_DECLTYPES,
+                                     check_same_thread=False)
+        self._conn.create_function("mysql_left", 2, lambda value, n: None if value is None else value[:n])
+        self._conn.create_function("DATE_FORMAT", 2, _date_format)
+        self._conn.create_function("NOW", 0, lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self._open = True
+
+    def cursor(self, dictionary=False):
+        return StandInCursor(self._conn, dictionary)
+
+    def start_transaction(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        self._conn.close()
+        self._open = False
+
+
+def create_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(sqlite_schema())
+    conn.commit()
+    conn.close()
+
+
+def seed(path, notifications=10000, requests=2000, events=10000, users=200, locations=20, rng_seed=0):
+    """
+    Fill the stand-in database with synthetic rows. User i is 'user{i}' with
+    password 'password' and access to a few of the locations.
+    """
+    rng = random.Random(rng_seed)
+    names = [f"Location {i}" for i in range(locations)]
+    centres = {name: (17 + rng.random(), 78 + rng.random()) for name in names}
+    start = datetime(2025, 1, 1)
+
+    conn = sqlite3.connect(path)
+    user_rows = []
+    region_rows = []
+    for i in range(users):
+        regions = rng.sample(names, 3)
+        user_rows.append((f"User {i}", f"user{i}@roadmonitor.in", "admin" if i == 0 else "user",
+                          f"user{i}", "password", ",".join(regions)))
+        region_rows.extend((f"user{i}", region) for region in regions)
+    conn.executemany("INSERT INTO users (full_name, email, role, username, password, regions) VALUES (?, ?, ?, ?, ?, ?)",
+                     user_rows)
+    conn.executemany("INSERT INTO user_regions (username, location) VALUES (?, ?)", region_rows)
+
+    conn.executemany(
+        "INSERT INTO permission_requests (full_name, email, department, locations, justification, submitted_at, status) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(f"user{rng.randrange(users)}", "user@roadmonitor.in", "Engineering", ",".join(rng.sample(names, 2)),
+          "Project", start + timedelta(minutes=i), rng.choice(["pending", "approved", "approved", "rejected"]))
+         for i in range(requests)],
+    )
+
+    notification_rows = []
+    for i in range(notifications):
+        location = rng.choice(names)
+        lat, lon = centres[location]
+        notification_rows.append((f"n{i}", "Road Change Alert", "Significant road changes detected.",
+                                  start + timedelta(minutes=i), location, lat, lon))
+    conn.executemany("INSERT INTO notifications (id, title, message, date, location, latitude, longitude) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?)", notification_rows)
+
+    # Geohashes are computed by the backend's encoder, standing in for the MySQL trigger
+    from services.geo import encode_geohash
+
+    summary = {}
+    event_rows = []
+    for i in range(events):
+        location = rng.choice(names)
+        lat, lon = centres[location]
+        lat += rng.uniform(-0.05, 0.05)
+        lon += rng.uniform(-0.05, 0.05)
+        change = rng.uniform(0, 40)
+        new_pixels = rng.randrange(100000)
+        event_rows.append((location, "a.jpg", "b.jpg", start + timedelta(minutes=i), 500000, new_pixels, change,
+                           int(change > 15), 40, 12, lat, lon, encode_geohash(lat, lon)))
+        count, significant, total, peak = summary.get(location, (0, 0, 0, 0.0))
+        summary[location] = (count + 1, significant + int(change > 15), total + new_pixels, max(peak, change))
+    conn.executemany(
+        "INSERT INTO change_events (location, image1_path, image2_path, detected_at, old_road_pixels, new_road_pixels, "
+        "change_percentage, is_significant, old_road_components, new_road_components, latitude, longitude, geohash) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", event_rows)
+    conn.executemany(
+        "INSERT INTO location_change_summary (location, event_count, significant_count, new_road_pixels_total, "
+        "max_change_percentage) VALUES (?, ?, ?, ?, ?)",
+        [(location,) + values for location, values in summary.items()])
+
+    conn.commit()
+    conn.close()
+    return names, centres
+
+
+_installed = threading.Lock()
+
+
+def install(path):
+    """
+    Route every mysql.connector.connect() in this process to the stand-in
+    database at `path`.
+
+    Returns:
+        callable: restores the real mysql.connector.connect
+    """
+    real_connect = mysql.connector.connect
+
+    def connect(*args, **kwargs):
+        return StandInConnection(path)
+
+    with _installed:
+        mysql.connector.connect = connect
+
+    def restore():
+        with _installed:
+            mysql.connector.connect = real_connect
+    return restore
@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from backend.app.services.admin_service import get_access_requests, get_user_access_data, update_request_status, grant_access_to_user
+from backend.app.services.admin_service import update_request_status, grant_access_to_user
+from backend.app.services.admin_service import get_admin_dashboard, invalidate_admin_dashboard, bulk_update_requests
+from backend.app.services import metrics
 
 # Replace 'your_module_name' with the actual Python file name (without .py)
 
@@ -17,43 +19,6 @@ def mock_conn():
         yield mock_connect, mock_connection, mock_cursor
 
 
-def test_get_access_requests(mock_conn):
-    _, mock_connection, mock_cursor = mock_conn
-
-    mock_cursor.fetchall.return_value = [
-        {
-            "id": 1,
-            "full_name": "Sam Singh",
-            "department": "IT",
-            "locations": "RegionX",
-            "submitted_at": MagicMock(strftime=lambda fmt: "2025-05-09 12:00:00"),
-            "status": "pending"
-        }
-    ]
-
-    result = get_access_requests()
-    assert len(result) == 1
-    assert result[0]["full_name"] == "Sam Singh"
-    assert result[0]["submitted_at"] == "2025-05-09 12:00:00"
-
-
-def test_get_user_access_data(mock_conn):
-    _, mock_connection, mock_cursor = mock_conn
-
-    mock_cursor.fetchall.return_value = [
-        {
-            "full_name": "Riya Sharma",
-            "status": "approved",
-            "submitted_at": MagicMock(strftime=lambda fmt: "2025-05-09 13:00:00")
-        }
-    ]
-
-    result = get_user_access_data()
-    assert len(result) == 1
-    assert result[0]["status"] == "approved"
-    assert result[0]["submitted_at"] == "2025-05-09 13:00:00"
-
-
 def test_update_request_status_success(mock_conn):
     _, mock_connection, mock_cursor = mock_conn
 
@@ -89,3 +54,76 @@ def test_grant_access_to_user_not_found(mock_conn):
 
     result = grant_access_to_user(999)
     assert result is False
+
+
+def test_admin_dashboard_single_query_and_cache(mock_conn):
+    mock_connect, _, mock_cursor = mock_conn
+    invalidate_admin_dashboard()
+    metrics.reset_metrics()
+
+    mock_cursor.fetchall.return_value = [
+        {"id": 1, "full_name": "Sam Singh", "department": "IT", "locations": "RegionX",
+         "submitted_at": "2025-05-09 12:00:00", "status": "pending"},
+        {"id": 2, "full_name": "Riya Sharma", "department": "IT", "locations": "RegionY",
+         "submitted_at": "2025-05-09 13:00:00", "status": "approved"},
+    ]
+
+    first = get_admin_dashboard()
+    second = get_admin_dashboard()
+
+    assert first is second
+    assert mock_connect.call_count == 1
+    assert mock_cursor.execute.call_count == 1
+    assert [r["id"] for r in first["accessRequests"]] == [1]
+    assert first["userAccesses"] == [
+        {"full_name": "Riya Sharma", "status": "approved", "submitted_at": "2025-05-09 13:00:00"}
+    ]
+
+    text = metrics.render_metrics()
+    assert 'cache_requests_total{cache="admin_dashboard",result="hit"} 1' in text
+    assert 'cache_requests_total{cache="admin_dashboard",result="miss"} 1' in text
+
+    invalidate_admin_dashboard()
+    get_admin_dashboard()
+    assert mock_connect.call_count == 2
+
+
+def test_bulk_update_requests(mock_conn):
+    _, mock_connection, mock_cursor = mock_conn
+    mock_cursor.fetchall.return_value = [(1, "sam", "pending"), (2, "riya", "pending"), (3, "sam", "pending")]
+
+    results = bulk_update_requests([1, 2, 5, 9], [3, 9])
+
+    assert results == {1: "approved", 2: "approved", 3: "rejected", 5: "not_found", 9: "conflict"}
+    # lock, grant, region rows (delete + insert), status update: one transaction
+    assert mock_cursor.execute.call_count == 5
+    mock_connection.start_transaction.assert_called_once()
+    mock_connection.commit.assert_called_once()
+    _, status_params = mock_cursor.execute.call_args[0]
+    assert status_params == (1, 2, 1, 2, 3)
+
+
+def test_bulk_update_skips_processed_requests(mock_conn):
+    _, mock_connection, mock_cursor = mock_conn
+    # 2 was approved and 3 rejected by another admin before the lock was taken
+    mock_cursor.fetchall.return_value = [(1, "sam", "pending"), (2, "riya", "approved"), (3, "sam", "rejected")]
+
+    results = bulk_update_requests([1, 2], [3])
+
+    assert results == {1: "approved", 2: "already_processed", 3: "already_processed"}
+    lock_query = mock_cursor.execute.call_args_list[0][0][0]
+    assert "status" in lock_query and "FOR UPDATE" in lock_query
+    # Only the pending request is granted and has its status changed
+    _, grant_params = mock_cursor.execute.call_args_list[1][0]
+    assert grant_params == (1, 1)
+    _, status_params = mock_cursor.execute.call_args[0]
+    assert status_params == (1, 1)
+    mock_connection.commit.assert_called_once()
+
+
+def test_bulk_update_with_nothing_pending_changes_nothing(mock_conn):
+    _, mock_connection, mock_cursor = mock_conn
+    mock_cursor.fetchall.return_value = [(4, "sam", "approved")]
+
+    assert bulk_update_requests([], [4]) == {4: "already_processed"}
+    assert mock_cursor.execute.call_count == 1
@@ -0,0 +1,30 @@
+import os
+import sys
+from unittest.mock import patch
+import pytest
+
+pytest.importorskip("flask_cors")
+from flask import Flask
+
+# Blueprints import their services as top-level 'services', as when run from backend/app
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from api.auth_routes import auth_bp  # noqa: E402
+from services.session import verify_token  # noqa: E402
+
+
+def test_login_claims_come_from_user_regions():
+    app = Flask(__name__)
+    app.register_blueprint(auth_bp, url_prefix="/api/auth")
+
+    with patch("api.auth_routes.login_user", return_value=("sammm", "user")), \
+            patch("api.auth_routes.get_accessible_locations", return_value=["Hyderabad", "Warangal"]) as regions:
+        response = app.test_client().post("/api/auth/login", json={"email": "s@roadmonitor.in", "password": "x"})
+
+    assert response.status_code == 200
+    regions.assert_called_once_with("sammm")
+    body = response.get_json()
+    assert body["regions"] == ["Hyderabad", "Warangal"]
+    assert verify_token(body["token"])["regions"] == ["Hyderabad", "Warangal"]
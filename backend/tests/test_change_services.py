@@ -0,0 +1,133 @@
+import pytest
+from datetime import datetime
+from unittest.mock import patch, MagicMock
+from backend.app.services.change_service import get_change_events, get_location_summaries, get_location_summary
+from backend.app.services.change_service import get_events_in_bbox, get_event_clusters
+from backend.app.services.geo import encode_geohash, covering_prefixes
+
+
+@pytest.fixture
+def mock_conn():
+    with patch('backend.app.services.change_service.mysql.connector.connect') as mock_connect:
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connection.is_connected.return_value = True
+        mock_connect.return_value = mock_connection
+
+        yield mock_connect, mock_connection, mock_cursor
+
+
+def test_get_change_events_filters(mock_conn):
+    _, _, mock_cursor = mock_conn
+    mock_cursor.fetchall.return_value = [
+        {"id": 7, "location": "Hyderabad", "change_percentage": 21.5, "detected_at": datetime(2025, 5, 9, 12, 0, 0)}
+    ]
+
+    result = get_change_events(location="Hyderabad", significant_only=True, limit=5)
+
+    query, params = mock_cursor.execute.call_args[0]
+    assert "location = %s" in query
+    assert "is_significant = 1" in query
+    assert params == ("Hyderabad", 5)
+    assert result[0]["detected_at"] == "2025-05-09 12:00:00"
+
+
+def test_get_location_summaries(mock_conn):
+    _, _, mock_cursor = mock_conn
+    mock_cursor.fetchall.return_value = [
+        {"location": "Hyderabad", "event_count": 3, "significant_count": 1, "last_detected_at": None}
+    ]
+
+    result = get_location_summaries()
+    assert result[0]["event_count"] == 3
+    assert result[0]["last_detected_at"] is None
+
+
+def test_get_location_summary_missing(mock_conn):
+    _, _, mock_cursor = mock_conn
+    mock_cursor.fetchone.return_value = None
+
+    assert get_location_summary("Nowhere") is None
+    mock_cursor.execute.assert_called_with(
+        "SELECT * FROM location_change_summary WHERE location = %s", ("Nowhere",)
+    )
+
+
+def test_geohash_cover_contains_points_in_bbox():
+    assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    prefixes = covering_prefixes(17.3, 78.4, 17.5, 78.6)
+    assert len(prefixes) <= 32
+    for lat, lon in [(17.3, 78.4), (17.385, 78.4867), (17.5, 78.6)]:
+        assert any(encode_geohash(lat, lon).startswith(p) for p in prefixes)
+
+    with pytest.raises(ValueError):
+        covering_prefixes(10, 170, 20, -170)
+
+
+def test_bbox_events_and_clusters(mock_conn):
+    _, _, mock_cursor = mock_conn
+    mock_cursor.fetchall.return_value = []
+
+    get_events_in_bbox(17.3, 78.4, 17.5, 78.6, limit=50)
+    query, params = mock_cursor.execute.call_args[0]
+    assert "geohash LIKE %s" in query
+    assert params[-5:] == (17.3, 17.5, 78.4, 78.6, 50)
+
+    mock_cursor.fetchall.return_value = [
+        {"cell": "tepf", "count": 12, "latitude": 17.4, "longitude": 78.5,
+         "max_change_percentage": 31.0, "significant_count": 3}
+    ]
+    clusters = get_event_clusters(17.3, 78.4, 17.5, 78.6, precision=4)
+    query, params = mock_cursor.execute.call_args[0]
+    assert "GROUP BY cell" in query
+    assert params[0] == 4
+    assert clusters[0]["count"] == 12
+
+
+def test_change_heatmap_round_trip(mock_conn):
+    np = pytest.importorskip("numpy")
+    from dl_model.compare import change_heatmap
+    from dl_model.events import encode_heatmap
+    from backend.app.services.change_service import get_change_heatmap
+
+    old_roads = np.zeros((150, 200), dtype=bool)
+    old_roads[10:20, :] = True
+    new_roads = np.zeros((150, 200), dtype=bool)
+    new_roads[140:, 192:] = True
+    heatmap = change_heatmap(old_roads, new_roads, cell_size=64)
+    assert heatmap.old_roads.shape == (3, 4)
+    assert heatmap.old_roads[0].tolist() == [640, 640, 640, 80]
+
+    _, _, mock_cursor = mock_conn
+    mock_cursor.fetchone.return_value = {
+        "event_id": 7, "location": "Hyderabad", "detected_at": datetime(2025, 5, 9, 12, 0, 0), "cell_size": 64,
+        "height": 150, "width": 200, "grid_rows": 3, "grid_cols": 4, "counts": encode_heatmap(heatmap),
+    }
+
+    result = get_change_heatmap(7)
+    assert result["old_road"] == heatmap.old_roads.tolist()
+    assert result["new_road"][2] == [0, 0, 0, 80]
+    assert result["max_new_road"] == 80
+    assert "counts" not in result
+
+
+def test_significant_event_raises_linked_notification():
+    pytest.importorskip("numpy")
+    from dl_model.events import record_change_event, INSERT_NOTIFICATION
+
+    stats = {"old_road_pixels": 100, "new_road_pixels": 40, "change_percentage": 40.0, "is_significant": True,
+             "old_road_components": 3, "new_road_components": 5}
+    with patch('dl_model.events.mysql.connector.connect') as mock_connect:
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.lastrowid = 42
+
+        assert record_change_event("Hyderabad", "images/2024.jpg", "images/2025.jpg", stats) == 42
+        mock_cursor.execute.assert_any_call(INSERT_NOTIFICATION, (
+            "change-42", "Road Change Alert", "Significant road changes detected between 2024 and 2025 (40.0%).", 42))
+
+        mock_cursor.execute.reset_mock()
+        record_change_event("Hyderabad", "images/2024.jpg", "images/2025.jpg", dict(stats, is_significant=False))
+        assert INSERT_NOTIFICATION not in [call.args[0] for call in mock_cursor.execute.call_args_list]
@@ -0,0 +1,135 @@
+import sys
+import time
+import types
+import socket
+import threading
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dl_model.client import send_message, recv_message, InferenceClient, RemoteModel, load_model
+from dl_model.daemon import TileBatcher, InferenceServer
+
+
+class RecordingModel:
+    """Returns each tile's mean; the first call blocks until released so requests can queue up behind it."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def predict_on_batch(self, batch):
+        self.calls.append(len(batch))
+        if len(self.calls) == 1:
+            self.release.wait(5)
+        if (batch < 0).any():
+            raise ValueError("negative input")
+        return batch.mean(axis=(1, 2, 3), keepdims=True)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_framing_round_trip():
+    left, right = socket.socketpair()
+    with left, right:
+        payload = np.arange(300000, dtype=np.float32).tobytes()
+        sender = threading.Thread(target=lambda: (send_message(left, {"op": "predict", "shape": [300000]}, payload),
+                                                  send_message(left, {"op": "health"})))
+        sender.start()
+        assert recv_message(right) == ({"op": "predict", "shape": [300000]}, payload)
+        assert recv_message(right) == ({"op": "health"}, b"")
+        sender.join()
+
+        # A connection closed mid-message is reported, not returned short
+        left.sendall(b"\x00\x00\x00\x10\x00\x00\x00\x00{")
+        left.close()
+        with pytest.raises(ConnectionError):
+            recv_message(right)
+
+
+def run_callers(batcher, sizes):
+    results = [None] * len(sizes)
+
+    def call(i, size):
+        batch = np.full((size, 2, 2, 3), i + 1, dtype=np.float32)
+        try:
+            results[i] = batcher.predict(batch)
+        except ValueError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i, size)) for i, size in enumerate(sizes)]
+    return threads, results
+
+
+def test_batcher_merges_concurrent_callers():
+    model = RecordingModel()
+    batcher = TileBatcher(model, max_batch=8, max_wait=0.05)
+
+    sizes = [2, 3, 3, 4]
+    threads, results = run_callers(batcher, sizes)
+    threads[0].start()
+    wait_for(lambda: model.calls == [2])
+    # Queued one at a time so the order is known
+    for i in range(1, 4):
+        threads[i].start()
+        wait_for(lambda: batcher.queued_tiles() == sum(sizes[1:i + 1]))
+
+    # Tiles, not requests, are counted while the model is busy
+    assert batcher.queued_tiles() == 10
+    model.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    # 3 + 3 fit in one call; the 4-tile request would exceed max_batch and starts the next
+    assert model.calls == [2, 6, 4]
+    assert batcher.queued_tiles() == 0
+    for i, (result, size) in enumerate(zip(results, sizes)):
+        assert result.shape == (size, 1, 1, 1) and (result == i + 1).all()
+
+
+def test_batcher_reports_errors_to_each_caller():
+    model = RecordingModel()
+    model.release.set()
+    batcher = TileBatcher(model, max_batch=8, max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.predict(-np.ones((1, 2, 2, 3), dtype=np.float32))
+    assert batcher.predict(np.ones((1, 2, 2, 3), dtype=np.float32)).tolist() == [[[[1.0]]]]
+
+
+def test_daemon_serves_health_and_predictions(tmp_path, monkeypatch):
+    model = RecordingModel()
+    model.release.set()
+    architecture = types.ModuleType("dl_model.architecture")
+    architecture.load_model_weights = lambda path, *args: model
+    monkeypatch.setitem(sys.modules, "dl_model.architecture", architecture)
+
+    socket_path = str(tmp_path / "inference.sock")
+    server = InferenceServer(socket_path, str(tmp_path / "model.h5"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        client = InferenceClient(socket_path, timeout=5)
+        assert client.health()["status"] == "loading" and not client.is_ready()
+
+        server.load(max_batch=4, max_wait=0)
+        assert client.health() == {"status": "ready", "model": str(tmp_path / "model.h5"), "queued": 0}
+
+        batch = np.random.default_rng(0).random((3, 256, 256, 3)).astype(np.float32)
+        np.testing.assert_allclose(client.predict(batch)[:, 0, 0, 0], batch.mean(axis=(1, 2, 3)), rtol=1e-5)
+
+        remote = load_model(str(tmp_path / "model.h5"), socket_path)
+        assert isinstance(remote, RemoteModel)
+        assert remote.predict(batch[:1]).shape == (1, 1, 1, 1)
+        # A different model is loaded locally instead
+        assert load_model(str(tmp_path / "other.h5"), socket_path) is model
+
+        with pytest.raises(RuntimeError):
+            client._call({"op": "unknown"})
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,104 @@
+import sys
+import types
+import sqlite3
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from dl_model.distributed import (submit_scene, lease_unit, requeue_expired, _complete_unit, job_progress,
+                                  assemble_mask, run_worker, connect_queue)
+
+
+class RoadEverywhere:
+    def predict(self, batch, verbose=0):
+        return np.ones((len(batch), 256, 256, 1), dtype=np.float32)
+
+
+@pytest.fixture
+def scene(tmp_path):
+    path = tmp_path / "scene.png"
+    cv2.imwrite(str(path), np.zeros((128, 192, 3), dtype=np.uint8))
+    return str(path)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return str(tmp_path / "queue.db")
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    architecture = types.ModuleType("dl_model.architecture")
+    architecture.load_model_weights = lambda path: RoadEverywhere()
+    monkeypatch.setitem(sys.modules, "dl_model.architecture", architecture)
+
+
+def unit_row(queue, unit_id):
+    conn = sqlite3.connect(queue)
+    try:
+        return conn.execute("SELECT status, worker, attempts FROM units WHERE unit_id = ?", (unit_id,)).fetchone()
+    finally:
+        conn.close()
+
+
+def test_lease_and_complete(queue, scene):
+    job_id = submit_scene(queue, scene, tile_size=64, overlap=0, tiles_per_unit=3)
+    assert job_progress(queue, job_id) == {"pending": 2}
+
+    conn = connect_queue(queue)
+    try:
+        unit_id, leased_job, tiles, image_path = lease_unit(conn, "a", 60)
+        assert (leased_job, len(tiles), image_path) == (job_id, 3, scene)
+        assert unit_row(queue, unit_id) == ("leased", "a", 1)
+
+        # Only the lease holder can complete the unit
+        assert not _complete_unit(conn, unit_id, job_id, "b", [])
+        assert _complete_unit(conn, unit_id, job_id, "a", [])
+        assert unit_row(queue, unit_id)[0] == "done"
+
+        lease_unit(conn, "b", 60)
+        assert lease_unit(conn, "c", 60) is None
+    finally:
+        conn.close()
+    assert job_progress(queue, job_id) == {"done": 1, "leased": 1}
+
+
+def test_expired_lease_is_requeued_then_failed(queue, scene):
+    job_id = submit_scene(queue, scene, tile_size=64, overlap=0, tiles_per_unit=6)
+
+    conn = connect_queue(queue)
+    try:
+        unit_id = lease_unit(conn, "a", -1)[0]
+        assert requeue_expired(queue, max_attempts=2) == (1, 0)
+        assert unit_row(queue, unit_id) == ("pending", None, 1)
+
+        # The stalled worker's late results are discarded once another holds the lease
+        assert lease_unit(conn, "b", -1)[0] == unit_id
+        assert not _complete_unit(conn, unit_id, job_id, "a", [])
+
+        assert requeue_expired(queue, max_attempts=2) == (0, 1)
+        assert unit_row(queue, unit_id) == ("failed", None, 2)
+    finally:
+        conn.close()
+
+    with pytest.raises(RuntimeError):
+        assemble_mask(queue, job_id, poll_interval=0)
+
+
+def test_worker_assembles_full_mask(queue, scene, fake_model):
+    job_id = submit_scene(queue, scene, tile_size=64, overlap=0, tiles_per_unit=4)
+    assert run_worker(queue, "unused.h5", worker_id="a") == 2
+    assert job_progress(queue, job_id) == {"done": 2}
+    assert assemble_mask(queue, job_id, poll_interval=0).min() == 1
+
+
+def test_worker_fails_job_with_unreadable_scene(queue, scene, fake_model, tmp_path):
+    job_id = submit_scene(queue, scene, tile_size=64, overlap=0, tiles_per_unit=2)
+    (tmp_path / "scene.png").unlink()
+
+    # The worker survives and no other worker can lease the job's units
+    assert run_worker(queue, "unused.h5", worker_id="a") == 0
+    assert job_progress(queue, job_id) == {"failed": 3}
+    with pytest.raises(RuntimeError):
+        assemble_mask(queue, job_id, poll_interval=0)
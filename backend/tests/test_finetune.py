@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from dl_model.finetune import ArraySource, DecodeCache, Scene, WindowSampler, open_scenes, open_source
+
+
+def write_scene(path, height, width, seed=0):
+    image = (np.random.default_rng(seed).random((height, width, 3)) * 255).astype(np.uint8)
+    cv2.imwrite(str(path), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    return image
+
+
+def test_opening_a_scene_reads_only_its_header(tmp_path):
+    write_scene(tmp_path / "scene.png", 70, 90)
+    cv2.imwrite(str(tmp_path / "mask.png"), np.zeros((70, 90), dtype=np.uint8))
+
+    cache = DecodeCache(2**30)
+    scene, = open_scenes([(str(tmp_path / "scene.png"), str(tmp_path / "mask.png"))], cache)
+    assert (scene.image.shape, scene.mask.shape, cache.decodes) == ((70, 90, 3), (70, 90), 0)
+
+    assert scene.image.read(10, 20, 32).shape == (32, 32, 3)
+    assert cache.decodes == 1
+
+
+def test_decode_cache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for i in range(3):
+        write_scene(tmp_path / f"{i}.png", 40, 50, seed=i)
+        paths.append(str(tmp_path / f"{i}.png"))
+    scene_bytes = 40 * 50 * 3
+
+    cache = DecodeCache(2 * scene_bytes)
+    cache.get(paths[0], "image")
+    cache.get(paths[1], "image")
+    cache.get(paths[0], "image")  # hit; 1 is now the least recently used
+    cache.get(paths[2], "image")
+    assert cache.decodes == 3
+
+    cache.get(paths[0], "image")
+    assert cache.decodes == 3
+    cache.get(paths[1], "image")
+    assert cache.decodes == 4
+
+    # The most recent decode is kept even when it alone exceeds the limit
+    small = DecodeCache(1)
+    assert small.get(paths[0], "image").shape == (40, 50, 3)
+    assert small.get(paths[0], "image") is small.get(paths[0], "image")
+
+
+def test_window_sampler_serves_each_read_reuse_times():
+    image = np.arange(300 * 300 * 3, dtype=np.uint32).astype(np.uint8).reshape(300, 300, 3)
+    scene = Scene("scene", ArraySource(image), ArraySource(np.ones((300, 300), dtype=np.uint8)))
+
+    sampler = WindowSampler([scene], window_size=256, cache_size=1, reuse=4)
+    windows = [sampler.sample() for _ in range(12)]
+    assert sampler.reads == 3
+    for first in range(0, 12, 4):
+        assert all(windows[i][0] is windows[first][0] for i in range(first, first + 4))
+    assert windows[0][0].shape == (256, 256, 3) and windows[0][1].shape == (256, 256, 1)
+
+
+def test_window_sampler_visits_a_scene_for_several_windows():
+    scenes = [Scene(str(i), ArraySource(np.full((256, 256, 3), i, dtype=np.uint8)),
+                    ArraySource(np.zeros((256, 256), dtype=np.uint8))) for i in range(4)]
+    sampler = WindowSampler(scenes, window_size=256, cache_size=1, reuse=1, windows_per_visit=5, seed=3)
+    visited = [int(sampler.sample()[0][0, 0, 0]) for _ in range(20)]
+    assert all(len(set(visited[i:i + 5])) == 1 for i in range(0, 20, 5))
+
+
+def test_raster_source_reads_windows(tmp_path):
+    rasterio = pytest.importorskip("rasterio")
+
+    image = (np.random.default_rng(0).random((3, 200, 160)) * 255).astype(np.uint8)
+    mask = np.where(np.arange(200 * 160).reshape(200, 160) % 3 == 0, 255, 0).astype(np.uint8)
+    profile = {"driver": "GTiff", "height": 200, "width": 160, "dtype": "uint8",
+               "tiled": True, "blockxsize": 64, "blockysize": 64}
+    with rasterio.open(tmp_path / "scene.tif", "w", count=3, **profile) as dst:
+        dst.write(image)
+    with rasterio.open(tmp_path / "mask.tif", "w", count=1, **profile) as dst:
+        dst.write(mask, 1)
+
+    cache = DecodeCache(2**30)
+    scene = open_source(str(tmp_path / "scene.tif"), "image", cache)
+    roads = open_source(str(tmp_path / "mask.tif"), "mask", cache)
+    assert type(scene).__name__ == "RasterSource"
+    assert (scene.shape, roads.shape) == ((200, 160, 3), (200, 160))
+
+    np.testing.assert_array_equal(scene.read(70, 30, 64), image[:, 70:134, 30:94].transpose(1, 2, 0))
+    np.testing.assert_array_equal(roads.read(70, 30, 64), mask[70:134, 30:94] > 127)
+    assert cache.decodes == 0
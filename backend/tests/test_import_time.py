@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+# Cold-start budget per module, in seconds; override with IMPORT_BUDGET_SECONDS
+BUDGET = float(os.environ.get("IMPORT_BUDGET_SECONDS", 3.0))
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+APP_DIR = os.path.join(REPO_ROOT, "backend", "app")
+
+HEAVY_MODULES = ["tensorflow", "matplotlib"]
+
+PROBE = """
+import sys, time, json, importlib
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+
+def cold_import(module, cwd):
+    env = dict(os.environ, ROAD_HEADLESS="1")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE, module] + HEAVY_MODULES,
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_backend_app_import_budget():
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+
+    result = cold_import("app", APP_DIR)
+    assert result["loaded"] == []
+    assert result["seconds"] < BUDGET
+
+
+@pytest.mark.parametrize("module", [
+    "dl_model.single",
+    "dl_model.compare",
+    "dl_model.detect",
+    "dl_model.notification",
+    "dl_model.client",
+])
+def test_dl_model_entry_point_import_budget(module):
+    pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+    if module == "dl_model.notification":
+        pytest.importorskip("mysql.connector")
+
+    result = cold_import(module, REPO_ROOT)
+    assert result["loaded"] == []
+    assert result["seconds"] < BUDGET
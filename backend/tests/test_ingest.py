@@ -0,0 +1,142 @@
+import os
+from unittest.mock import patch
+
+from dl_model import ingest
+from dl_model.ingest import connect_registry, ingest_once, register_image
+
+
+def test_file_removed_before_hashing_is_skipped(tmp_path):
+    drop_dir = tmp_path / "images"
+    (drop_dir / "hyderabad").mkdir(parents=True)
+    kept = drop_dir / "hyderabad" / "2024.jpg"
+    removed = drop_dir / "hyderabad" / "2025.jpg"
+    kept.write_bytes(b"old capture")
+    removed.write_bytes(b"new capture")
+
+    real_sha256 = ingest.file_sha256
+
+    def remove_then_hash(path, *args):
+        if path == str(removed):
+            os.remove(path)
+        return real_sha256(path, *args)
+
+    conn = connect_registry(str(tmp_path / "ingest.db"))
+    try:
+        pending = {}
+        assert ingest_once(conn, str(drop_dir), pending, settle_seconds=0) == []
+        with patch("dl_model.ingest.file_sha256", side_effect=remove_then_hash):
+            registered = ingest_once(conn, str(drop_dir), pending, settle_seconds=0)
+
+        assert len(registered) == 1
+        assert conn.execute("SELECT path FROM images").fetchall() == [(str(kept),)]
+        assert conn.execute("SELECT COUNT(*) FROM seen_files").fetchone() == (1,)
+    finally:
+        conn.close()
+
+
+def test_comparison_finished_after_next_one_starts(tmp_path):
+    from dl_model.ingest import run_pending_comparisons
+
+    conn = connect_registry(str(tmp_path / "ingest.db"))
+    try:
+        for location in ("a", "b"):
+            for epoch in ("2024", "2025"):
+                (tmp_path / location).mkdir(exist_ok=True)
+                path = tmp_path / location / f"{epoch}.jpg"
+                path.write_bytes(f"{location} {epoch}".encode())
+                register_image(conn, str(path), location, 1, 0)
+
+        calls = []
+
+        def runner(old_path, new_path, location):
+            calls.append(("start", location))
+
+            def finish():
+                calls.append(("finish", location))
+                if location == "b":
+                    raise IOError("disk full")
+                return 12.5, f"{location}_result.jpg"
+            return finish
+
+        assert run_pending_comparisons(conn, runner) == 2
+        # a's result is published only after b's inference ran
+        assert calls == [("start", "a"), ("start", "b"), ("finish", "a"), ("finish", "b")]
+        rows = conn.execute("SELECT status, result_path, error FROM comparisons ORDER BY comparison_id").fetchall()
+        assert rows == [("done", "a_result.jpg", None), ("failed", None, "disk full")]
+    finally:
+        conn.close()
+
+
+def comparisons(conn):
+    return conn.execute(
+        "SELECT old.epoch, new.epoch, c.status FROM comparisons c "
+        "JOIN images old ON old.image_id = c.old_image_id JOIN images new ON new.image_id = c.new_image_id "
+        "ORDER BY old.epoch, new.epoch"
+    ).fetchall()
+
+
+def test_growing_file_waits_until_settled(tmp_path):
+    drop_dir = tmp_path / "images"
+    (drop_dir / "hyderabad").mkdir(parents=True)
+    capture = drop_dir / "hyderabad" / "2025.jpg"
+    capture.write_bytes(b"first half")
+
+    conn = connect_registry(str(tmp_path / "ingest.db"))
+    try:
+        pending = {}
+        assert ingest_once(conn, str(drop_dir), pending, settle_seconds=0) == []
+        with open(capture, "ab") as f:
+            f.write(b" second half")
+        # Changed since the last pass: the debounce starts over
+        assert ingest_once(conn, str(drop_dir), pending, settle_seconds=0) == []
+        assert ingest_once(conn, str(drop_dir), pending, settle_seconds=3600) == []
+        pending[str(capture)] = (pending[str(capture)][0], 0)  # settled long ago
+        assert len(ingest_once(conn, str(drop_dir), pending, settle_seconds=5)) == 1
+        assert conn.execute("SELECT size FROM images").fetchone() == (len(b"first half second half"),)
+    finally:
+        conn.close()
+
+
+def test_identical_copy_is_skipped(tmp_path):
+    first = tmp_path / "2024.jpg"
+    copy = tmp_path / "2025.jpg"
+    first.write_bytes(b"same scene")
+    copy.write_bytes(b"same scene")
+
+    conn = connect_registry(str(tmp_path / "ingest.db"))
+    try:
+        assert register_image(conn, str(first), "hyderabad", 10, 0) is not None
+        assert register_image(conn, str(copy), "hyderabad", 10, 0) is None
+        assert conn.execute("SELECT COUNT(*) FROM images").fetchone() == (1,)
+        assert comparisons(conn) == []
+    finally:
+        conn.close()
+
+
+def test_epochs_scheduled_against_their_neighbours(tmp_path):
+    conn = connect_registry(str(tmp_path / "ingest.db"))
+
+    def add(location, epoch):
+        (tmp_path / location).mkdir(exist_ok=True)
+        path = tmp_path / location / f"{epoch}.jpg"
+        path.write_bytes(f"{location} {epoch}".encode())
+        return register_image(conn, str(path), location, 1, 0)
+
+    try:
+        add("hyderabad", "2023")
+        add("warangal", "2024")
+        add("hyderabad", "2025")
+        assert comparisons(conn) == [("2023", "2025", "pending")]
+
+        # 2024 arrives late: 2025 is compared against it, not across it
+        add("hyderabad", "2024")
+        assert comparisons(conn) == [("2023", "2024", "pending"), ("2023", "2025", "superseded"),
+                                     ("2024", "2025", "pending")]
+
+        # A comparison that already ran is kept as history
+        conn.execute("UPDATE comparisons SET status = 'done'")
+        add("hyderabad", "2022")
+        assert comparisons(conn) == [("2022", "2023", "pending"), ("2023", "2024", "done"),
+                                     ("2023", "2025", "done"), ("2024", "2025", "done")]
+    finally:
+        conn.close()
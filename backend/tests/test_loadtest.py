@@ -0,0 +1,49 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+HARNESS = os.path.join(REPO_ROOT, "backend", "loadtest", "run.py")
+
+
+def test_load_harness_smoke(tmp_path):
+    pytest.importorskip("flask")
+    pytest.importorskip("flask_cors")
+
+    summary_path = tmp_path / "summary.json"
+    result = subprocess.run(
+        [sys.executable, HARNESS, "--rows", "300", "--clients", "4", "--requests", "7", "--json", str(summary_path)],
+        capture_output=True, text=True, timeout=300,
+    )
+    assert result.returncode == 0, result.stderr
+
+    summary = json.loads(summary_path.read_text())
+    assert len(summary) == 6
+    for route, row in summary.items():
+        assert row["errors"] == 0, route
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+
+
+def test_standin_schema_follows_the_migrations():
+    pytest.importorskip("mysql.connector")
+    sys.path.insert(0, os.path.dirname(HARNESS))
+    import standin_db
+
+    tables = standin_db.mysql_tables()
+    assert "change_event_id" in tables["notifications"]["columns"]
+    assert "region_wkt" in tables["locations"]["columns"]
+    # grant_access_to_user reads permission requests by position
+    assert list(tables["permission_requests"]["columns"])[:3] == ["id", "full_name", "email"]
+    assert list(tables["permission_requests"]["columns"])[6] == "locations"
+
+
+def test_standin_rejects_untranslatable_alter():
+    pytest.importorskip("mysql.connector")
+    sys.path.insert(0, os.path.dirname(HARNESS))
+    import standin_db
+
+    tables = {"t": {"columns": {}, "primary_key": [], "indexes": []}}
+    with pytest.raises(ValueError):
+        standin_db._alter_table(tables, "t", "ALTER TABLE `t` RENAME COLUMN `a` TO `b`")
@@ -0,0 +1,115 @@
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock, ANY
+from backend.app.services import metrics
+from backend.app.services.metrics import (inc_counter, observe, register_gauge, render_metrics, timed_query,
+                                          traced_connection)
+from backend.app.services.job_queues import register_queue_gauges
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.reset_metrics()
+    threshold = metrics.get_slow_query_threshold()
+    yield
+    metrics.reset_metrics()
+    metrics.set_slow_query_threshold(threshold)
+
+
+def test_counter_and_histogram_render():
+    inc_counter("http_requests_total", {"route": "/api/user/notifications", "method": "GET"})
+    inc_counter("http_requests_total", {"route": "/api/user/notifications", "method": "GET"})
+    observe("http_request_duration_seconds", 0.03, {"route": "/api/user/notifications"})
+
+    text = render_metrics()
+    assert "# TYPE http_requests_total counter" in text
+    assert 'http_requests_total{method="GET",route="/api/user/notifications"} 2' in text
+    assert 'http_request_duration_seconds_bucket{route="/api/user/notifications",le="0.025"} 0' in text
+    assert 'http_request_duration_seconds_bucket{route="/api/user/notifications",le="0.05"} 1' in text
+    assert 'http_request_duration_seconds_count{route="/api/user/notifications"} 1' in text
+
+
+def test_register_gauge_reads_callback_at_scrape():
+    depth = [3]
+    register_gauge("job_queue_depth", lambda: depth[0])
+    assert "job_queue_depth 3" in render_metrics()
+    depth[0] = 5
+    assert "job_queue_depth 5" in render_metrics()
+
+
+def test_gauge_callback_can_update_registry():
+    def pool_size():
+        inc_counter("pool_size_reads_total")
+        return 4
+
+    register_gauge("pool_size", pool_size)
+    result = []
+    # Run in a thread so a deadlock fails the test instead of hanging the suite
+    scrape = threading.Thread(target=lambda: result.append(render_metrics()), daemon=True)
+    scrape.start()
+    scrape.join(timeout=5)
+    assert result and "pool_size 4" in result[0]
+    assert "pool_size_reads_total 1" in render_metrics()
+
+
+def test_timed_query_records_calls_and_slow_log(capsys):
+    metrics.set_slow_query_threshold(0)
+
+    @timed_query
+    def fetch_rows():
+        return [1, 2]
+
+    assert fetch_rows() == [1, 2]
+    text = render_metrics()
+    assert 'db_queries_total{function="fetch_rows"} 1' in text
+    assert 'db_query_duration_seconds_count{function="fetch_rows"} 1' in text
+    assert "db_calls_in_flight 0" in text
+    assert "Slow query in fetch_rows" in capsys.readouterr().out
+
+
+def test_slow_query_log_names_the_slowest_statement(capsys):
+    metrics.set_slow_query_threshold(0)
+    connection = MagicMock()
+
+    @timed_query
+    def load_dashboard():
+        cursor = traced_connection(connection).cursor(dictionary=True)
+        cursor.execute("SELECT 1")
+        cursor.execute("""
+            SELECT username, role
+            FROM users WHERE status = %s
+        """, ("pending",))
+        return cursor.fetchall()
+
+    connection.cursor.return_value.execute.side_effect = lambda sql, *args: time.sleep(0.01 if "users" in sql else 0)
+    load_dashboard()
+
+    # The wrapped cursor still sees the original calls
+    connection.cursor.assert_called_once_with(dictionary=True)
+    connection.cursor.return_value.execute.assert_called_with(ANY, ("pending",))
+    out = capsys.readouterr().out
+    assert "Slow query in load_dashboard" in out
+    assert "2 statement(s)" in out and "SELECT username, role FROM users WHERE status = %s" in out
+
+
+def test_queue_gauges_report_depth_by_status(tmp_path):
+    from dl_model.ingest import connect_registry
+
+    registry = str(tmp_path / "ingest.db")
+    conn = connect_registry(registry)
+    try:
+        conn.executemany("INSERT INTO comparisons (old_image_id, new_image_id, status) VALUES (?, ?, ?)",
+                         [(1, 2, "done"), (2, 3, "pending"), (3, 4, "pending")])
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert register_queue_gauges(str(tmp_path / "missing.db"), registry) == ["tile_queue_units",
+                                                                              "comparison_queue_jobs"]
+    text = render_metrics()
+    assert 'comparison_queue_jobs{status="pending"} 2' in text
+    assert 'comparison_queue_jobs{status="done"} 1' in text
+    # A queue nobody has created yet is empty, and is not created by the scrape
+    assert 'tile_queue_units{status="pending"} 0' in text
+    assert not (tmp_path / "missing.db").exists()
@@ -0,0 +1,38 @@
+import re
+from pathlib import Path
+from db.migrate import split_statements, list_migrations
+
+BASELINE_SQL = Path(__file__).resolve().parents[2] / "db" / "change_detection.sql"
+
+
+def test_split_statements_skips_comments():
+    sql = """
+    -- a comment
+    ALTER TABLE users ADD INDEX email (email);
+    ALTER TABLE notifications
+      MODIFY date datetime NOT NULL,
+      ADD INDEX notifications_date (date);
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 2
+    assert statements[0].strip() == "ALTER TABLE users ADD INDEX email (email)"
+    assert "ADD INDEX notifications_date" in statements[1]
+
+
+def test_migrations_are_numbered_in_order():
+    versions = [version for version, _, _ in list_migrations()]
+    assert versions == sorted(versions)
+    assert len(versions) == len(set(versions))
+
+
+def test_migrations_only_touch_existing_tables():
+    # Tables a migration alters, references or triggers on must come from the
+    # baseline dump or an earlier migration, so a database built from the
+    # dump migrates cleanly
+    created = set(re.findall(r"CREATE TABLE `(\w+)`", BASELINE_SQL.read_text()))
+    for version, name, path in list_migrations():
+        sql = path.read_text()
+        used = set(re.findall(r"(?:ALTER TABLE|REFERENCES|ON|UPDATE) `(\w+)`", sql))
+        created.update(re.findall(r"CREATE TABLE (?:IF NOT EXISTS )?`(\w+)`", sql))
+        missing = used - created
+        assert not missing, f"{version}_{name} uses {sorted(missing)} before they exist"
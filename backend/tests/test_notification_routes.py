@@ -0,0 +1,54 @@
+import os
+import sys
+from unittest.mock import patch
+import pytest
+
+pytest.importorskip("flask_cors")
+from flask import Flask
+
+# Blueprints import their services as top-level 'services', as when run from backend/app
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+from api.user_dashboard_routes import user_bp  # noqa: E402
+from services.session import issue_token  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(user_bp, url_prefix="/api/user")
+    return app.test_client()
+
+
+def bearer(username, role, regions):
+    return {"Authorization": f"Bearer {issue_token(username, role, regions)}"}
+
+
+def test_notifications_require_a_session(client):
+    with patch("api.user_dashboard_routes.get_notifications") as get_notifications:
+        assert client.get("/api/user/notifications").status_code == 401
+        assert client.get("/api/user/notifications?username=sammm").status_code == 401
+        get_notifications.assert_not_called()
+
+
+def test_notifications_filtered_by_session_regions(client):
+    with patch("api.user_dashboard_routes.get_notifications", return_value=[]) as get_notifications:
+        # A user cannot read someone else's feed by naming them
+        response = client.get("/api/user/notifications?username=riya", headers=bearer("sammm", "user", ["Warangal"]))
+        assert response.status_code == 200
+        get_notifications.assert_called_once_with(regions=["Warangal"])
+
+        get_notifications.reset_mock()
+        client.get("/api/user/notifications?username=riya", headers=bearer("samm", "admin", []))
+        get_notifications.assert_called_once_with("riya")
+
+
+def test_heatmap_routes_report_failures(client):
+    with patch("api.user_dashboard_routes.get_change_heatmap", side_effect=RuntimeError("db down")):
+        assert client.get("/api/user/change-events/7/heatmap").status_code == 500
+    with patch("api.user_dashboard_routes.get_change_heatmap", return_value=None):
+        assert client.get("/api/user/change-events/7/heatmap").status_code == 404
+    with patch("api.user_dashboard_routes.get_location_summary", side_effect=RuntimeError("db down")):
+        assert client.get("/api/user/change-summary/Hyderabad").status_code == 500
@@ -0,0 +1,78 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dl_model.probability import (PROBABILITY_SCALE, quantize_probability, mask_from_probability, threshold_in_place,
+                                  save_probability_map, load_probability_map, joint_histogram, road_change_stats,
+                                  recompute_road_changes)
+
+
+def test_quantize_round_trip(tmp_path):
+    probability = np.random.default_rng(0).random((64, 48)).astype(np.float32)
+    quantized = quantize_probability(probability)
+    assert quantized.dtype == np.uint8
+    assert np.abs(quantized / PROBABILITY_SCALE - probability).max() <= 0.5 / PROBABILITY_SCALE + 1e-6
+
+    save_probability_map(str(tmp_path / "scene.npz"), quantized)
+    np.testing.assert_array_equal(load_probability_map(str(tmp_path / "scene.npz")), quantized)
+
+
+@pytest.mark.parametrize("threshold", [0.3, 0.5, 0.72])
+def test_rethreshold_matches_the_unquantized_map(threshold):
+    probability = np.random.default_rng(1).random(10000).astype(np.float32)
+    quantized = quantize_probability(probability)
+
+    mask = mask_from_probability(quantized, threshold)
+    np.testing.assert_array_equal(threshold_in_place(quantized.copy(), threshold), mask)
+
+    # Only pixels within half a quantization step of the threshold may differ
+    differs = mask != (probability > threshold)
+    assert (np.abs(probability[differs] - threshold) <= 0.5 / PROBABILITY_SCALE + 1e-6).all()
+
+
+def test_half_probability_counts_as_road():
+    quantized = quantize_probability(np.array([0.498, 0.5, 0.502], dtype=np.float32))
+    assert quantized.tolist() == [127, 128, 128]
+    # Unlike `probability > 0.5` on the float map, p = 0.5 itself is road
+    assert mask_from_probability(quantized).tolist() == [0, 1, 1]
+    assert threshold_in_place(quantized).tolist() == [0, 1, 1]
+
+
+def test_change_stats_from_histogram(tmp_path):
+    rng = np.random.default_rng(2)
+    old = quantize_probability(rng.random((120, 90)))
+    new = quantize_probability(rng.random((120, 90)))
+    save_probability_map(str(tmp_path / "old.npz"), old)
+    save_probability_map(str(tmp_path / "new.npz"), new)
+
+    histogram = joint_histogram(old, new)
+    assert histogram.sum() == old.size
+    for threshold in (0.2, 0.5, 0.9):
+        old_roads = mask_from_probability(old, threshold)
+        new_roads = mask_from_probability(new, threshold)
+        stats = road_change_stats(histogram, threshold)
+        assert stats["old_road_pixels"] == old_roads.sum()
+        assert stats["new_road_pixels"] == (new_roads & ~old_roads.astype(bool)).sum()
+
+    assert recompute_road_changes(str(tmp_path / "old.npz"), str(tmp_path / "new.npz"), (0.2, 0.9)) == \
+        [road_change_stats(histogram, 0.2), road_change_stats(histogram, 0.9)]
+
+    with pytest.raises(ValueError):
+        joint_histogram(old, new[:100])
+
+
+def test_tile_predictor_quantizes_the_same_way():
+    pytest.importorskip("cv2")
+    from dl_model.compare import TilePredictor
+
+    probability = np.random.default_rng(3).random((1, 256, 256, 1)).astype(np.float32)
+    probability[0, 0, :3, 0] = [0.498, 0.5, 0.502]
+
+    class FixedModel:
+        def predict(self, batch, verbose=0):
+            return probability
+
+    tile = np.zeros((256, 256, 3), dtype=np.uint8)
+    quantized = TilePredictor(FixedModel()).predict_probabilities([tile])[0]
+    np.testing.assert_array_equal(quantized, quantize_probability(probability[0, :, :, 0]))
+    assert TilePredictor(FixedModel()).predict_masks([tile])[0][0, :3].tolist() == [0, 1, 1]
@@ -0,0 +1,62 @@
+import time
+import pytest
+from flask import Flask, g, jsonify
+from backend.app.services import session
+from backend.app.services.session import issue_token, verify_token, revoke_token, revoke_user, require_session
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/admin-only")
+    @require_session("admin")
+    def admin_only():
+        return jsonify({"user": g.session["sub"], "regions": g.session["regions"]})
+
+    return app.test_client()
+
+
+def test_token_round_trip_and_tampering():
+    token = issue_token("sammm", "user", ["Hyderabad", "Warangal"])
+    claims = verify_token(token)
+    assert claims["sub"] == "sammm"
+    assert claims["regions"] == ["Hyderabad", "Warangal"]
+
+    assert verify_token(token[:-2] + ("A" if token[-1] != "A" else "B") + token[-1]) is None
+    assert verify_token("not-a-token") is None
+
+
+def test_revocation():
+    first = issue_token("riya", "user", [])
+    second = issue_token("riya", "user", [])
+    revoke_token(verify_token(first))
+    assert verify_token(first) is None
+    assert verify_token(second) is not None
+
+    revoke_user("riya")
+    assert verify_token(second) is None
+    session._revoked_users.clear()
+
+
+def test_login_right_after_revocation():
+    stale = issue_token("bob", "user", [])
+    revoke_user("bob")
+    # Same wall-clock second as the revocation: the new session must still work
+    fresh = issue_token("bob", "user", ["Hyderabad"])
+    assert verify_token(stale) is None
+    assert verify_token(fresh)["regions"] == ["Hyderabad"]
+    session._revoked_users.clear()
+
+
+def test_require_session_decorator(client):
+    assert client.get("/admin-only").status_code == 401
+
+    user_token = issue_token("sammm", "user", ["a"])
+    response = client.get("/admin-only", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 403
+
+    admin_token = issue_token("samm", "admin", ["a", "b"])
+    response = client.get("/admin-only", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert response.get_json() == {"user": "samm", "regions": ["a", "b"]}
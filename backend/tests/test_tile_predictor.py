@@ -0,0 +1,47 @@
+import tracemalloc
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from dl_model.compare import TilePredictor
+
+
+class StaticModel:
+    """Returns a preallocated output, so only the predictor's own arrays are counted."""
+
+    def __init__(self, max_batch, value):
+        self.output = np.full((max_batch, 256, 256, 1), value, dtype=np.float32)
+        self.inputs = []
+
+    def predict(self, batch, verbose=0):
+        self.inputs.append(batch)
+        return self.output[:len(batch)]
+
+
+def test_tile_predictor_reuses_its_buffers():
+    model = StaticModel(4, 0.7)
+    predictor = TilePredictor(model, max_batch=4)
+    rng = np.random.default_rng(0)
+    tiles = [(rng.random((300, 280, 3)) * 255).astype(np.uint8) for _ in range(4)]
+
+    first = predictor.predict_masks(tiles)
+    assert [mask.shape for mask in first] == [(300, 280)] * 4
+    assert all((mask == 1).all() for mask in first)
+    assert model.inputs[0].dtype == np.float32 and model.inputs[0].max() <= 1.0
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(5):
+            masks = predictor.predict_masks(tiles)
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    # Steady state: no array buffer, the smallest being a 256x256 plane
+    assert peak < 256 * 256
+    # Same batch and result buffers every call
+    assert all(batch.base is predictor.batch or batch is predictor.batch for batch in model.inputs)
+    assert all(np.shares_memory(new, old) for new, old in zip(masks, first))
@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from dl_model.tiling import plan_tiles, pad_image, iter_plan_tiles, process_large_image_planned
+
+
+class RedChannelModel:
+    """Predicts road wherever the tile's red channel is set."""
+
+    def predict(self, batch, verbose=0):
+        return batch[..., :1].copy()
+
+
+@pytest.mark.parametrize("edge_context", [False, True])
+@pytest.mark.parametrize("height, width", [(700, 600), (256, 256), (100, 180), (1000, 257)])
+def test_every_output_pixel_comes_from_one_tile(height, width, edge_context):
+    image = np.arange(height * width * 3, dtype=np.uint32).reshape(height, width, 3)
+    plan = plan_tiles(height, width, tile_size=256, margin=16, edge_context=edge_context)
+    padded = pad_image(image.astype(np.float32), plan)
+
+    coverage = np.zeros((height, width), dtype=np.int32)
+    for tile, (_, _, crop_x, crop_y, x0, y0, x1, y1) in iter_plan_tiles(padded, plan):
+        assert tile.shape[:2] == (256, 256)
+        coverage[y0:y1, x0:x1] += 1
+        # The kept crop is the image content of its output span
+        np.testing.assert_array_equal(tile[crop_y:crop_y + y1 - y0, crop_x:crop_x + x1 - x0], image[y0:y1, x0:x1])
+
+        # margin pixels of context, except where the image border is the edge
+        for start, end, crop, length in ((x0, x1, crop_x, width), (y0, y1, crop_y, height)):
+            if start > 0 or edge_context:
+                assert crop >= 16 or length < 256
+            if end < length or edge_context:
+                assert 256 - crop - (end - start) >= 16 or length < 256
+
+    assert (coverage == 1).all()
+    assert plan.redundancy == pytest.approx(len(plan.tiles) * 256 * 256 / (height * width))
+
+
+def test_planned_mask_matches_the_image(tmp_path):
+    rng = np.random.default_rng(0)
+    image = np.zeros((530, 410, 3), dtype=np.uint8)
+    image[..., 0] = np.where(rng.random((530, 410)) < 0.3, 255, 0)
+    path = tmp_path / "scene.png"
+    cv2.imwrite(str(path), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+
+    original, mask, _ = process_large_image_planned(RedChannelModel(), str(path))
+    np.testing.assert_array_equal(original, image)
+    np.testing.assert_array_equal(mask[:, :, 0], (image[..., 0] == 255).astype(np.uint8))
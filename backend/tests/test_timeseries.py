@@ -0,0 +1,88 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from dl_model import timeseries
+from dl_model.timeseries import add_epoch, build_series, load_series, load_epoch_mask, parse_epoch_date
+
+
+class RedChannelModel:
+    """Predicts road wherever the tile's red channel is set."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, batch, verbose=0):
+        self.calls += 1
+        return batch[..., :1].copy()
+
+
+def texture(size, seed=0):
+    noise = np.random.default_rng(seed).random((size, size)).astype(np.float32)
+    smooth = cv2.GaussianBlur(noise, (0, 0), 6)
+    return cv2.normalize(smooth, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+
+def write_epoch(path, background, roads):
+    image = np.stack([np.where(roads, 255, 0).astype(np.uint8), background, background], axis=-1)
+    cv2.imwrite(str(path), cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    return str(path)
+
+
+def test_epochs_are_diffed_against_previous_and_first(tmp_path):
+    background = texture(256)
+    roads = np.zeros((3, 256, 256), dtype=bool)
+    roads[:, 100:110, :] = True      # present from the start
+    roads[1:, :, 50:60] = True       # built before the second epoch
+    roads[2, :, 200:204] = True      # built before the third
+    paths = [write_epoch(tmp_path / f"{i}.png", background, roads[i]) for i in range(3)]
+
+    store = str(tmp_path / "series")
+    model = RedChannelModel()
+    epochs = build_series(store, model, [("2025", paths[2]), ("2023-06", paths[0]), ("2024-01-15", paths[1])])
+    assert [epoch["date"] for epoch in epochs] == ["2023-06", "2024-01-15", "2025"]
+    calls = model.calls
+
+    first, second, third = epochs
+    assert "interval" not in first and first["road_pixels"] == 2560
+    assert second["interval"] == second["cumulative"] == {
+        "old_road_pixels": 2560, "new_road_pixels": 2460, "change_percentage": 2460 / 2560 * 100, "since": "2023-06"}
+    assert third["interval"]["since"] == "2024-01-15" and third["interval"]["new_road_pixels"] == 4 * 246
+    assert third["cumulative"]["since"] == "2023-06" and third["cumulative"]["new_road_pixels"] == 2460 + 4 * 246
+    np.testing.assert_array_equal(load_epoch_mask(store, "2025"), roads[2])
+
+    # Re-running skips known epochs, however their dates are written
+    build_series(store, model, [("2024-01-15", paths[1]), ("2025-01-01", paths[2])])
+    assert model.calls == calls and len(load_series(store)["epochs"]) == 3
+
+
+def test_epochs_are_ordered_by_date_not_by_string(tmp_path):
+    path = write_epoch(tmp_path / "scene.png", texture(256), np.zeros((256, 256), dtype=bool))
+    store = str(tmp_path / "series")
+    model = RedChannelModel()
+
+    add_epoch(store, model, path, "2025-10-01")
+    # '2025-9-15' sorts after '2025-10-01' as a string but is earlier
+    for date in ("2025-9-15", "2025-10-01", "2025-10"):
+        with pytest.raises(ValueError):
+            add_epoch(store, model, path, date)
+    add_epoch(store, model, path, "2025-10-2")
+    assert [epoch["date"] for epoch in load_series(store)["epochs"]] == ["2025-10-01", "2025-10-2"]
+
+    with pytest.raises(ValueError):
+        parse_epoch_date("October 2025")
+
+
+def test_offset_is_rounded_once(tmp_path, monkeypatch):
+    # Thumbnails at a quarter scale: a 6 pixel shift is 1.5 thumbnail pixels
+    monkeypatch.setattr(timeseries, "THUMBNAIL_SIZE", 128)
+    background = texture(600, seed=1)
+    no_roads = np.zeros((512, 512), dtype=bool)
+    old = write_epoch(tmp_path / "old.png", background[:512, :512], no_roads)
+    new = write_epoch(tmp_path / "new.png", background[6:518, 6:518], no_roads)
+
+    store = str(tmp_path / "series")
+    add_epoch(store, RedChannelModel(), old, "2024")
+    dx, dy = add_epoch(store, RedChannelModel(), new, "2025")["offset"]
+    assert abs(dx - 6) <= 1 and abs(dy - 6) <= 1
@@ -1,5 +1,7 @@
 import pytest
+from unittest.mock import patch, MagicMock
 from backend.app.services.user_service import get_accessible_locations, register_request, get_notifications
+from backend.app.services.user_service import invalidate_user_regions
 
 # Optional: Create fixture if you want fresh setup for each test
 @pytest.fixture
@@ -25,3 +27,31 @@ def test_get_accessible_locations():
 def test_get_notifications():
     notifs = get_notifications()
     assert isinstance(notifs, list)
+
+
+def test_region_set_cached_and_notifications_filtered_in_sql():
+    with patch('backend.app.services.user_service.mysql.connector.connect') as mock_connect:
+        mock_connection = MagicMock()
+        mock_cursor = MagicMock()
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connection.is_connected.return_value = True
+        mock_connect.return_value = mock_connection
+        invalidate_user_regions()
+
+        mock_cursor.fetchall.return_value = [("Hyderabad",), ("Warangal",)]
+        assert get_accessible_locations("sammm") == ["Hyderabad", "Warangal"]
+
+        mock_cursor.fetchall.return_value = [{"id": "n1", "location": "Hyderabad", "date": "2025-05-08 15:28:12"}]
+        notifs = get_notifications("sammm")
+
+        # region set came from the cache: one query for regions, one for notifications
+        assert mock_connect.call_count == 2
+        query, params = mock_cursor.execute.call_args[0]
+        assert "WHERE location IN (%s, %s)" in query
+        assert params == ("Hyderabad", "Warangal")
+        assert notifs[0]["id"] == "n1"
+
+        invalidate_user_regions("sammm")
+        mock_cursor.fetchall.return_value = []
+        assert get_notifications("sammm") == []
+        assert mock_connect.call_count == 3
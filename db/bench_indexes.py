@@ -0,0 +1,150 @@
+import time
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from migrate import split_statements, migrate
+
+
+# Loads the baseline schema into a scratch database, seeds large synthetic
+# tables, and times the backend's hot queries before and after migrating.
+#
+#   python db/bench_indexes.py --rows 200000
+
+BASELINE_SQL = Path(__file__).resolve().parent / "change_detection.sql"
+STATUSES = ["approved"] * 60 + ["rejected"] * 39 + ["pending"]
+LOCATIONS = [f"Region {i}" for i in range(20)]
+
+# The SQL the services run, verbatim (auth_service.login_user,
+# admin_service.DASHBOARD_QUERY as run by _load_admin_dashboard and
+# user_service.get_notifications with and without a region list)
+HOT_QUERIES = [
+    ("login_user", "SELECT username, role FROM users WHERE email = %s AND password = %s",
+     lambda rows: (f"user{rows // 2}@example.com", "password")),
+    ("admin_dashboard", "SELECT id, full_name, department, locations, "
+                        "DATE_FORMAT(submitted_at, '%Y-%m-%d %H:%i:%s') AS submitted_at, status "
+                        "FROM permission_requests WHERE status IN ('pending', 'approved')",
+     lambda rows: ()),
+    ("notifications_for_regions", "SELECT * FROM notifications WHERE location IN (%s, %s) ORDER BY date DESC",
+     lambda rows: (LOCATIONS[0], LOCATIONS[1])),
+    ("all_notifications", "SELECT * FROM notifications ORDER BY date DESC",
+     lambda rows: ()),
+]
+
+
+def connect_server():
+    return mysql.connector.connect(host='localhost', user='root', password='root')
+
+
+def load_baseline(conn, database):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}`")
+    cursor.execute(f"USE `{database}`")
+    for statement in split_statements(BASELINE_SQL.read_text()):
+        cursor.execute(statement)
+    conn.commit()
+    cursor.close()
+
+
+def seed(conn, rows, batch_size=5000):
+    """
+    Fill users, permission_requests and notifications with `rows` synthetic
+    rows each. Notifications keep the baseline's string dates.
+    """
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1)
+    cursor = conn.cursor()
+
+    for offset in range(0, rows, batch_size):
+        ids = range(offset, min(rows, offset + batch_size))
+        cursor.executemany(
+            "INSERT INTO users (full_name, email, role, username, password, regions) VALUES (%s, %s, %s, %s, %s, %s)",
+            [(f"User {i}", f"user{i}@example.com", "user", f"user{i}", "password", "a,b,c") for i in ids],
+        )
+        cursor.executemany(
+            "INSERT INTO permission_requests (full_name, email, department, locations, justification, "
+            "submitted_at, status) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(f"User {i}", f"user{i}@example.com", "Engineering", "a,b,c", "Project",
+              start + timedelta(minutes=i), rng.choice(STATUSES)) for i in ids],
+        )
+        cursor.executemany(
+            "INSERT INTO notifications (id, title, message, date, location, latitude, longitude, user_id) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            [(f"bench{i}", "Road Change Alert", "Significant road changes detected.",
+              (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"), rng.choice(LOCATIONS),
+              f"{17 + rng.random():.7f}", f"{78 + rng.random():.7f}", f"user{rng.randrange(1000)}") for i in ids],
+        )
+        conn.commit()
+
+    analyze(conn)
+    cursor.close()
+
+
+def analyze(conn):
+    cursor = conn.cursor()
+    cursor.execute("ANALYZE TABLE users, permission_requests, notifications")
+    cursor.fetchall()
+    cursor.close()
+
+
+def measure(conn, rows, repeat):
+    """
+    Returns:
+        dict: query name -> (access type, key, estimated rows, median ms)
+    """
+    cursor = conn.cursor(dictionary=True)
+    results = {}
+    for name, query, make_params in HOT_QUERIES:
+        # No parameters means no interpolation, so DATE_FORMAT's %s is left alone
+        params = make_params(rows) or None
+        cursor.execute("EXPLAIN " + query, params)
+        plan = cursor.fetchall()[0]
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+
+        results[name] = (plan["type"], plan["key"], plan["rows"], timings[len(timings) // 2])
+    cursor.close()
+    return results
+
+
+def report(before, after):
+    print(f"{'query':<26} {'before':<34} {'after':<34} speedup")
+    for name in before:
+        b_type, b_key, b_rows, b_ms = before[name]
+        a_type, a_key, a_rows, a_ms = after[name]
+        print(f"{name:<26} {f'{b_type}/{b_key} ~{b_rows} rows {b_ms:.2f}ms':<34} "
+              f"{f'{a_type}/{a_key} ~{a_rows} rows {a_ms:.2f}ms':<34} {b_ms / max(a_ms, 1e-6):.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed synthetic data and compare hot-query plans before and after migrations")
+    parser.add_argument("--rows", type=int, default=200000, help="Rows per seeded table")
+    parser.add_argument("--database", default="change_detection_bench", help="Scratch database (dropped and recreated)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = connect_server()
+    try:
+        print(f"[+] Loading baseline schema into {args.database}")
+        load_baseline(conn, args.database)
+        print(f"[+] Seeding {args.rows} rows per table")
+        seed(conn, args.rows)
+
+        before = measure(conn, args.rows, args.repeat)
+        migrate(conn)
+        analyze(conn)
+        after = measure(conn, args.rows, args.repeat)
+
+        report(before, after)
+    finally:
+        conn.close()
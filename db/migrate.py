@@ -0,0 +1,130 @@
+import re
+import argparse
+from pathlib import Path
+
+import mysql.connector
+
+
+# db/change_detection.sql is the baseline schema. Changes on top of it are
+# numbered files in db/migrations (NNNN_description.sql), applied in order and
+# recorded in schema_migrations so each runs once per database.
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+MIGRATION_NAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version varchar(4) NOT NULL,
+    name varchar(255) NOT NULL,
+    applied_at datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (version)
+)
+"""
+
+
+def connect_db(database="change_detection"):
+    return mysql.connector.connect(
+        host='localhost',
+        database=database,
+        user='root',
+        password='root'
+    )
+
+
+def split_statements(sql):
+    """
+    Split a SQL script (a migration or a mysqldump file) into statements.
+    Comment lines are dropped; statements end with ';' at the end of a line.
+    """
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("--"):
+            continue
+        current.append(line)
+        if stripped.endswith(";"):
+            statements.append("\n".join(current).rstrip().rstrip(";"))
+            current = []
+    if current:
+        statements.append("\n".join(current))
+    return statements
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Returns:
+        list: (version, name, path) for every migration file, in version order
+    """
+    migrations = []
+    for path in sorted(Path(migrations_dir).glob("*.sql")):
+        match = MIGRATION_NAME.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file {path.name} does not match NNNN_description.sql")
+        migrations.append((match.group(1), match.group(2), path))
+    return migrations
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    versions = {row[0] for row in cursor.fetchall()}
+    cursor.close()
+    return versions
+
+
+def migrate(conn, target=None, migrations_dir=MIGRATIONS_DIR):
+    """
+    Apply every pending migration up to and including `target` (default: all).
+
+    MySQL commits DDL implicitly, so a failing migration is not rolled back;
+    it is left unrecorded and the run stops so it can be fixed and re-run.
+
+    Returns:
+        list: versions applied by this call
+    """
+    done = applied_versions(conn)
+    applied = []
+    cursor = conn.cursor()
+
+    for version, name, path in list_migrations(migrations_dir):
+        if target is not None and version > target:
+            break
+        if version in done:
+            continue
+
+        print(f"[+] Applying migration {version}_{name}")
+        for statement in split_statements(path.read_text()):
+            cursor.execute(statement)
+        cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+        applied.append(version)
+
+    cursor.close()
+    if not applied:
+        print("[+] Schema is up to date")
+    return applied
+
+
+def print_status(conn, migrations_dir=MIGRATIONS_DIR):
+    done = applied_versions(conn)
+    for version, name, _ in list_migrations(migrations_dir):
+        print(f"{version}_{name}: {'applied' if version in done else 'pending'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations on top of db/change_detection.sql")
+    parser.add_argument("--database", default="change_detection")
+    parser.add_argument("--target", help="Last migration version to apply, e.g. 0001")
+    parser.add_argument("--status", action="store_true", help="List migrations and whether they are applied")
+    args = parser.parse_args()
+
+    conn = connect_db(args.database)
+    try:
+        if args.status:
+            print_status(conn)
+        else:
+            migrate(conn, args.target)
+    finally:
+        conn.close()
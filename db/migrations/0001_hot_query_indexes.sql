@@ -0,0 +1,16 @@
+-- Secondary indexes for the backend's hot queries, and typed notification columns.
+
+-- login_user: SELECT * FROM users WHERE email = %s AND password = %s
+ALTER TABLE `users` ADD INDEX `email` (`email`);
+
+-- get_access_requests / get_user_access_data filter on status
+ALTER TABLE `permission_requests` ADD INDEX `status_submitted_at` (`status`, `submitted_at`);
+
+-- notifications were stored as strings; existing values are already
+-- 'YYYY-MM-DD HH:MM:SS' and decimal text, so MODIFY converts them in place
+ALTER TABLE `notifications`
+  MODIFY `date` datetime NOT NULL,
+  MODIFY `latitude` decimal(10,7) DEFAULT NULL,
+  MODIFY `longitude` decimal(10,7) DEFAULT NULL,
+  ADD INDEX `notifications_date` (`date`),
+  ADD INDEX `user_id_date` (`user_id`, `date`);
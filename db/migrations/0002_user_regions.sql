@@ -0,0 +1,20 @@
+-- Region access as one row per (user, location) instead of the users.regions CSV.
+-- users.regions is still written for older readers.
+
+CREATE TABLE `user_regions` (
+  `username` varchar(50) NOT NULL,
+  `location` varchar(100) NOT NULL,
+  PRIMARY KEY (`username`, `location`),
+  KEY `location` (`location`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Backfill by expanding each CSV into a JSON array
+INSERT IGNORE INTO `user_regions` (`username`, `location`)
+SELECT u.`username`, TRIM(j.`location`)
+FROM `users` u,
+     JSON_TABLE(CONCAT('["', REPLACE(REPLACE(u.`regions`, '"', ''), ',', '","'), '"]'),
+                '$[*]' COLUMNS (`location` varchar(100) PATH '$')) j
+WHERE u.`regions` IS NOT NULL AND TRIM(j.`location`) <> '';
+
+-- get_notifications filters by the user's locations
+ALTER TABLE `notifications` ADD INDEX `location_date` (`location`, `date`);
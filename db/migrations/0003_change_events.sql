@@ -0,0 +1,36 @@
+-- Typed change events with an incrementally maintained per-location summary
+-- (dl_model.events.record_change_event), and a region of interest per location.
+
+CREATE TABLE `change_events` (
+  `id` bigint NOT NULL AUTO_INCREMENT,
+  `location` varchar(100) NOT NULL,
+  `image1_path` varchar(512) NOT NULL,
+  `image2_path` varchar(512) NOT NULL,
+  `detected_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `old_road_pixels` bigint NOT NULL,
+  `new_road_pixels` bigint NOT NULL,
+  `change_percentage` double NOT NULL,
+  `is_significant` tinyint(1) NOT NULL DEFAULT '0',
+  `old_road_components` int NOT NULL,
+  `new_road_components` int NOT NULL,
+  `result_path` varchar(512) DEFAULT NULL,
+  `probability_dir` varchar(512) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `location_detected_at` (`location`,`detected_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `location_change_summary` (
+  `location` varchar(100) NOT NULL,
+  `event_count` int NOT NULL DEFAULT '0',
+  `significant_count` int NOT NULL DEFAULT '0',
+  `new_road_pixels_total` bigint NOT NULL DEFAULT '0',
+  `max_change_percentage` double NOT NULL DEFAULT '0',
+  `last_change_percentage` double DEFAULT NULL,
+  `last_event_id` bigint DEFAULT NULL,
+  `last_detected_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`location`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='Maintained incrementally by dl_model.events.record_change_event';
+
+-- Region of interest as WKT (polygon or box) in scene pixel or map coordinates
+ALTER TABLE `locations`
+  ADD COLUMN `region_wkt` text COMMENT 'Region of interest as WKT (polygon or box) in scene pixel or map coordinates' AFTER `description`;
@@ -0,0 +1,25 @@
+-- Numeric coordinates and a geohash spatial key for map queries.
+-- geohash is ST_GeoHash(longitude, latitude, 12), kept current by triggers,
+-- so a bounding box becomes a few prefix range scans on its index.
+
+ALTER TABLE `locations`
+  ADD COLUMN `latitude` decimal(10,7) DEFAULT NULL,
+  ADD COLUMN `longitude` decimal(10,7) DEFAULT NULL;
+
+ALTER TABLE `change_events`
+  ADD COLUMN `latitude` decimal(10,7) DEFAULT NULL,
+  ADD COLUMN `longitude` decimal(10,7) DEFAULT NULL,
+  ADD COLUMN `geohash` varchar(12) DEFAULT NULL,
+  ADD INDEX `geohash` (`geohash`);
+
+ALTER TABLE `notifications`
+  ADD COLUMN `geohash` varchar(12) DEFAULT NULL,
+  ADD INDEX `geohash` (`geohash`);
+
+UPDATE `notifications` SET `geohash` = ST_GeoHash(`longitude`, `latitude`, 12)
+WHERE `latitude` IS NOT NULL AND `longitude` IS NOT NULL;
+
+CREATE TRIGGER `change_events_geohash_insert` BEFORE INSERT ON `change_events` FOR EACH ROW SET NEW.`geohash` = IF(NEW.`latitude` IS NULL OR NEW.`longitude` IS NULL, NULL, ST_GeoHash(NEW.`longitude`, NEW.`latitude`, 12));
+CREATE TRIGGER `change_events_geohash_update` BEFORE UPDATE ON `change_events` FOR EACH ROW SET NEW.`geohash` = IF(NEW.`latitude` IS NULL OR NEW.`longitude` IS NULL, NULL, ST_GeoHash(NEW.`longitude`, NEW.`latitude`, 12));
+CREATE TRIGGER `notifications_geohash_insert` BEFORE INSERT ON `notifications` FOR EACH ROW SET NEW.`geohash` = IF(NEW.`latitude` IS NULL OR NEW.`longitude` IS NULL, NULL, ST_GeoHash(NEW.`longitude`, NEW.`latitude`, 12));
+CREATE TRIGGER `notifications_geohash_update` BEFORE UPDATE ON `notifications` FOR EACH ROW SET NEW.`geohash` = IF(NEW.`latitude` IS NULL OR NEW.`longitude` IS NULL, NULL, ST_GeoHash(NEW.`longitude`, NEW.`latitude`, 12));
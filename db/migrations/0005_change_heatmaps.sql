@@ -0,0 +1,16 @@
+-- Block-aggregated change heatmap per change event (dl_model.compare.change_heatmap).
+-- counts holds the old-road then new-road pixel counts of the grid_rows x grid_cols
+-- grid, row-major, little-endian uint16 (uint32 when cell_size > 255),
+-- zlib-compressed; see dl_model.events.encode_heatmap.
+
+CREATE TABLE `change_heatmaps` (
+  `event_id` bigint NOT NULL,
+  `cell_size` smallint unsigned NOT NULL,
+  `height` int NOT NULL,
+  `width` int NOT NULL,
+  `grid_rows` smallint unsigned NOT NULL,
+  `grid_cols` smallint unsigned NOT NULL,
+  `counts` mediumblob NOT NULL,
+  PRIMARY KEY (`event_id`),
+  CONSTRAINT `change_heatmaps_event` FOREIGN KEY (`event_id`) REFERENCES `change_events` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,6 @@
+-- Link a notification to the change event that raised it, so the inbox can show
+-- that comparison's heatmap (dl_model.events.record_change_event fills it in).
+
+ALTER TABLE `notifications`
+  ADD COLUMN `change_event_id` bigint DEFAULT NULL,
+  ADD CONSTRAINT `notifications_change_event` FOREIGN KEY (`change_event_id`) REFERENCES `change_events` (`id`) ON DELETE SET NULL;
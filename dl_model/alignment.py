@@ -0,0 +1,102 @@
+import numpy as np
+import cv2
+
+
+def _to_gray(image, scale):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY) if len(image.shape) == 3 else image
+    if scale != 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray.astype(np.float32)
+
+
+def estimate_shift(image1, image2, max_size=1024, min_response=0.05):
+    """
+    estimate_offset without rounding, for callers that rescale the result.
+
+    Returns:
+        tuple: (dx, dy) as floats in image1's pixel grid, or (0.0, 0.0)
+    """
+    scale = min(1.0, max_size / float(max(image1.shape[:2] + image2.shape[:2])))
+    gray1 = _to_gray(image1, scale)
+    gray2 = _to_gray(image2, scale)
+
+    height = max(gray1.shape[0], gray2.shape[0])
+    width = max(gray1.shape[1], gray2.shape[1])
+    padded1 = np.zeros((height, width), dtype=np.float32)
+    padded2 = np.zeros((height, width), dtype=np.float32)
+    padded1[:gray1.shape[0], :gray1.shape[1]] = gray1
+    padded2[:gray2.shape[0], :gray2.shape[1]] = gray2
+
+    window = cv2.createHanningWindow((width, height), cv2.CV_32F)
+    (shift_x, shift_y), response = cv2.phaseCorrelate(padded2, padded1, window)
+
+    if response < min_response:
+        print(f"Phase correlation too weak ({response:.3f}), assuming images share an origin")
+        return 0.0, 0.0
+
+    return shift_x / scale, shift_y / scale
+
+
+def estimate_offset(image1, image2, max_size=1024, min_response=0.05):
+    """
+    Estimate the translation between two epochs by phase correlation on
+    downsampled grayscale copies.
+
+    Args:
+        image1: Earlier image (RGB)
+        image2: Later image (RGB)
+        max_size: Longest side of the downsampled images
+        min_response: Minimum phase-correlation peak to trust the estimate
+
+    Returns:
+        tuple: (dx, dy), the position of image2's top-left corner in image1's
+        pixel grid, or (0, 0) if no reliable peak was found
+    """
+    shift_x, shift_y = estimate_shift(image1, image2, max_size, min_response)
+    return int(round(shift_x)), int(round(shift_y))
+
+
+def offset_from_geotransforms(geotransform1, geotransform2):
+    """
+    Pixel offset of image2 in image1's grid from GDAL-style geotransforms
+    (origin_x, pixel_width, 0, origin_y, 0, pixel_height). Both epochs must
+    share a pixel size and be north-up.
+    """
+    origin_x1, pixel_w1, rot_x1, origin_y1, rot_y1, pixel_h1 = geotransform1
+    origin_x2, pixel_w2, rot_x2, origin_y2, rot_y2, pixel_h2 = geotransform2
+
+    if rot_x1 or rot_y1 or rot_x2 or rot_y2:
+        raise ValueError("Rotated geotransforms are not supported")
+    if not np.isclose(pixel_w1, pixel_w2) or not np.isclose(pixel_h1, pixel_h2):
+        raise ValueError("Epochs have different pixel sizes; resample one of them first")
+
+    dx = (origin_x2 - origin_x1) / pixel_w1
+    dy = (origin_y2 - origin_y1) / pixel_h1
+    return int(round(dx)), int(round(dy))
+
+
+def overlap_windows(shape1, shape2, offset):
+    """
+    Common extent of two images given image2's offset in image1's grid.
+
+    Returns:
+        tuple: ((x0, y0, x1, y1) in image1, (x0, y0, x1, y1) in image2)
+
+    Raises:
+        ValueError: if the images do not overlap
+    """
+    dx, dy = offset
+    x0 = max(0, dx)
+    y0 = max(0, dy)
+    x1 = min(shape1[1], dx + shape2[1])
+    y1 = min(shape1[0], dy + shape2[0])
+
+    if x1 <= x0 or y1 <= y0:
+        raise ValueError(f"Images do not overlap at offset {offset}")
+
+    return (x0, y0, x1, y1), (x0 - dx, y0 - dy, x1 - dx, y1 - dy)
+
+
+def crop(image, window):
+    x0, y0, x1, y1 = window
+    return image[y0:y1, x0:x1]
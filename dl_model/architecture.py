@@ -1,80 +1,94 @@
-import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import Model
-from tensorflow.keras.layers import Input, Conv2D, MaxPooling2D, Dropout, Concatenate, Conv2DTranspose, BatchNormalization
-import cv2
-import matplotlib.pyplot as plt
+# TensorFlow is imported inside the functions below, so that importing this
+# module (and everything that imports it) does not pay TensorFlow's startup cost
 
 
-def unet(input_shape, output_layer):
+def unet(input_shape, output_layer, width=1.0, separable=False):
+    """
+    U-Net with 16..256 filters per level, scaled by `width` (e.g. 0.5 for
+    8..128). With separable=True every 3x3 convolution after the first is
+    depthwise-separable. The defaults build the model save_best.h5 was
+    trained with.
+    """
+    from tensorflow.keras.models import Model
+    from tensorflow.keras.layers import Input, Conv2D, SeparableConv2D, MaxPooling2D, Dropout, Concatenate, Conv2DTranspose, BatchNormalization
+
+    def filters(n):
+        return max(1, int(round(n * width)))
+
+    def conv(n):
+        if separable:
+            return SeparableConv2D(filters(n), (3, 3), activation='relu', depthwise_initializer='he_normal',
+                                   pointwise_initializer='he_normal', padding='same')
+        return Conv2D(filters(n), (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')
+
     inputs = Input(input_shape)
 
-    conv1 = Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(inputs)
+    conv1 = Conv2D(filters(16), (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(inputs)
     conv1 = BatchNormalization()(conv1)
-    conv1 = Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv1)
+    conv1 = conv(16)(conv1)
     conv1 = BatchNormalization()(conv1)
     conv1 = Dropout(0.1)(conv1)
     pool1 = MaxPooling2D(pool_size=(2, 2))(conv1)
 
-    conv2 = Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(pool1)
+    conv2 = conv(32)(pool1)
     conv2 = BatchNormalization()(conv2)
-    conv2 = Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv2)
+    conv2 = conv(32)(conv2)
     conv2 = BatchNormalization()(conv2)
     pool2 = MaxPooling2D(pool_size=(2, 2))(conv2)
     conv2 = Dropout(0.1)(conv2)
 
-    conv3 = Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(pool2)
+    conv3 = conv(64)(pool2)
     conv3 = BatchNormalization()(conv3)
-    conv3 = Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv3)
+    conv3 = conv(64)(conv3)
     conv3 = BatchNormalization()(conv3)
     pool3 = MaxPooling2D(pool_size=(2, 2))(conv3)
     conv3 = Dropout(0.2)(conv3)
 
-    conv4 = Conv2D(128, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(pool3)
+    conv4 = conv(128)(pool3)
     conv4 = BatchNormalization()(conv4)
-    conv4 = Conv2D(128, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv4)
+    conv4 = conv(128)(conv4)
     conv4 = BatchNormalization()(conv4)
     pool4 = MaxPooling2D(pool_size=(2, 2))(conv4)
     conv4 = Dropout(0.2)(conv4)
 
     # Bottom
-    conv5 = Conv2D(256, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(pool4)
+    conv5 = conv(256)(pool4)
     conv5 = BatchNormalization()(conv5)
-    conv5 = Conv2D(256, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv5)
+    conv5 = conv(256)(conv5)
     conv5 = BatchNormalization()(conv5)
     conv5 = Dropout(0.3)(conv5)
 
     # Decoder
-    up6 = Conv2DTranspose(128, (2, 2), strides=(2, 2), padding='same')(conv5)
+    up6 = Conv2DTranspose(filters(128), (2, 2), strides=(2, 2), padding='same')(conv5)
     merge6 = Concatenate()([conv4, up6])
     conv6 = Dropout(0.2)(merge6)
-    conv6 = Conv2D(128, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv6)
+    conv6 = conv(128)(conv6)
     conv6 = BatchNormalization()(conv6)
-    conv6 = Conv2D(128, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv6)
+    conv6 = conv(128)(conv6)
     conv6 = BatchNormalization()(conv6)
 
-    up7 = Conv2DTranspose(64, (2, 2), strides=(2, 2), padding='same')(conv6)
+    up7 = Conv2DTranspose(filters(64), (2, 2), strides=(2, 2), padding='same')(conv6)
     merge7 = Concatenate()([conv3, up7])
     conv7 = Dropout(0.2)(merge7)
-    conv7 = Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv7)
+    conv7 = conv(64)(conv7)
     conv7 = BatchNormalization()(conv7)
-    conv7 = Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv7)
+    conv7 = conv(64)(conv7)
     conv7 = BatchNormalization()(conv7)
 
-    up8 = Conv2DTranspose(32, (2, 2), strides=(2, 2), padding='same')(conv7)
+    up8 = Conv2DTranspose(filters(32), (2, 2), strides=(2, 2), padding='same')(conv7)
     merge8 = Concatenate()([conv2, up8])
     conv8 = Dropout(0.1)(merge8)
-    conv8 = Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv8)
+    conv8 = conv(32)(conv8)
     conv8 = BatchNormalization()(conv8)
-    conv8 = Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv8)
+    conv8 = conv(32)(conv8)
     conv8 = BatchNormalization()(conv8)
 
-    up9 = Conv2DTranspose(16, (2, 2), strides=(2, 2), padding='same')(conv8)
+    up9 = Conv2DTranspose(filters(16), (2, 2), strides=(2, 2), padding='same')(conv8)
     merge9 = Concatenate()([conv1, up9])
     conv9 = Dropout(0.1)(merge9)
-    conv9 = Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv9)
+    conv9 = conv(16)(conv9)
     conv9 = BatchNormalization()(conv9)
-    conv9 = Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same')(conv9)
+    conv9 = conv(16)(conv9)
     conv9 = BatchNormalization()(conv9)
 
     output = Conv2D(output_layer, (1, 1), activation='sigmoid')(conv9)
@@ -82,9 +96,10 @@ def unet(input_shape, output_layer):
     model = Model(inputs=inputs, outputs=output)
     return model
 
-def load_model_weights(model_path):
+def load_model_weights(model_path, width=1.0, separable=False):
+    import tensorflow as tf
 
-    model = unet(input_shape=(256, 256, 3), output_layer=1)
+    model = unet(input_shape=(256, 256, 3), output_layer=1, width=width, separable=separable)
     
     try:
         model.load_weights(model_path)
@@ -0,0 +1,213 @@
+import os
+import time
+import atexit
+import threading
+from collections import namedtuple, deque
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import numpy as np
+import cv2
+
+
+# Encoding full-size results is slow enough to stall the next scene's
+# inference, so artifacts are handed to a small thread pool (OpenCV releases
+# the GIL while encoding) and written in the background. Road masks are
+# lossless: 1-bit PNG, or np.packbits in an .npz. Overlay format and quality
+# default to ROAD_OVERLAY_FORMAT / ROAD_OVERLAY_QUALITY.
+
+OVERLAY_FORMAT = os.environ.get("ROAD_OVERLAY_FORMAT", "jpg")
+OVERLAY_QUALITY = int(os.environ.get("ROAD_OVERLAY_QUALITY", 90))
+WRITER_THREADS = int(os.environ.get("ROAD_WRITER_THREADS", 2))
+# ArtifactStats kept between flushes, so a long-running writer stays bounded
+STATS_KEPT = 1000
+
+MASK_FORMATS = ("png", "npz")
+
+ArtifactStats = namedtuple("ArtifactStats", ["path", "kind", "seconds", "bytes"])
+
+
+def encode_params(fmt, quality=OVERLAY_QUALITY):
+    """
+    cv2.imwrite parameters for an RGB image format; quality is 0-100 (for PNG
+    it maps to the compression level, higher meaning smaller and slower).
+    """
+    fmt = fmt.lower()
+    if fmt in ("jpg", "jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if fmt == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, max(1, quality)]
+    if fmt == "png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, min(9, quality // 10)]
+    raise ValueError(f"Unsupported image format: {fmt}")
+
+
+def _write_image(path, image, fmt, quality):
+    if not cv2.imwrite(path, cv2.cvtColor(image, cv2.COLOR_RGB2BGR), encode_params(fmt, quality)):
+        raise IOError(f"Could not write {path}")
+
+
+def _write_mask(path, mask):
+    mask = np.asarray(mask)
+    if mask.ndim == 3:
+        mask = mask[:, :, 0]
+    if path.endswith(".npz"):
+        np.savez(path, bits=np.packbits(mask.astype(np.bool_)), shape=mask.shape)
+    elif not cv2.imwrite(path, mask.astype(np.uint8), [cv2.IMWRITE_PNG_BILEVEL, 1]):
+        raise IOError(f"Could not write {path}")
+
+
+def load_mask(path):
+    """
+    Read a mask written by ArtifactWriter.write_mask as a boolean array.
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            shape = tuple(data["shape"])
+            return np.unpackbits(data["bits"], count=shape[0] * shape[1]).reshape(shape).astype(np.bool_)
+    mask = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if mask is None:
+        raise ValueError(f"Could not read mask: {path}")
+    return mask > 0
+
+
+class _Write(Future):
+    # A write's future that knows whether its caller has looked at the outcome
+    observed = False
+
+    def result(self, timeout=None):
+        self.observed = True
+        return super().result(timeout)
+
+    def exception(self, timeout=None):
+        self.observed = True
+        return super().exception(timeout)
+
+
+def _unobserved_error(future):
+    if not future.done() or future.observed:
+        return None
+    return Future.exception(future)
+
+
+class ArtifactWriter:
+    """
+    Background pool that encodes and writes result artifacts, logging encode
+    time and size of each. Arrays handed to it must not be modified until
+    their write completes.
+    """
+
+    def __init__(self, threads=WRITER_THREADS):
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="artifact-writer")
+        self._lock = threading.Lock()
+        self._futures = []
+        self.stats = deque(maxlen=STATS_KEPT)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _submit(self, kind, path, write, *args):
+        def job():
+            started = time.perf_counter()
+            try:
+                write(path, *args)
+            except Exception as e:
+                print(f"[!] Writing {path} failed: {e}")
+                raise
+            stats = ArtifactStats(path, kind, time.perf_counter() - started, os.path.getsize(path))
+            print(f"[+] Wrote {kind} {path}: {stats.bytes / 1024:.0f} KB in {stats.seconds * 1000:.0f} ms")
+            with self._lock:
+                self.stats.append(stats)
+            return stats
+
+        future = _Write()
+        future.set_running_or_notify_cancel()
+
+        def resolve(inner):
+            error = inner.exception()
+            if error is None:
+                future.set_result(inner.result())
+            else:
+                future.set_exception(error)
+
+        self._pool.submit(job).add_done_callback(resolve)
+        with self._lock:
+            # Failed writes nobody has waited on are kept so flush() can raise them
+            self._futures = [f for f in self._futures
+                             if not f.done() or _unobserved_error(f) is not None] + [future]
+        return future
+
+    def write_image(self, path, image, fmt=None, quality=OVERLAY_QUALITY):
+        """
+        Queue an RGB image; fmt defaults to the path's extension.
+
+        Returns:
+            concurrent.futures.Future: resolves to the ArtifactStats
+        """
+        fmt = fmt or os.path.splitext(path)[1].lstrip(".")
+        encode_params(fmt, quality)  # fail now on unsupported formats, not in the pool
+        return self._submit("image", path, _write_image, image, fmt, quality)
+
+    def write_mask(self, path, mask):
+        """
+        Queue a 0/1 or boolean mask: 1-bit PNG for .png paths, packed bits for .npz.
+
+        Returns:
+            concurrent.futures.Future: resolves to the ArtifactStats
+        """
+        if os.path.splitext(path)[1].lstrip(".") not in MASK_FORMATS:
+            raise ValueError(f"Masks are written as {' or '.join(MASK_FORMATS)}: {path}")
+        return self._submit("mask", path, _write_mask, mask)
+
+    def flush(self):
+        """
+        Wait for every queued artifact, then raise the first error of a
+        failed write whose future nobody waited on, if any.
+
+        Returns:
+            list: ArtifactStats of the artifacts written since the last flush
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+        for future in futures:
+            Future.exception(future)  # waits without marking it observed
+        errors = [error for error in map(_unobserved_error, futures) if error is not None]
+        with self._lock:
+            stats = list(self.stats)
+            self.stats.clear()
+        if errors:
+            raise errors[0]
+        return stats
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_writer():
+    """
+    Process-wide writer for pipelines that keep going while artifacts are
+    written; it is flushed when the process exits.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ArtifactWriter()
+            atexit.register(_shared.close)
+        return _shared
+
+
+def print_report(stats):
+    print(f"{'artifact':<48} {'kind':<6} {'KB':>9} {'ms':>8}")
+    for row in stats:
+        print(f"{os.path.basename(row.path):<48} {row.kind:<6} {row.bytes / 1024:>9.0f} {row.seconds * 1000:>8.0f}")
+    print(f"Total: {sum(row.bytes for row in stats) / 1024:.0f} KB, "
+          f"{sum(row.seconds for row in stats) * 1000:.0f} ms of encoding")
@@ -0,0 +1,106 @@
+import time
+import tracemalloc
+
+import numpy as np
+import cv2
+
+from dl_model.compare import TilePredictor
+from dl_model.probability import quantize_probability
+
+
+# Measures what the per-tile pre/post-processing around the model allocates,
+# the per-call chain (copy, resize, float64 normalize, expand_dims, threshold,
+# resize back) against TilePredictor's reused buffers:
+#
+#   python -m dl_model.bench_preprocess --tiles 200 --tile-size 512 --batch 8
+#
+# The model is a stand-in that returns a preallocated output, so only our
+# own arrays are counted. NumPy and OpenCV report their buffers to
+# tracemalloc; the transient peak during the loop bounds what it allocated.
+
+
+class _StaticModel:
+    def __init__(self, max_batch):
+        rng = np.random.default_rng(0)
+        self.output = rng.random((max_batch, 256, 256, 1), dtype=np.float32)
+
+    def predict(self, batch, verbose=0):
+        return self.output[:len(batch)]
+
+
+def _per_call_mask(model, tile, threshold=0.5):
+    # The preprocessing chain TilePredictor replaces
+    tile_rgb = tile.copy()
+    resized_tile = cv2.resize(tile_rgb, (256, 256))
+    normalized_tile = resized_tile / 255.0
+    input_tile = np.expand_dims(normalized_tile, axis=0)
+    probability = model.predict(input_tile)[0].astype(np.float32)
+    if resized_tile.shape[:2] != tile.shape[:2]:
+        probability = cv2.resize(probability, (tile.shape[1], tile.shape[0]))
+    return (quantize_probability(probability) > threshold * 255).astype(np.uint8)
+
+
+def _measure(loop):
+    loop()  # warm-up: first-call buffers are not steady state
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        loop()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return peak, seconds
+
+
+def bench(tiles=200, tile_size=512, batch=8):
+    """
+    Returns:
+        dict: path name -> transient peak bytes during the loop and tiles/s
+    """
+    image = (np.random.default_rng(1).random((tile_size * 2, tile_size * 2, 3)) * 255).astype(np.uint8)
+    stitched = np.zeros((tile_size, tile_size), dtype=np.uint8)
+    model = _StaticModel(batch)
+    predictor = TilePredictor(model, batch)
+    tile_list = [image[(i % 2) * tile_size // 2:(i % 2) * tile_size // 2 + tile_size, :tile_size]
+                 for i in range(batch)]
+
+    def per_call():
+        for _ in range(tiles):
+            mask = _per_call_mask(model, tile_list[0])
+            stitched[:] = np.maximum(stitched, mask.reshape(stitched.shape))
+
+    def reused():
+        for _ in range(tiles // batch):
+            for mask in predictor.predict_masks(tile_list):
+                np.maximum(stitched, mask, out=stitched)
+
+    results = {}
+    for name, loop, count in (("per-call", per_call, tiles), ("TilePredictor", reused, tiles // batch * batch)):
+        peak, seconds = _measure(loop)
+        results[name] = {"peak_bytes": peak, "tiles_per_second": count / seconds}
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare tile preprocessing allocations with and without reused buffers")
+    parser.add_argument("--tiles", type=int, default=200)
+    parser.add_argument("--tile-size", type=int, default=512)
+    parser.add_argument("--batch", type=int, default=8)
+    args = parser.parse_args()
+
+    results = bench(args.tiles, args.tile_size, args.batch)
+    print(f"{'path':<16} {'peak transient bytes':>22} {'tiles/s':>10}")
+    for name, row in results.items():
+        print(f"{name:<16} {row['peak_bytes']:>22,} {row['tiles_per_second']:>10.1f}")
+
+    # Any array buffer would be at least a 256x256 plane
+    if results["TilePredictor"]["peak_bytes"] >= 256 * 256:
+        print("[!] TilePredictor allocated array buffers in its steady state")
+        sys.exit(1)
+    print("[+] TilePredictor's steady state allocates no array buffers")
@@ -0,0 +1,192 @@
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+import cv2
+
+
+# The model always sees 256x256 inputs (tiles are resized to it), so its
+# activations depend on the batch size only; tile size drives the host-side
+# buffers around each prediction, and the scene size the full-image arrays.
+
+MODEL_INPUT = 256
+
+# Live float32 activations of one U-Net sample at the top decoder level
+# (skip connections + upsampled, merged and convolved maps, ~110 channels at
+# full resolution), doubled for framework scratch space
+ACTIVATION_BYTES_PER_SAMPLE = 2 * 4 * 110 * MODEL_INPUT * MODEL_INPUT
+
+# Host buffers per tile: float32 upsampled probability and its uint8
+# quantization at tile size; resized uint8, the float32 batch slot and the
+# float32 output at model size
+TILE_BYTES_PER_PIXEL = 4 + 1
+MODEL_BYTES_PER_PIXEL = 3 + 4 * 3 + 4
+
+# Full-image bytes per pixel of a two-epoch comparison. In memory: both RGB
+# epochs (6), their uint8 probability maps (2) and masks (2), the boolean
+# old/new road arrays and temporaries (4) and the composite, colour mask
+# and overlay (9). Memory-mapped, epochs and probability maps live in files.
+SCENE_BYTES_PER_PIXEL = {"memory": 23, "memmap": 15}
+# Decoding one epoch holds the BGR and RGB copies at once
+DECODE_BYTES_PER_PIXEL = 6
+
+BATCH_SIZES = (16, 8, 4, 2, 1)
+
+MemoryPlan = namedtuple("MemoryPlan", ["tile_size", "batch_size", "mode", "estimated_peak", "budget", "baseline"])
+
+
+class MemoryBudgetError(MemoryError):
+    pass
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss is the peak (in KiB on Linux), an upper bound of the current RSS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def image_dimensions(image_path):
+    """
+    (height, width) of an image without decoding it at full size: OpenCV's
+    1/8 reduced decode, scaled back up and rounded so it is never under the
+    true size (over by at most 15 pixels).
+    """
+    reduced = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if reduced is None:
+        raise ValueError(f"Could not read image: {image_path}")
+    return (reduced.shape[0] + 1) * 8, (reduced.shape[1] + 1) * 8
+
+
+def estimate_peak(height, width, tile_size, batch_size, mode, n_images=2):
+    """
+    Estimated bytes a segmentation job adds on top of the process baseline.
+    """
+    pixels = height * width
+    scene = SCENE_BYTES_PER_PIXEL[mode] * pixels * n_images / 2
+    decode = DECODE_BYTES_PER_PIXEL * pixels
+    tiles = batch_size * (TILE_BYTES_PER_PIXEL * tile_size * tile_size
+                          + MODEL_BYTES_PER_PIXEL * MODEL_INPUT * MODEL_INPUT
+                          + ACTIVATION_BYTES_PER_SAMPLE)
+    return int(max(scene, decode) + tiles)
+
+
+def plan_memory(budget, height, width, tile_sizes=(512, 256), batch_sizes=BATCH_SIZES, n_images=2, baseline=None):
+    """
+    Choose tile size, batch size and buffer mode for a job to fit a memory budget.
+
+    In-memory buffers are preferred, then larger batches, then the earlier
+    tile sizes in `tile_sizes` (pass a single size to keep the model's
+    effective resolution fixed).
+
+    Args:
+        budget: Maximum resident set size for the process, in bytes
+        height, width: Scene size (see image_dimensions)
+        tile_sizes: Acceptable tile sizes, most preferred first
+        batch_sizes: Acceptable batch sizes
+        n_images: Epochs held by the job (2 for a comparison)
+        baseline: Bytes already resident (default: this process's current RSS,
+            which includes the model once loaded)
+
+    Returns:
+        MemoryPlan
+
+    Raises:
+        MemoryBudgetError: if no combination fits
+    """
+    if baseline is None:
+        baseline = current_rss()
+
+    for mode in ("memory", "memmap"):
+        for batch_size in sorted(batch_sizes, reverse=True):
+            for tile_size in tile_sizes:
+                peak = baseline + estimate_peak(height, width, tile_size, batch_size, mode, n_images)
+                if peak <= budget:
+                    return MemoryPlan(tile_size, batch_size, mode, peak, budget, baseline)
+
+    smallest = baseline + estimate_peak(height, width, min(tile_sizes), min(batch_sizes), "memmap", n_images)
+    raise MemoryBudgetError(f"A {width}x{height} scene needs at least {smallest / 2**20:.0f} MB, "
+                            f"over the {budget / 2**20:.0f} MB budget")
+
+
+def log_plan(plan, name, height, width):
+    print(f"[+] Memory plan for {name} ({width}x{height}): tile {plan.tile_size}, batch {plan.batch_size}, "
+          f"{plan.mode} buffers, estimated peak {plan.estimated_peak / 2**20:.0f} MB "
+          f"of {plan.budget / 2**20:.0f} MB (baseline {plan.baseline / 2**20:.0f} MB)")
+
+
+class MemoryGovernor:
+    """
+    Applies a MemoryPlan while a job runs: allocates full-image buffers in
+    memory or as memory-mapped files, and checks the resident set size after
+    every batch, halving the batch size (and finally failing) when it goes
+    over budget. Use as a context manager so mapped files are removed.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.batch_size = plan.batch_size
+        self._workdir = tempfile.mkdtemp(prefix="road_buffers_") if plan.mode == "memmap" else None
+        self._count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+
+    def allocate(self, shape, dtype, name="buffer"):
+        """
+        Zero-filled array, file-backed in memmap mode.
+        """
+        if self._workdir is None:
+            return np.zeros(shape, dtype=dtype)
+        self._count += 1
+        path = os.path.join(self._workdir, f"{self._count}_{name}.npy")
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+
+    def load_image(self, image_path):
+        """
+        Decode an RGB image, moving it to a memory-mapped file in memmap mode.
+        """
+        from dl_model.compare import load_image
+
+        image = load_image(image_path)
+        if self._workdir is None:
+            return image
+        buffer = self.allocate(image.shape, image.dtype, "image")
+        buffer[:] = image
+        return buffer
+
+    def check(self):
+        """
+        Enforce the budget; call between batches.
+
+        Returns:
+            int: the batch size to use next
+
+        Raises:
+            MemoryBudgetError: if over budget at batch size 1
+        """
+        rss = current_rss()
+        if rss <= self.plan.budget:
+            return self.batch_size
+        if self.batch_size > 1:
+            self.batch_size //= 2
+            print(f"[!] RSS {rss / 2**20:.0f} MB over the {self.plan.budget / 2**20:.0f} MB budget, "
+                  f"batch size reduced to {self.batch_size}")
+            return self.batch_size
+        raise MemoryBudgetError(f"RSS {rss / 2**20:.0f} MB exceeds the {self.plan.budget / 2**20:.0f} MB budget")
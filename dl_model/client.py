@@ -0,0 +1,136 @@
+import os
+import json
+import socket
+import struct
+
+import numpy as np
+
+
+# Default socket for dl_model.daemon; override with ROAD_INFERENCE_SOCKET
+DEFAULT_SOCKET = os.environ.get("ROAD_INFERENCE_SOCKET", "/tmp/road_inference.sock")
+
+_HEADER = struct.Struct("!II")
+
+
+def send_message(sock, header, payload=b""):
+    """
+    Send one message: two lengths, a JSON header and an optional raw payload
+    (array bytes described by the header).
+    """
+    body = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body), len(payload)) + body)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Inference daemon closed the connection")
+        received += count
+    return bytes(buf)
+
+
+def recv_message(sock):
+    header_size, payload_size = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, header_size).decode("utf-8"))
+    payload = _recv_exact(sock, payload_size) if payload_size else b""
+    return header, payload
+
+
+class InferenceClient:
+    """
+    Thin client for dl_model.daemon. Opens one connection per call, so a
+    single instance can be shared by threads (e.g. Flask request handlers).
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=600):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, header, payload=b""):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            send_message(sock, header, payload)
+            response, data = recv_message(sock)
+        if "error" in response:
+            raise RuntimeError(f"Inference daemon error: {response['error']}")
+        return response, data
+
+    def health(self):
+        """
+        Returns:
+            dict: status ('loading' or 'ready'), model path, queued tiles
+        """
+        response, _ = self._call({"op": "health"})
+        return response
+
+    def is_ready(self):
+        try:
+            return self.health().get("status") == "ready"
+        except (OSError, ConnectionError, RuntimeError):
+            return False
+
+    def predict(self, batch):
+        """
+        Run the model on a normalized float batch of shape (n, 256, 256, 3),
+        like model.predict. Returns float32 probabilities of shape (n, 256, 256, 1).
+        """
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        response, data = self._call({"op": "predict", "shape": list(batch.shape)}, batch.tobytes())
+        return np.frombuffer(data, dtype=np.float32).reshape(response["shape"])
+
+    def process_scene(self, image_path, tile_size=512, overlap=32, threshold=0.5):
+        """
+        Segment a whole scene inside the daemon, as compare.process_large_image.
+
+        Returns:
+            numpy.ndarray: (height, width, 1) uint8 road mask
+        """
+        response, data = self._call({
+            "op": "scene",
+            "image_path": os.path.abspath(image_path),
+            "tile_size": tile_size,
+            "overlap": overlap,
+            "threshold": threshold,
+        })
+        height, width = response["shape"]
+        bits = np.frombuffer(data, dtype=np.uint8)
+        return np.unpackbits(bits, count=height * width).reshape(height, width, 1)
+
+
+class RemoteModel:
+    """
+    Stand-in for a Keras model whose predict() runs in the inference daemon,
+    so it can be passed to process_large_image and friends unchanged.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def predict(self, batch, verbose=0):
+        return self.client.predict(batch)
+
+
+def load_model(model_path, socket_path=DEFAULT_SOCKET):
+    """
+    Use the warm inference daemon if it is up and serving model_path,
+    otherwise load the model in this process.
+    """
+    client = InferenceClient(socket_path)
+    try:
+        health = client.health()
+    except (OSError, ConnectionError, RuntimeError):
+        health = {}
+
+    if health.get("status") == "ready" and os.path.abspath(health.get("model", "")) == os.path.abspath(model_path):
+        print(f"Using inference daemon at {socket_path}")
+        return RemoteModel(client)
+
+    from dl_model.architecture import load_model_weights
+    return load_model_weights(model_path)
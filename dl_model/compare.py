@@ -1,9 +1,13 @@
 import numpy as np
 import cv2
-import matplotlib.pyplot as plt
 from dl_model.architecture import load_model_weights
+from dl_model.util import get_pyplot
+from dl_model.alignment import estimate_offset, offset_from_geotransforms, overlap_windows, crop
+from dl_model.probability import PROBABILITY_SCALE, threshold_in_place, save_probability_map
 import os
 import math
+from pathlib import Path
+from collections import namedtuple
 
 def split_image_into_tiles(image, tile_size=512, overlap=3):
     
@@ -32,54 +36,169 @@ def split_image_into_tiles(image, tile_size=512, overlap=3):
     
     return tiles
 
-def predict_tile_road_mask(model, tile):
+class TilePredictor:
     """
-    Predict road mask for a single image tile.
+    Batched tile inference that reuses its buffers across calls: tiles are
+    resized and normalized straight into a preallocated float32 batch, and
+    probabilities are resized, quantized and thresholded in preallocated
+    per-tile-size buffers. Apart from the model's own output, steady-state
+    calls allocate no arrays (see dl_model.bench_preprocess).
+
+    Results are views into the buffers, valid until the next call.
     """
-    tile_rgb = tile.copy() if len(tile.shape) == 3 else cv2.cvtColor(tile, cv2.COLOR_GRAY2RGB)
-    resized_tile = cv2.resize(tile_rgb, (256, 256))
-    normalized_tile = resized_tile / 255.0
-    
-    input_tile = np.expand_dims(normalized_tile, axis=0)
-    
-    predicted_mask = model.predict(input_tile)
-    predicted_mask = (predicted_mask > 0.5).astype(np.uint8)[0]
-    
-    if resized_tile.shape[:2] != tile.shape[:2]:
-        predicted_mask = cv2.resize(predicted_mask, (tile.shape[1], tile.shape[0]))
-    
-    return predicted_mask
 
-def process_large_image(model, image_path, tile_size = 512 , overlap=32):
+    def __init__(self, model, max_batch=1):
+        self.model = model
+        self.max_batch = max_batch
+        self.batch = np.empty((max_batch, 256, 256, 3), dtype=np.float32)
+        self._staging = np.empty((256, 256, 3), dtype=np.uint8)
+        self._buffers = {}
+
+    def _tile_buffers(self, shape):
+        if shape not in self._buffers:
+            self._buffers[shape] = (np.empty((self.max_batch,) + shape, dtype=np.float32),
+                                    np.empty((self.max_batch,) + shape, dtype=np.uint8))
+        return self._buffers[shape]
+
+    def _fill(self, tiles):
+        for i, tile in enumerate(tiles):
+            if len(tile.shape) == 2:
+                tile = cv2.cvtColor(tile, cv2.COLOR_GRAY2RGB)
+            if tile.shape[:2] != (256, 256):
+                tile = cv2.resize(tile, (256, 256), dst=self._staging)
+            # Cast, then scale in float32: a mixed-type ufunc would allocate cast buffers
+            np.copyto(self.batch[i], tile)
+            np.divide(self.batch[i], np.float32(255), out=self.batch[i])
+        return self.batch[:len(tiles)]
+
+    def predict_probabilities(self, tiles):
+        """
+        Returns:
+            list: uint8-quantized probability map of each tile, (height, width)
+        """
+        if len(tiles) > self.max_batch:
+            raise ValueError(f"{len(tiles)} tiles exceed the predictor's batch of {self.max_batch}")
+
+        predictions = self.model.predict(self._fill(tiles))
+
+        results = []
+        for i, (tile, prediction) in enumerate(zip(tiles, predictions)):
+            shape = tile.shape[:2]
+            probability, quantized = self._tile_buffers(shape)
+            probability, quantized = probability[i], quantized[i]
+            prediction = prediction.reshape(256, 256)
+            if shape != (256, 256):
+                prediction = cv2.resize(prediction, (shape[1], shape[0]), dst=probability)
+            # quantize_probability, in place
+            np.multiply(prediction, PROBABILITY_SCALE, out=probability)
+            np.clip(probability, 0, PROBABILITY_SCALE, out=probability)
+            np.rint(probability, out=probability)
+            np.copyto(quantized, probability, casting="unsafe")
+            results.append(quantized)
+        return results
+
+    def predict_masks(self, tiles, threshold=0.5):
+        """
+        Returns:
+            list: 0/1 uint8 road mask of each tile, (height, width)
+        """
+        masks = self.predict_probabilities(tiles)
+        for mask in masks:
+            threshold_in_place(mask, threshold)
+        return masks
+
+def predict_tile_road_mask(model, tile, threshold=0.5, predictor=None):
     """
-    Process large image by splitting it into tiles, running predictions, and stitching results.
+    Predict road mask for a single image tile. Pass a TilePredictor when
+    calling in a loop so its buffers are reused.
+    """
+    if predictor is None:
+        predictor = TilePredictor(model)
+    return predictor.predict_masks([tile], threshold)[0][:, :, np.newaxis]
+
+def load_image(image_path):
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_path}")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+def segment_image(model, image, tile_size=512, overlap=32, threshold=0.5, probability_path=None, name="image",
+                  region=None, batch_size=1, governor=None):
     """
-    original_image = cv2.imread(image_path)
-    original_image = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
+    Run tiled road segmentation on an in-memory RGB image (or a view of one).
+
+    Tiles are stitched as a uint8-quantized probability map (maximum over
+    overlapping tiles) and thresholded once at the end. If probability_path is
+    given the map is saved there, so the mask can be recomputed at another
+    threshold without running the model again (see dl_model.probability).
+
+    If region (a shapely geometry in the image's pixel grid) is given, only
+    tiles intersecting it are inferred and the mask is cleared outside it.
+
+    Tiles go to the model batch_size at a time. A governor (see
+    dl_model.budget) sets the batch size, checks memory between batches and
+    allocates the stitched probability map.
+    """
+    height, width = image.shape[:2]
     
-    height, width = original_image.shape[:2]
+    if governor is not None:
+        batch_size = governor.batch_size
+        full_probability = governor.allocate((height, width, 1), np.uint8, "probability")
+    else:
+        full_probability = np.zeros((height, width, 1), dtype=np.uint8)
     
-    full_mask = np.zeros((height, width, 1), dtype=np.uint8)
+    tiles = split_image_into_tiles(image, tile_size, overlap)
     
-    tiles = split_image_into_tiles(original_image, tile_size, overlap)
+    if region is not None:
+        from dl_model.regions import tile_intersects, rasterize_region
+        
+        total_tiles = len(tiles)
+        tiles = [(tile, x, y) for tile, x, y in tiles
+                 if tile_intersects(region, x, y, x + tile.shape[1], y + tile.shape[0])]
+        print(f"Region covers {len(tiles)}/{total_tiles} tiles")
     
-    print(f"Processing {len(tiles)} tiles for image {os.path.basename(image_path)}...")
+    print(f"Processing {len(tiles)} tiles for image {name}...")
     
-    for i, (tile, x_start, y_start) in enumerate(tiles):
-        if i % 10 == 0:
-            print(f"Processing tile {i+1}/{len(tiles)}")
-        
-        mask = predict_tile_road_mask(model, tile)
+    predictor = TilePredictor(model, batch_size)
+    
+    i = 0
+    while i < len(tiles):
+        if governor is not None:
+            batch_size = governor.check()
+        batch = tiles[i:i + batch_size]
         
-        if len(mask.shape) == 2:
-            mask = np.expand_dims(mask, axis=-1)
+        if (i + len(batch) - 1) // 10 > (i - 1) // 10:
+            print(f"Processing tile {i+1}/{len(tiles)}")
         
-        x_end = min(x_start + tile.shape[1], width)
-        y_end = min(y_start + tile.shape[0], height)
+        probabilities = predictor.predict_probabilities([tile for tile, _, _ in batch])
         
-        mask_region = full_mask[y_start:y_end, x_start:x_end]
+        for (tile, x_start, y_start), probability in zip(batch, probabilities):
+            x_end = min(x_start + tile.shape[1], width)
+            y_end = min(y_start + tile.shape[0], height)
+            
+            stitched = full_probability[y_start:y_end, x_start:x_end, 0]
+            
+            np.maximum(stitched, probability[:y_end-y_start, :x_end-x_start], out=stitched)
         
-        full_mask[y_start:y_end, x_start:x_end] = np.maximum(mask_region, mask[:y_end-y_start, :x_end-x_start])
+        i += len(batch)
+    
+    if region is not None:
+        full_probability[~rasterize_region(region, (height, width))] = 0
+    
+    if probability_path:
+        save_probability_map(probability_path, full_probability)
+    
+    # The probability map is not needed past this point, so it becomes the mask
+    return threshold_in_place(full_probability, threshold)
+
+def process_large_image(model, image_path, tile_size = 512 , overlap=32, threshold=0.5, probability_path=None):
+    """
+    Process large image by splitting it into tiles, running predictions, and stitching results.
+    """
+    original_image = load_image(image_path)
+    
+    full_mask = segment_image(model, original_image, tile_size, overlap, threshold,
+                              probability_path, os.path.basename(image_path))
     
     yellow_mask = np.zeros_like(original_image)
     yellow_mask[full_mask[:,:,0] == 1] = [255, 255, 0]
@@ -88,24 +207,108 @@ def process_large_image(model, image_path, tile_size = 512 , overlap=32):
     
     return original_image, full_mask, overlay_image
 
-def detect_road_changes(model, image1_path, image2_path, tile_size=256, overlap=32):
+def align_epochs(original1, original2, offset=None, geotransforms=None):
+    """
+    Crop two epochs to their common extent.
+
+    The offset of image2 in image1's pixel grid comes from, in order of
+    preference, `offset`, the GDAL-style `geotransforms` pair, or phase
+    correlation on downsampled copies.
+
+    Returns:
+        tuple: (cropped image1, cropped image2, window of image1 as (x0, y0, x1, y1))
+    """
+    if offset is None:
+        if geotransforms is not None:
+            offset = offset_from_geotransforms(*geotransforms)
+        else:
+            offset = estimate_offset(original1, original2)
+    
+    window1, window2 = overlap_windows(original1.shape, original2.shape, offset)
+    if offset != (0, 0) or original1.shape != original2.shape:
+        print(f"Aligned epochs at offset {offset}; comparing window {window1} of the first image")
+    
+    return crop(original1, window1), crop(original2, window2), window1
+
+def build_change_overlay(original1, original2, old_roads, new_roads):
+    """
+    Blend the two epochs and colour existing roads red and new roads blue.
+
+    Returns:
+        tuple: (composite_image, change_overlay)
+    """
+    composite_image = cv2.addWeighted(original1, 0.5, original2, 0.5, 0)
+    
+    change_mask = np.zeros_like(composite_image)
+    
+    change_mask[old_roads] = [255, 0, 0]
+    
+    change_mask[new_roads] = [0, 0, 255]
+    
+    change_overlay = cv2.addWeighted(composite_image, 0.7, change_mask, 0.3, 0)
+    
+    return composite_image, change_overlay
+
+def detect_road_changes(model, image1_path, image2_path, tile_size=256, overlap=32, threshold=0.5,
+                        probability_dir=None, offset=None, geotransforms=None, region=None, memory_budget=None):
     """
     Detects road changes between two large images of the same location at different times.
+
+    The epochs are aligned first (see align_epochs) and only their common
+    extent is segmented and compared; nothing is resampled. If region (a
+    shapely geometry in image1's pixel grid) is given, only tiles touching it
+    are segmented. If probability_dir is given, each image's probability map
+    (over the common extent) is saved there as <image name>_probability.npz.
+
+    If memory_budget (bytes of RSS) is given, the job is planned against it
+    before any image is decoded: tile_size or a smaller one down to the
+    model's input size, a batch size, and in-memory or memory-mapped buffers
+    (see dl_model.budget). The budget is then enforced between batches.
     """
+    governor = None
+    if memory_budget is not None:
+        from dl_model.budget import plan_memory, log_plan, image_dimensions, MemoryGovernor, MODEL_INPUT
+        
+        height, width = np.max([image_dimensions(image1_path), image_dimensions(image2_path)], axis=0)
+        tile_sizes = [tile_size >> k for k in range(4) if tile_size >> k >= MODEL_INPUT] or [tile_size]
+        plan = plan_memory(memory_budget, int(height), int(width), tile_sizes)
+        log_plan(plan, f"{os.path.basename(image1_path)} vs {os.path.basename(image2_path)}", height, width)
+        tile_size = plan.tile_size
+        governor = MemoryGovernor(plan)
+    
+    try:
+        return _detect_road_changes(model, image1_path, image2_path, tile_size, overlap, threshold,
+                                    probability_dir, offset, geotransforms, region, governor)
+    finally:
+        if governor is not None:
+            governor.close()
+
+def _detect_road_changes(model, image1_path, image2_path, tile_size, overlap, threshold,
+                         probability_dir, offset, geotransforms, region, governor):
+    if governor is not None:
+        images = governor.load_image(image1_path), governor.load_image(image2_path)
+    else:
+        images = load_image(image1_path), load_image(image2_path)
+    original1, original2, window1 = align_epochs(*images, offset, geotransforms)
+    del images
+    
+    if region is not None:
+        from shapely.affinity import translate
+        region = translate(region, -window1[0], -window1[1])
+    
+    probability_paths = [None, None]
+    if probability_dir:
+        os.makedirs(probability_dir, exist_ok=True)
+        probability_paths = [os.path.join(probability_dir, f"{Path(path).stem}_probability.npz")
+                             for path in (image1_path, image2_path)]
+    
     print("Processing first image...")
-    original1, mask1, overlay1 = process_large_image(model, image1_path, tile_size, overlap)
+    mask1 = segment_image(model, original1, tile_size, overlap, threshold,
+                          probability_paths[0], os.path.basename(image1_path), region, governor=governor)
     
     print("Processing second image...")
-    original2, mask2, overlay2 = process_large_image(model, image2_path, tile_size, overlap)
-    
-    if original1.shape != original2.shape:
-        min_height = min(original1.shape[0], original2.shape[0])
-        min_width = min(original1.shape[1], original2.shape[1])
-        
-        original1 = cv2.resize(original1, (min_width, min_height))
-        original2 = cv2.resize(original2, (min_width, min_height))
-        mask1 = cv2.resize(mask1, (min_width, min_height))
-        mask2 = cv2.resize(mask2, (min_width, min_height))
+    mask2 = segment_image(model, original2, tile_size, overlap, threshold,
+                          probability_paths[1], os.path.basename(image2_path), region, governor=governor)
     
     binary_mask1 = mask1[:,:,0].astype(np.bool_)
     binary_mask2 = mask2[:,:,0].astype(np.bool_)
@@ -114,22 +317,62 @@ def detect_road_changes(model, image1_path, image2_path, tile_size=256, overlap=
     
     new_roads = np.logical_and(binary_mask2, np.logical_not(binary_mask1))
     
-    composite_image = cv2.addWeighted(original1, 0.5, original2, 0.5, 0)
-    
-    change_mask = np.zeros_like(composite_image)
-    
-    change_mask[old_roads] = [255, 0, 0]
-    
-    change_mask[new_roads] = [0, 0, 255]
-    
-    change_overlay = cv2.addWeighted(composite_image, 0.7, change_mask, 0.3, 0)
+    composite_image, change_overlay = build_change_overlay(original1, original2, old_roads, new_roads)
     
     return composite_image, old_roads, new_roads, change_overlay
 
+# Per-cell counts of old-road and new-road pixels on a grid of cell_size
+# squares over a height x width comparison (edge cells may be partial)
+ChangeHeatmap = namedtuple("ChangeHeatmap", ["cell_size", "height", "width", "old_roads", "new_roads"])
+
+def block_counts(mask, cell_size):
+    """
+    True pixels of a 2-D mask per cell_size x cell_size cell, by reshape-sum:
+    the full cells in one reduction, the partial last row and column of cells
+    (if any) in one each.
+
+    Returns:
+        numpy.ndarray: uint32 counts, shape (ceil(height / cell_size), ceil(width / cell_size))
+    """
+    height, width = mask.shape
+    rows, cols = -(-height // cell_size), -(-width // cell_size)
+    full_rows, full_cols = height // cell_size, width // cell_size
+    fh, fw = full_rows * cell_size, full_cols * cell_size
+    
+    counts = np.empty((rows, cols), dtype=np.uint32)
+    counts[:full_rows, :full_cols] = mask[:fh, :fw].reshape(full_rows, cell_size, full_cols, cell_size).sum(
+        axis=(1, 3), dtype=np.uint32)
+    if fw < width:
+        counts[:full_rows, -1] = mask[:fh, fw:].reshape(full_rows, cell_size * (width - fw)).sum(axis=1, dtype=np.uint32)
+    if fh < height:
+        counts[-1, :full_cols] = mask[fh:, :fw].reshape(height - fh, full_cols, cell_size).sum(axis=(0, 2), dtype=np.uint32)
+    if fh < height and fw < width:
+        counts[-1, -1] = np.count_nonzero(mask[fh:, fw:])
+    return counts
+
+def change_heatmap(old_roads, new_roads, cell_size=64):
+    """
+    Reduce the outputs of detect_road_changes to a grid of per-cell road and
+    new-road pixel counts, showing where change is concentrated without the
+    full masks.
+
+    Returns:
+        ChangeHeatmap
+    """
+    height, width = old_roads.shape[:2]
+    return ChangeHeatmap(cell_size, height, width,
+                         block_counts(old_roads.reshape(height, width), cell_size),
+                         block_counts(new_roads.reshape(height, width), cell_size))
+
 def visualize_road_changes(composite_image, old_roads, new_roads, change_overlay):
     """
     Visualize the road changes between two time periods.
     """
+    plt = get_pyplot()
+    if plt is None:
+        print("Headless mode: skipping visualization")
+        return
+    
     plt.figure(figsize=(15, 10))
     
     plt.subplot(2, 2, 1)
@@ -155,23 +398,45 @@ def visualize_road_changes(composite_image, old_roads, new_roads, change_overlay
     plt.tight_layout()
     plt.show()
 
-def save_results(composite_image, old_roads, new_roads, change_overlay, output_dir='.'):
+def save_results(composite_image, old_roads, new_roads, change_overlay, output_dir='.', writer=None,
+                 image_format=None, quality=None, mask_format="png"):
     """
-    Save the generated images to disk.
+    Save the generated images to disk, encoded in parallel by an
+    ArtifactWriter (see dl_model.artifacts). Masks are lossless ("png" for
+    1-bit PNG, "npz" for packed bits); the composite and overlay use
+    image_format and quality (default ROAD_OVERLAY_FORMAT / _QUALITY).
+
+    With a writer, the writes are only queued and this returns at once; the
+    arrays must then be left unmodified until writer.flush(), which raises if
+    a write failed. Without one, it waits, raises on a failed write and
+    prints each artifact's encode time and size.
+
+    Returns:
+        list: the queued writes' futures
     """
-    os.makedirs(output_dir, exist_ok=True)
-    
-    cv2.imwrite(os.path.join(output_dir, 'composite_image.jpg'), 
-                cv2.cvtColor(composite_image, cv2.COLOR_RGB2BGR))
+    from dl_model.artifacts import ArtifactWriter, print_report, OVERLAY_FORMAT, OVERLAY_QUALITY
     
-    cv2.imwrite(os.path.join(output_dir, 'old_roads.jpg'), 
-                old_roads.astype(np.uint8) * 255)
-    
-    cv2.imwrite(os.path.join(output_dir, 'new_roads.jpg'), 
-                new_roads.astype(np.uint8) * 255)
+    image_format = image_format or OVERLAY_FORMAT
+    quality = OVERLAY_QUALITY if quality is None else quality
+    os.makedirs(output_dir, exist_ok=True)
     
-    cv2.imwrite(os.path.join(output_dir, 'road_changes_overlay.jpg'), 
-                cv2.cvtColor(change_overlay, cv2.COLOR_RGB2BGR))
+    own_writer = writer is None
+    if own_writer:
+        writer = ArtifactWriter()
+    
+    futures = [
+        writer.write_image(os.path.join(output_dir, f'composite_image.{image_format}'), composite_image,
+                           image_format, quality),
+        writer.write_mask(os.path.join(output_dir, f'old_roads.{mask_format}'), old_roads),
+        writer.write_mask(os.path.join(output_dir, f'new_roads.{mask_format}'), new_roads),
+        writer.write_image(os.path.join(output_dir, f'road_changes_overlay.{image_format}'), change_overlay,
+                           image_format, quality),
+    ]
+    
+    if own_writer:
+        writer.close()
+        print_report([future.result() for future in futures])
+    return futures
 
 """def main():
     MODEL_PATH = 'models/save_best.h5'
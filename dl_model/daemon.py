@@ -0,0 +1,205 @@
+import os
+import time
+import queue
+import threading
+import socketserver
+
+import numpy as np
+
+from dl_model.client import DEFAULT_SOCKET, send_message, recv_message
+
+
+class _Pending:
+    def __init__(self, batch):
+        self.batch = batch
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class TileBatcher:
+    """
+    Collects tile batches from concurrent callers and runs them through the
+    model together, up to max_batch tiles or max_wait seconds after the first
+    request arrives. A single request larger than max_batch runs on its own.
+    """
+
+    def __init__(self, model, max_batch=32, max_wait=0.01):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        # Request that did not fit in the previous model call; it starts the next one
+        self._held = None
+        self._queued = 0
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="tile-batcher", daemon=True)
+        self.thread.start()
+
+    def predict(self, batch, verbose=0):
+        pending = _Pending(np.asarray(batch, dtype=np.float32))
+        with self._lock:
+            self._queued += len(pending.batch)
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def queued_tiles(self):
+        """
+        Returns:
+            int: tiles submitted but not yet taken into a model call
+        """
+        with self._lock:
+            return self._queued
+
+    def _take(self, items):
+        with self._lock:
+            self._queued -= sum(len(item.batch) for item in items)
+        return items
+
+    def _collect(self):
+        if self._held is not None:
+            items, self._held = [self._held], None
+        else:
+            items = [self.queue.get()]
+        size = len(items[0].batch)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(item.batch) > self.max_batch:
+                self._held = item
+                break
+            items.append(item)
+            size += len(item.batch)
+        return self._take(items)
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            try:
+                batch = np.concatenate([item.batch for item in items])
+                output = self.model.predict_on_batch(batch)
+                output = np.asarray(output, dtype=np.float32)
+                start = 0
+                for item in items:
+                    item.result = output[start:start + len(item.batch)]
+                    start += len(item.batch)
+            except Exception as e:
+                for item in items:
+                    item.error = e
+            for item in items:
+                item.done.set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        try:
+            header, payload = recv_message(self.request)
+        except ConnectionError:
+            return
+
+        try:
+            op = header.get("op")
+            if op == "health":
+                send_message(self.request, {
+                    "status": "ready" if server.ready.is_set() else "loading",
+                    "model": server.model_path,
+                    "queued": server.batcher.queued_tiles() if server.batcher else 0,
+                })
+                return
+
+            server.ready.wait()
+
+            if op == "predict":
+                batch = np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
+                output = server.batcher.predict(batch)
+                send_message(self.request, {"shape": list(output.shape)}, output.tobytes())
+            elif op == "scene":
+                from dl_model.compare import process_large_image
+
+                _, full_mask, _ = process_large_image(
+                    server.batcher, header["image_path"], header["tile_size"],
+                    header["overlap"], header["threshold"],
+                )
+                send_message(self.request, {"shape": list(full_mask.shape[:2])},
+                             np.packbits(full_mask[:, :, 0]).tobytes())
+            else:
+                send_message(self.request, {"error": f"unknown op {op!r}"})
+        except Exception as e:
+            print(f"[!] Inference request failed: {e}")
+            send_message(self.request, {"error": str(e)})
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, model_path, width=1.0, separable=False):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.model_path = os.path.abspath(model_path)
+        self.width = width
+        self.separable = separable
+        self.batcher = None
+        self.ready = threading.Event()
+
+    def load(self, max_batch=32, max_wait=0.01):
+        """
+        Load and warm up the model, then start answering inference requests.
+        """
+        from dl_model.architecture import load_model_weights
+
+        print(f"Loading model from {self.model_path}...")
+        model = load_model_weights(self.model_path, self.width, self.separable)
+        model.predict_on_batch(np.zeros((1, 256, 256, 3), dtype=np.float32))
+        self.batcher = TileBatcher(model, max_batch, max_wait)
+        self.ready.set()
+        print("Inference daemon ready")
+
+
+def serve(model_path='dl_model/models/save_best.h5', socket_path=DEFAULT_SOCKET, max_batch=32, max_wait=0.01,
+          width=1.0, separable=False):
+    """
+    Run the inference daemon until interrupted. Health checks are answered
+    while the model is still loading. width and separable select a
+    lightweight variant (see dl_model.distill).
+    """
+    server = InferenceServer(socket_path, model_path, width, separable)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Listening on {socket_path}")
+
+    try:
+        server.load(max_batch, max_wait)
+        thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Keep the road segmentation model loaded and serve it over a Unix socket")
+    parser.add_argument("--model", default="dl_model/models/save_best.h5")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    parser.add_argument("--width", type=float, default=1.0, help="Width multiplier the model was built with")
+    parser.add_argument("--separable", action="store_true", help="The model uses depthwise-separable convolutions")
+    args = parser.parse_args()
+
+    serve(args.model, args.socket, args.max_batch, args.max_wait_ms / 1000.0, args.width, args.separable)
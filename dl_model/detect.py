@@ -4,13 +4,14 @@ import cv2
 from pathlib import Path
 
 from dl_model.compare import (
-    load_model_weights, 
     process_large_image, 
     detect_road_changes
 )
+from dl_model.client import load_model
+from dl_model.artifacts import shared_writer, OVERLAY_FORMAT, OVERLAY_QUALITY
 
 def detect_significant_road_changes(image1_path, image2_path, output_dir='dl_model/results', 
-                                   tile_size=1024, overlap=3, threshold=15):
+                                   tile_size=1024, overlap=3, threshold=15, probability_dir=None, writer=None):
     """
     Detect if there is a significant change in roads between two satellite images.
     
@@ -21,6 +22,11 @@ def detect_significant_road_changes(image1_path, image2_path, output_dir='dl_mod
         tile_size (int): Size of tiles to process
         overlap (int): Overlap between tiles
         threshold (float): Percentage threshold for considering a change significant (default: 15%)
+        probability_dir (str): If set, save both probability maps here so the change can be
+            re-evaluated at other thresholds with dl_model.probability.recompute_road_changes
+        writer (ArtifactWriter): If set, the result image is only queued on it and this returns
+            while it is encoded, so a scan loop can start the next comparison; flush the writer
+            before using result_path. By default the image is written before returning.
         
     Returns:
         tuple: (is_significant_change (bool), change_percentage (float), result_path (str))
@@ -29,10 +35,10 @@ def detect_significant_road_changes(image1_path, image2_path, output_dir='dl_mod
     model_path = 'dl_model/models/save_best.h5'
     os.makedirs(output_dir, exist_ok=True)
     
-    model = load_model_weights(model_path)
+    model = load_model(model_path)
     
     composite_image, old_roads, new_roads, change_overlay = detect_road_changes(
-        model, image1_path, image2_path, tile_size, overlap
+        model, image1_path, image2_path, tile_size, overlap, probability_dir=probability_dir
     )
 
     total_pixels = old_roads.size
@@ -48,14 +54,17 @@ def detect_significant_road_changes(image1_path, image2_path, output_dir='dl_mod
     
     img1_name = Path(image1_path).stem
     img2_name = Path(image2_path).stem
-    result_filename = f"{img1_name}_{img2_name}_result.jpg"
+    result_filename = f"{img1_name}_{img2_name}_result.{OVERLAY_FORMAT}"
     result_path = os.path.join(output_dir, result_filename)
     
-    text_overlay = change_overlay.copy()
+    # change_overlay is not used past this point, so the text goes straight onto it
+    text_overlay = change_overlay
     text = f"Change: {change_percentage:.2f}% - {'SIGNIFICANT' if is_significant_change else 'NOT SIGNIFICANT'}"
     cv2.putText(text_overlay, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
     
-    cv2.imwrite(result_path, cv2.cvtColor(text_overlay, cv2.COLOR_RGB2BGR))
+    written = (writer or shared_writer()).write_image(result_path, text_overlay, OVERLAY_FORMAT, OVERLAY_QUALITY)
+    if writer is None:
+        written.result()
     
     return is_significant_change, change_percentage, result_path
 
@@ -0,0 +1,208 @@
+import os
+import time
+import json
+
+import numpy as np
+import cv2
+
+from dl_model.probability import quantize_probability, mask_from_probability, PROBABILITY_SCALE
+
+
+# Distils save_best.h5 into narrower U-Nets (see architecture.unet's width
+# and separable options) and reports how much agreement each gives up for how
+# much CPU throughput:
+#
+#   python -m dl_model.distill dl_model/images/*.jpg --widths 1.0 0.5 0.25 --separable
+#
+# There is no labelled set, so IoU is measured against the teacher's own
+# masks on held-out tiles: it is the agreement a scan would lose by switching.
+
+MODEL_INPUT = 256
+
+
+def sample_tiles(image_paths, count, tile_size=MODEL_INPUT, seed=0):
+    """
+    Cut `count` random windows, spread evenly over the images, resized to the
+    model's input size.
+
+    Returns:
+        numpy.ndarray: uint8 array of shape (count, 256, 256, 3)
+    """
+    from dl_model.compare import load_image
+
+    rng = np.random.default_rng(seed)
+    tiles = np.empty((count, MODEL_INPUT, MODEL_INPUT, 3), dtype=np.uint8)
+    per_image = np.array_split(np.arange(count), len(image_paths))
+
+    for image_path, indices in zip(image_paths, per_image):
+        image = load_image(image_path)
+        height, width = image.shape[:2]
+        if height < tile_size or width < tile_size:
+            raise ValueError(f"{image_path} is smaller than a {tile_size}px tile")
+        for i in indices:
+            y = rng.integers(0, height - tile_size + 1)
+            x = rng.integers(0, width - tile_size + 1)
+            tiles[i] = cv2.resize(image[y:y + tile_size, x:x + tile_size], (MODEL_INPUT, MODEL_INPUT))
+    return tiles
+
+
+def predict_probabilities(model, tiles, batch_size=32):
+    """
+    Returns:
+        numpy.ndarray: uint8-quantized probabilities, shape (n, 256, 256, 1)
+    """
+    probabilities = np.empty(tiles.shape[:3] + (1,), dtype=np.uint8)
+    for start in range(0, len(tiles), batch_size):
+        batch = tiles[start:start + batch_size].astype(np.float32) / 255.0
+        probabilities[start:start + batch_size] = quantize_probability(np.asarray(model.predict_on_batch(batch)))
+    return probabilities
+
+
+def _dataset(tiles, targets, batch_size, seed):
+    import tensorflow as tf
+
+    dataset = tf.data.Dataset.from_tensor_slices((tiles, targets))
+    dataset = dataset.shuffle(len(tiles), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.map(lambda x, y: (tf.cast(x, tf.float32) / 255.0, tf.cast(y, tf.float32) / PROBABILITY_SCALE),
+                          num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def distill(tiles, targets, width, separable=False, epochs=10, batch_size=16, learning_rate=1e-3, seed=0):
+    """
+    Train a student U-Net on the teacher's soft probabilities (binary
+    cross-entropy against the probabilities, not thresholded masks).
+
+    Args:
+        tiles: uint8 tiles from sample_tiles
+        targets: The teacher's predict_probabilities on them
+        width, separable: Student architecture (see architecture.unet)
+
+    Returns:
+        The trained Keras model
+    """
+    import tensorflow as tf
+    from dl_model.architecture import unet
+
+    tf.keras.utils.set_random_seed(seed)
+    student = unet(input_shape=(MODEL_INPUT, MODEL_INPUT, 3), output_layer=1, width=width, separable=separable)
+    student.compile(optimizer=tf.keras.optimizers.Adam(learning_rate), loss="binary_crossentropy")
+    student.fit(_dataset(tiles, targets, batch_size, seed), epochs=epochs, verbose=2)
+    return student
+
+
+def mask_iou(probabilities, reference, threshold=0.5):
+    """
+    IoU of the road masks of two quantized probability stacks, pooled over
+    all tiles. 1.0 when neither has any road.
+    """
+    predicted = mask_from_probability(probabilities, threshold).astype(np.bool_)
+    expected = mask_from_probability(reference, threshold).astype(np.bool_)
+    union = np.logical_or(predicted, expected).sum()
+    if union == 0:
+        return 1.0
+    return float(np.logical_and(predicted, expected).sum() / union)
+
+
+def measure_throughput(model, batch_size=16, batches=10):
+    """
+    Tiles per second through model.predict_on_batch, after one warm-up batch.
+    """
+    batch = np.random.default_rng(0).random((batch_size, MODEL_INPUT, MODEL_INPUT, 3), dtype=np.float32)
+    model.predict_on_batch(batch)
+
+    started = time.perf_counter()
+    for _ in range(batches):
+        model.predict_on_batch(batch)
+    return batch_size * batches / (time.perf_counter() - started)
+
+
+def compare_widths(teacher, image_paths, widths=(1.0, 0.5, 0.25), separable=False, tiles=1000, holdout=0.2,
+                   epochs=10, batch_size=16, output_dir=None, threshold=0.5, seed=0):
+    """
+    Distil one student per width (and, with separable=True, a separable
+    student per width as well) and measure each against the teacher.
+
+    Args:
+        teacher: The full model (architecture.load_model_weights)
+        image_paths: Scenes to sample training and held-out tiles from
+        output_dir: If given, student weights are saved there as
+            unet_w<width>[_separable].weights.h5
+
+    Returns:
+        list: one dict per model (teacher first) with name, width, separable,
+            parameters, iou, tiles_per_second, speedup and weights
+    """
+    samples = sample_tiles(image_paths, tiles, seed=seed)
+    print(f"[+] Sampled {len(samples)} tiles from {len(image_paths)} images")
+    targets = predict_probabilities(teacher, samples)
+
+    split = len(samples) - max(1, int(len(samples) * holdout))
+    train_tiles, test_tiles = samples[:split], samples[split:]
+    train_targets, test_targets = targets[:split], targets[split:]
+
+    teacher_speed = measure_throughput(teacher, batch_size)
+    rows = [{"name": "teacher", "width": 1.0, "separable": False, "parameters": teacher.count_params(), "iou": 1.0,
+             "tiles_per_second": teacher_speed, "speedup": 1.0, "weights": None}]
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    for width in widths:
+        for use_separable in ((False, True) if separable else (False,)):
+            name = f"unet_w{width:g}{'_separable' if use_separable else ''}"
+            print(f"[+] Distilling {name}...")
+            student = distill(train_tiles, train_targets, width, use_separable, epochs, batch_size, seed=seed)
+
+            weights = None
+            if output_dir:
+                weights = os.path.join(output_dir, f"{name}.weights.h5")
+                student.save_weights(weights)
+
+            speed = measure_throughput(student, batch_size)
+            rows.append({
+                "name": name,
+                "width": width,
+                "separable": use_separable,
+                "parameters": student.count_params(),
+                "iou": mask_iou(predict_probabilities(student, test_tiles), test_targets, threshold),
+                "tiles_per_second": speed,
+                "speedup": speed / teacher_speed,
+                "weights": weights,
+            })
+    return rows
+
+
+def print_report(rows):
+    print(f"{'model':<22} {'params':>10} {'IoU':>7} {'tiles/s':>9} {'speedup':>8}")
+    for row in rows:
+        print(f"{row['name']:<22} {row['parameters']:>10,} {row['iou']:>7.3f} {row['tiles_per_second']:>9.1f} "
+              f"{row['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distil the road model into narrower U-Nets and report IoU vs CPU throughput")
+    parser.add_argument("images", nargs="+", help="Scenes to sample tiles from")
+    parser.add_argument("--teacher", default="dl_model/models/save_best.h5")
+    parser.add_argument("--widths", type=float, nargs="+", default=[1.0, 0.5, 0.25])
+    parser.add_argument("--separable", action="store_true", help="Also distil a depthwise-separable student per width")
+    parser.add_argument("--tiles", type=int, default=1000)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--output", default="dl_model/models/distilled", help="Directory for student weights")
+    parser.add_argument("--json", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    # Throughput is reported for CPU inference, which is what the scan workers run
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+    from dl_model.architecture import load_model_weights
+
+    rows = compare_widths(load_model_weights(args.teacher), args.images, args.widths, args.separable, args.tiles,
+                          epochs=args.epochs, batch_size=args.batch_size, output_dir=args.output)
+    print_report(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
@@ -0,0 +1,362 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+
+import numpy as np
+import cv2
+
+from dl_model.compare import split_image_into_tiles, load_image, TilePredictor
+
+
+# A small SQLite file stands in for the shared work queue. Every host needs to
+# reach it (and the scene images) at the same path, e.g. over a network mount.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    image_path TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    unit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    tiles TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status, lease_expires);
+CREATE TABLE IF NOT EXISTS chunks (
+    unit_id INTEGER NOT NULL,
+    job_id INTEGER NOT NULL,
+    x_start INTEGER NOT NULL,
+    y_start INTEGER NOT NULL,
+    x_end INTEGER NOT NULL,
+    y_end INTEGER NOT NULL,
+    bits BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_job ON chunks (job_id);
+"""
+
+
+def connect_queue(queue_path):
+    conn = sqlite3.connect(queue_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def submit_scene(queue_path, image_path, tile_size=512, overlap=32, tiles_per_unit=8):
+    """
+    Split a scene's tile grid into work units and enqueue them.
+
+    Args:
+        queue_path: Path to the SQLite queue file
+        image_path: Path to the scene, readable by every worker
+        tile_size: Size of tiles for processing
+        overlap: Overlap between tiles
+        tiles_per_unit: Number of tiles leased to a worker at a time
+
+    Returns:
+        int: job id to pass to assemble_mask
+    """
+    image = cv2.imread(image_path)
+    if image is None:
+        raise ValueError(f"Could not read image: {image_path}")
+    height, width = image.shape[:2]
+
+    coords = []
+    for tile, x_start, y_start in split_image_into_tiles(image, tile_size, overlap):
+        coords.append((x_start, y_start, x_start + tile.shape[1], y_start + tile.shape[0]))
+
+    conn = connect_queue(queue_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.execute(
+            "INSERT INTO jobs (image_path, height, width, created_at) VALUES (?, ?, ?, ?)",
+            (image_path, height, width, time.time()),
+        )
+        job_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO units (job_id, tiles) VALUES (?, ?)",
+            [(job_id, json.dumps(coords[i:i + tiles_per_unit])) for i in range(0, len(coords), tiles_per_unit)],
+        )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    print(f"Submitted job {job_id}: {len(coords)} tiles for {os.path.basename(image_path)}")
+    return job_id
+
+
+def requeue_expired(queue_path, max_attempts=3):
+    """
+    Return units whose lease ran out (dead or stalled worker) to the queue.
+    Units that have already been tried max_attempts times are marked failed.
+
+    Returns:
+        tuple: (requeued_count, failed_count)
+    """
+    now = time.time()
+    conn = connect_queue(queue_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        failed = conn.execute(
+            "UPDATE units SET status = 'failed', worker = NULL, lease_expires = NULL "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, max_attempts),
+        ).rowcount
+        requeued = conn.execute(
+            "UPDATE units SET status = 'pending', worker = NULL, lease_expires = NULL "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,),
+        ).rowcount
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    if requeued or failed:
+        print(f"Requeued {requeued} expired units, {failed} failed after {max_attempts} attempts")
+    return requeued, failed
+
+
+def lease_unit(conn, worker_id, lease_seconds):
+    conn.execute("BEGIN IMMEDIATE")
+    row = conn.execute(
+        "SELECT u.unit_id, u.job_id, u.tiles, j.image_path FROM units u JOIN jobs j ON j.job_id = u.job_id "
+        "WHERE u.status = 'pending' ORDER BY u.unit_id LIMIT 1"
+    ).fetchone()
+    if row is None:
+        conn.execute("COMMIT")
+        return None
+
+    conn.execute(
+        "UPDATE units SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+        "WHERE unit_id = ?",
+        (worker_id, time.time() + lease_seconds, row[0]),
+    )
+    conn.execute("COMMIT")
+    return row[0], row[1], json.loads(row[2]), row[3]
+
+
+def _extend_lease(conn, unit_id, worker_id, lease_seconds):
+    cursor = conn.execute(
+        "UPDATE units SET lease_expires = ? WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+        (time.time() + lease_seconds, unit_id, worker_id),
+    )
+    return cursor.rowcount == 1
+
+
+def _complete_unit(conn, unit_id, job_id, worker_id, chunks):
+    """
+    Upload a unit's packed mask chunks and mark it done, but only if this
+    worker still holds the lease. A worker whose lease expired and was
+    reassigned has its results discarded.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    owned = conn.execute(
+        "SELECT 1 FROM units WHERE unit_id = ? AND worker = ? AND status = 'leased'",
+        (unit_id, worker_id),
+    ).fetchone()
+    if not owned:
+        conn.execute("ROLLBACK")
+        return False
+
+    conn.execute("DELETE FROM chunks WHERE unit_id = ?", (unit_id,))
+    conn.executemany(
+        "INSERT INTO chunks (unit_id, job_id, x_start, y_start, x_end, y_end, bits) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(unit_id, job_id) + chunk for chunk in chunks],
+    )
+    conn.execute(
+        "UPDATE units SET status = 'done', lease_expires = NULL WHERE unit_id = ?",
+        (unit_id,),
+    )
+    conn.execute("COMMIT")
+    return True
+
+
+def _fail_job(conn, unit_id, job_id, worker_id):
+    """
+    Mark a job's pending units, and the unit this worker holds, failed: the
+    scene cannot be read, so no other worker should lease them either.
+
+    Returns:
+        int: number of units marked failed
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    failed = conn.execute(
+        "UPDATE units SET status = 'failed', worker = NULL, lease_expires = NULL "
+        "WHERE job_id = ? AND (status = 'pending' OR (unit_id = ? AND worker = ? AND status = 'leased'))",
+        (job_id, unit_id, worker_id),
+    ).rowcount
+    conn.execute("COMMIT")
+    return failed
+
+
+def run_worker(queue_path, model_path, worker_id=None, lease_seconds=120, idle_exit=True, poll_interval=5):
+    """
+    Pull work units from the queue until it is empty, infer their tiles and
+    upload bit-packed mask chunks.
+
+    Args:
+        queue_path: Path to the SQLite queue file
+        model_path: Path to the model weights
+        worker_id: Identifier recorded on leased units (default: host:pid)
+        lease_seconds: How long a unit stays leased without a heartbeat
+        idle_exit: Return when no pending units are left instead of polling
+        poll_interval: Seconds to wait between polls when idle_exit is False
+
+    Returns:
+        int: number of units completed by this worker
+    """
+    from dl_model.architecture import load_model_weights
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    model = load_model_weights(model_path)
+    predictor = TilePredictor(model)
+    conn = connect_queue(queue_path)
+
+    image_cache = {}
+    completed = 0
+    try:
+        while True:
+            unit = lease_unit(conn, worker_id, lease_seconds)
+            if unit is None:
+                if idle_exit:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            unit_id, job_id, tiles, image_path = unit
+            if image_path not in image_cache:
+                # Keep only the current scene decoded
+                image_cache.clear()
+                try:
+                    image_cache[image_path] = load_image(image_path)
+                except ValueError as e:
+                    failed = _fail_job(conn, unit_id, job_id, worker_id)
+                    print(f"[!] [{worker_id}] {e}; marked {failed} units of job {job_id} failed")
+                    continue
+            image = image_cache[image_path]
+
+            chunks = []
+            lost = False
+            for x_start, y_start, x_end, y_end in tiles:
+                mask = predictor.predict_masks([image[y_start:y_end, x_start:x_end]])[0]
+                mask = mask[:y_end - y_start, :x_end - x_start]
+                chunks.append((x_start, y_start, x_end, y_end, np.packbits(mask.astype(bool)).tobytes()))
+
+                if not _extend_lease(conn, unit_id, worker_id, lease_seconds):
+                    lost = True
+                    break
+
+            if not lost and _complete_unit(conn, unit_id, job_id, worker_id, chunks):
+                completed += 1
+                print(f"[{worker_id}] Completed unit {unit_id} of job {job_id}")
+            else:
+                print(f"[{worker_id}] Lost lease on unit {unit_id}, discarding results")
+    finally:
+        conn.close()
+
+    return completed
+
+
+def job_progress(queue_path, job_id):
+    conn = connect_queue(queue_path)
+    try:
+        rows = conn.execute(
+            "SELECT status, COUNT(*) FROM units WHERE job_id = ? GROUP BY status", (job_id,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return dict(rows)
+
+
+def assemble_mask(queue_path, job_id, max_attempts=3, poll_interval=5, timeout=None):
+    """
+    Wait for every unit of a job to finish, reclaiming expired leases while
+    waiting, and stitch the uploaded chunks into the full mask.
+
+    Returns:
+        numpy.ndarray: (height, width, 1) uint8 mask, as process_large_image
+
+    Raises:
+        RuntimeError: if a unit failed (its scene could not be read or it
+            exhausted its retries) or the timeout passed
+    """
+    deadline = time.time() + timeout if timeout else None
+
+    while True:
+        requeue_expired(queue_path, max_attempts)
+        progress = job_progress(queue_path, job_id)
+        if progress.get("failed"):
+            raise RuntimeError(f"Job {job_id}: {progress['failed']} units failed (unreadable scene, "
+                               f"or {max_attempts} attempts used up)")
+        if not progress.get("pending") and not progress.get("leased"):
+            break
+        if deadline and time.time() > deadline:
+            raise RuntimeError(f"Job {job_id} did not finish in time: {progress}")
+        time.sleep(poll_interval)
+
+    conn = connect_queue(queue_path)
+    try:
+        height, width = conn.execute(
+            "SELECT height, width FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        full_mask = np.zeros((height, width, 1), dtype=np.uint8)
+
+        for x_start, y_start, x_end, y_end, bits in conn.execute(
+            "SELECT x_start, y_start, x_end, y_end, bits FROM chunks WHERE job_id = ?", (job_id,)
+        ):
+            h, w = y_end - y_start, x_end - x_start
+            mask = np.unpackbits(np.frombuffer(bits, dtype=np.uint8), count=h * w).reshape(h, w)
+            region = full_mask[y_start:y_end, x_start:x_end, 0]
+            np.maximum(region, mask, out=region)
+    finally:
+        conn.close()
+
+    return full_mask
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shard road extraction across hosts via a shared SQLite queue")
+    parser.add_argument("queue", help="Path to the SQLite queue file")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", help="Enqueue a scene")
+    submit.add_argument("image")
+    submit.add_argument("--tile-size", type=int, default=512)
+    submit.add_argument("--overlap", type=int, default=32)
+    submit.add_argument("--tiles-per-unit", type=int, default=8)
+
+    worker = sub.add_parser("worker", help="Process units until the queue is empty")
+    worker.add_argument("--model", default="dl_model/models/save_best.h5")
+    worker.add_argument("--lease-seconds", type=int, default=120)
+    worker.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+
+    assemble = sub.add_parser("assemble", help="Wait for a job and write its mask")
+    assemble.add_argument("job_id", type=int)
+    assemble.add_argument("output")
+    assemble.add_argument("--max-attempts", type=int, default=3)
+
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        submit_scene(args.queue, args.image, args.tile_size, args.overlap, args.tiles_per_unit)
+    elif args.command == "worker":
+        run_worker(args.queue, args.model, lease_seconds=args.lease_seconds, idle_exit=not args.forever)
+    else:
+        full_mask = assemble_mask(args.queue, args.job_id, args.max_attempts)
+        cv2.imwrite(args.output, full_mask * 255)
+        print(f"Mask for job {args.job_id} saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
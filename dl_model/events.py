@@ -0,0 +1,180 @@
+import zlib
+from pathlib import Path
+
+import numpy as np
+import cv2
+import mysql.connector
+
+
+# Every comparison is stored as a typed row in change_events. A per-location
+# row in location_change_summary is updated in the same transaction, so
+# dashboard aggregates never scan the events. A comparison's change heatmap
+# (see compare.change_heatmap) goes in change_heatmaps, and a significant
+# change raises a notification linked to its event, also in that transaction.
+
+INSERT_EVENT = """
+INSERT INTO change_events (
+    location, image1_path, image2_path, old_road_pixels, new_road_pixels,
+    change_percentage, is_significant, old_road_components, new_road_components,
+    result_path, probability_dir, latitude, longitude
+)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+        COALESCE(%s, (SELECT l.latitude FROM locations l WHERE l.name = %s)),
+        COALESCE(%s, (SELECT l.longitude FROM locations l WHERE l.name = %s)))
+"""
+
+UPSERT_SUMMARY = """
+INSERT INTO location_change_summary (
+    location, event_count, significant_count, new_road_pixels_total,
+    max_change_percentage, last_change_percentage, last_event_id, last_detected_at
+)
+VALUES (%s, 1, %s, %s, %s, %s, %s, NOW())
+ON DUPLICATE KEY UPDATE
+    event_count = event_count + 1,
+    significant_count = significant_count + VALUES(significant_count),
+    new_road_pixels_total = new_road_pixels_total + VALUES(new_road_pixels_total),
+    max_change_percentage = GREATEST(max_change_percentage, VALUES(max_change_percentage)),
+    last_change_percentage = VALUES(last_change_percentage),
+    last_event_id = VALUES(last_event_id),
+    last_detected_at = VALUES(last_detected_at)
+"""
+
+
+INSERT_NOTIFICATION = """
+INSERT INTO notifications (id, title, message, date, location, latitude, longitude, change_event_id)
+SELECT %s, %s, %s, detected_at, location, latitude, longitude, id FROM change_events WHERE id = %s
+"""
+
+
+INSERT_HEATMAP = """
+INSERT INTO change_heatmaps (event_id, cell_size, height, width, grid_rows, grid_cols, counts)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def encode_heatmap(heatmap):
+    """
+    Compact form of a ChangeHeatmap for change_heatmaps.counts: old-road then
+    new-road counts, row-major, little-endian uint16 (uint32 for cells over
+    255 pixels wide, whose counts can overflow 16 bits), zlib-compressed.
+    """
+    dtype = "<u2" if heatmap.cell_size ** 2 <= 0xFFFF else "<u4"
+    return zlib.compress(np.stack([heatmap.old_roads, heatmap.new_roads]).astype(dtype).tobytes())
+
+
+def count_components(mask):
+    """
+    Number of 8-connected road segments in a boolean mask.
+    """
+    count, _ = cv2.connectedComponents(mask.astype(np.uint8), connectivity=8)
+    return count - 1
+
+
+def summarize_road_changes(old_roads, new_roads, threshold=15):
+    """
+    Typed statistics for one comparison, computed the same way as
+    detect_significant_road_changes.
+
+    Returns:
+        dict: old/new road pixels and components, change_percentage, is_significant
+    """
+    old_road_pixels = int(np.count_nonzero(old_roads))
+    new_road_pixels = int(np.count_nonzero(new_roads))
+
+    if old_road_pixels > 0:
+        change_percentage = (new_road_pixels / old_road_pixels) * 100
+    else:
+        change_percentage = 100 if new_road_pixels > 0 else 0
+
+    return {
+        "old_road_pixels": old_road_pixels,
+        "new_road_pixels": new_road_pixels,
+        "change_percentage": float(change_percentage),
+        "is_significant": change_percentage > threshold,
+        "old_road_components": count_components(old_roads),
+        "new_road_components": count_components(new_roads),
+    }
+
+
+def record_change_event(location, image1_path, image2_path, stats, result_path=None, probability_dir=None,
+                        latitude=None, longitude=None, heatmap=None):
+    """
+    Store one comparison and fold it into its location's summary row. A
+    significant change also gets a notification pointing at the event.
+
+    Args:
+        location: Location name the image pair covers
+        image1_path: Path to the earlier image
+        image2_path: Path to the later image
+        stats: Output of summarize_road_changes
+        result_path: Path to the saved change overlay
+        probability_dir: Directory holding the saved probability maps, if any
+        latitude, longitude: Position of the change; defaults to the location's
+            coordinates. The geohash key is filled in by a trigger.
+        heatmap: Output of compare.change_heatmap, stored with the event
+
+    Returns:
+        int or None: id of the new change_events row, or None on database error
+    """
+    try:
+        conn = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            password="root",
+            database="change_detection"
+        )
+    except mysql.connector.Error as e:
+        print(f"Database error: {e}")
+        return None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(INSERT_EVENT, (
+            location,
+            str(image1_path),
+            str(image2_path),
+            stats["old_road_pixels"],
+            stats["new_road_pixels"],
+            stats["change_percentage"],
+            bool(stats["is_significant"]),
+            stats["old_road_components"],
+            stats["new_road_components"],
+            result_path,
+            probability_dir,
+            latitude,
+            location,
+            longitude,
+            location,
+        ))
+        event_id = cursor.lastrowid
+
+        if heatmap is not None:
+            rows, cols = heatmap.old_roads.shape
+            cursor.execute(INSERT_HEATMAP, (event_id, heatmap.cell_size, heatmap.height, heatmap.width,
+                                            rows, cols, encode_heatmap(heatmap)))
+
+        if stats["is_significant"]:
+            message = (f"Significant road changes detected between {Path(image1_path).stem} and "
+                       f"{Path(image2_path).stem} ({stats['change_percentage']:.1f}%).")
+            cursor.execute(INSERT_NOTIFICATION, (f"change-{event_id}", "Road Change Alert", message, event_id))
+
+        cursor.execute(UPSERT_SUMMARY, (
+            location,
+            int(bool(stats["is_significant"])),
+            stats["new_road_pixels"],
+            stats["change_percentage"],
+            stats["change_percentage"],
+            event_id,
+        ))
+
+        conn.commit()
+        cursor.close()
+        return event_id
+
+    except mysql.connector.Error as e:
+        conn.rollback()
+        print(f"Database error: {e}")
+        return None
+
+    finally:
+        conn.close()
@@ -0,0 +1,416 @@
+import os
+import threading
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import cv2
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+except ImportError:
+    rasterio = None
+
+
+# Fine-tunes architecture.unet on new regions straight from large scene/mask
+# pairs, without cutting a tile dataset to disk:
+#
+#   python -m dl_model.finetune scenes/a.tif:masks/a.tif scenes/b.jpg:masks/b.png \
+#       --weights dl_model/models/save_best.h5 --output dl_model/models/finetuned.weights.h5
+#
+# GeoTIFF scenes are read by window through rasterio (dl_model/requirements.txt):
+# only the (tiled) blocks a window overlaps are decoded, and nothing is
+# copied. JPEG/PNG scenes cannot be read by window, so they are decoded into
+# RAM on first use (opening one reads only its header), at most memory_limit
+# bytes of decoded scenes at a time, and the sampler
+# takes several windows from a scene per visit so they are not re-decoded for
+# every window. Decoded scenes can also be kept on disk between runs
+# (cache_dir), but that is opt-in: an uncompressed scene is height x width x 4
+# bytes with its mask, about 10x a JPEG, so cache_limit bounds the directory.
+# Windows are kept in a small in-memory cache and each reused a few times
+# under different augmentations, and a tf.data pipeline reads, augments and
+# prefetches them in parallel with training.
+
+MODEL_INPUT = 256
+GEOTIFF_EXTENSIONS = (".tif", ".tiff")
+
+Scene = namedtuple("Scene", ["name", "image", "mask"])
+
+_disk_lock = threading.Lock()
+
+
+def _header_shape(path, kind):
+    # Pillow (a matplotlib dependency) reads the size from the header alone
+    from PIL import Image
+
+    with Image.open(path) as image:
+        width, height = image.size
+    return (height, width) if kind == "mask" else (height, width, 3)
+
+
+def _decode(path, kind):
+    if kind == "mask":
+        decoded = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if decoded is None:
+            raise ValueError(f"Could not read mask: {path}")
+        return (decoded > 127).astype(np.uint8)
+    from dl_model.compare import load_image
+    return load_image(path)
+
+
+class ArraySource:
+    """
+    Windows of an in-memory or memory-mapped array.
+    """
+
+    def __init__(self, array):
+        self.array = array
+        self.shape = array.shape
+
+    def read(self, y, x, size):
+        return np.array(self.array[y:y + size, x:x + size])
+
+
+class RasterSource:
+    """
+    Windowed reads from a GeoTIFF (8-bit RGB scene or single-band mask): only
+    the blocks a window overlaps are decoded, so tiled files read fastest.
+    """
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        with rasterio.open(path) as src:
+            self.shape = (src.height, src.width) if kind == "mask" else (src.height, src.width, 3)
+
+    def read(self, y, x, size):
+        # Datasets are not thread-safe, so each read opens its own
+        with rasterio.open(self.path) as src:
+            if self.kind == "mask":
+                return (src.read(1, window=Window(x, y, size, size)) > 127).astype(np.uint8)
+            return np.ascontiguousarray(src.read([1, 2, 3], window=Window(x, y, size, size)).transpose(1, 2, 0))
+
+
+class DecodeCache:
+    """
+    Decoded JPEG/PNG scenes and masks kept in RAM, least recently used first
+    out once they exceed max_bytes (the most recent one is always kept).
+    Thread-safe; concurrent requests for one file decode it once.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._arrays = OrderedDict()
+        self._loading = {}
+        self.decodes = 0
+
+    def _cached(self, key):
+        array = self._arrays.get(key)
+        if array is not None:
+            self._arrays.move_to_end(key)
+        return array
+
+    def get(self, path, kind):
+        key = (path, kind)
+        with self._lock:
+            array = self._cached(key)
+            if array is not None:
+                return array
+            loading = self._loading.setdefault(key, threading.Lock())
+
+        with loading:
+            with self._lock:
+                array = self._cached(key)
+            if array is not None:
+                return array
+            array = _decode(path, kind)
+            with self._lock:
+                self._arrays[key] = array
+                self._loading.pop(key, None)
+                self.decodes += 1
+                used = sum(cached.nbytes for cached in self._arrays.values())
+                while used > self.max_bytes and len(self._arrays) > 1:
+                    used -= self._arrays.popitem(last=False)[1].nbytes
+            return array
+
+    def discard(self, path, kind):
+        with self._lock:
+            self._arrays.pop((path, kind), None)
+
+
+class DecodedSource:
+    """
+    Windows of a JPEG/PNG file, decoded through a DecodeCache when needed.
+    """
+
+    def __init__(self, path, kind, cache, shape):
+        self.path = path
+        self.kind = kind
+        self.cache = cache
+        self.shape = shape
+
+    def read(self, y, x, size):
+        return np.array(self.cache.get(self.path, self.kind)[y:y + size, x:x + size])
+
+
+def _cache_path(path, cache_dir, kind):
+    stat = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}_{kind}_{stat.st_size:x}_{int(stat.st_mtime):x}.npy")
+
+
+def _make_room(cache_dir, nbytes, cache_limit):
+    # Evict the least recently used decodes until nbytes more fit under cache_limit
+    if cache_limit is None:
+        return True
+    if nbytes > cache_limit:
+        return False
+    entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                     for entry in os.scandir(cache_dir) if entry.name.endswith(".npy"))
+    used = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if used + nbytes <= cache_limit:
+            break
+        os.remove(path)  # already-open memory maps of it stay valid
+        used -= size
+        print(f"[+] Evicted {path} to stay under the cache limit")
+    return used + nbytes <= cache_limit
+
+
+def open_source(path, kind, decode_cache, cache_dir=None, cache_limit=None):
+    """
+    Windowed reader for a scene (kind "image", RGB) or mask ("mask", 0/1):
+    a RasterSource for GeoTIFFs when rasterio is installed, else a
+    DecodedSource that decodes the file into decode_cache on first read.
+    With cache_dir, the decode is instead made now and saved there as an
+    uncompressed .npy (evicting older ones beyond cache_limit bytes), and
+    memory-mapped on later runs.
+    """
+    if rasterio is not None and path.lower().endswith(GEOTIFF_EXTENSIONS):
+        return RasterSource(path, kind)
+
+    if not cache_dir:
+        return DecodedSource(path, kind, decode_cache, _header_shape(path, kind))
+
+    cached = _cache_path(path, cache_dir, kind)
+    if os.path.exists(cached):
+        os.utime(cached)  # recency for eviction
+        return ArraySource(np.load(cached, mmap_mode="r"))
+
+    decoded = decode_cache.get(path, kind)
+    with _disk_lock:
+        if _make_room(cache_dir, decoded.nbytes, cache_limit):
+            partial = cached + ".partial"
+            np.save(partial, decoded)
+            os.replace(partial + ".npy", cached)
+            print(f"[+] Decoded {path} into {cached}")
+            decode_cache.discard(path, kind)
+            return ArraySource(np.load(cached, mmap_mode="r"))
+    print(f"[!] {path} does not fit the {cache_limit / 2**30:.1f} GB decode cache; keeping it in RAM only")
+    return DecodedSource(path, kind, decode_cache, decoded.shape)
+
+
+def open_scene(image_path, mask_path, decode_cache, cache_dir=None, cache_limit=None):
+    image = open_source(image_path, "image", decode_cache, cache_dir, cache_limit)
+    mask = open_source(mask_path, "mask", decode_cache, cache_dir, cache_limit)
+    if image.shape[:2] != mask.shape:
+        raise ValueError(f"{mask_path} is {mask.shape[1]}x{mask.shape[0]}, "
+                         f"{image_path} is {image.shape[1]}x{image.shape[0]}")
+    return Scene(os.path.basename(image_path), image, mask)
+
+
+def open_scenes(pairs, decode_cache, cache_dir=None, cache_limit=None, workers=4):
+    """
+    Open (image path, mask path) pairs in parallel.
+
+    Returns:
+        list: Scene tuples whose image and mask are windowed readers
+    """
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda pair: open_scene(pair[0], pair[1], decode_cache, cache_dir, cache_limit), pairs))
+
+
+class WindowSampler:
+    """
+    Draws random (image, mask) windows from scenes, scenes weighted by area.
+    Each visit to a scene reads windows_per_visit windows from it before the
+    next scene is drawn, so a scene decoded into RAM serves several windows.
+    Each window read is kept in a cache of cache_size slots and served `reuse`
+    times (the pipeline augments every serving differently) before its slot is
+    refilled, so reads are 1/reuse of the samples. Thread-safe, for tf.data's
+    parallel map.
+    """
+
+    def __init__(self, scenes, window_size=MODEL_INPUT, cache_size=256, reuse=4, windows_per_visit=16, seed=0):
+        for scene in scenes:
+            if min(scene.mask.shape) < window_size:
+                raise ValueError(f"{scene.name} is smaller than a {window_size}px window")
+        self.scenes = scenes
+        self.window_size = window_size
+        self.reuse = reuse
+        self.windows_per_visit = windows_per_visit
+        areas = np.array([np.prod(scene.mask.shape) for scene in scenes], dtype=np.float64)
+        self._weights = areas / areas.sum()
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._cache = [None] * cache_size
+        self._remaining = np.zeros(cache_size, dtype=np.int64)
+        self._visit_scene = 0
+        self._visit_left = 0
+        self.reads = 0
+
+    def _read(self, scene_index, y, x):
+        scene = self.scenes[scene_index]
+        size = self.window_size
+        image = scene.image.read(y, x, size)
+        mask = scene.mask.read(y, x, size)
+        if size != MODEL_INPUT:
+            image = cv2.resize(image, (MODEL_INPUT, MODEL_INPUT), interpolation=cv2.INTER_AREA)
+            mask = cv2.resize(mask, (MODEL_INPUT, MODEL_INPUT), interpolation=cv2.INTER_NEAREST)
+        return image, mask[:, :, np.newaxis]
+
+    def sample(self):
+        """
+        Returns:
+            tuple: uint8 image (256, 256, 3) and 0/1 uint8 mask (256, 256, 1)
+        """
+        with self._lock:
+            slot = int(self._rng.integers(len(self._cache)))
+            if self._remaining[slot] > 0:
+                self._remaining[slot] -= 1
+                return self._cache[slot]
+            if self._visit_left == 0:
+                self._visit_scene = int(self._rng.choice(len(self.scenes), p=self._weights))
+                self._visit_left = self.windows_per_visit
+            self._visit_left -= 1
+            scene_index = self._visit_scene
+            height, width = self.scenes[scene_index].mask.shape
+            y = int(self._rng.integers(0, height - self.window_size + 1))
+            x = int(self._rng.integers(0, width - self.window_size + 1))
+
+        # Read outside the lock so parallel calls overlap their I/O
+        window = self._read(scene_index, y, x)
+        with self._lock:
+            self._cache[slot] = window
+            self._remaining[slot] = self.reuse - 1
+            self.reads += 1
+        return window
+
+
+def augment(image, mask):
+    """
+    Random flips, quarter turns and brightness/contrast jitter (image only).
+    Takes and returns float32 tensors in [0, 1].
+    """
+    import tensorflow as tf
+
+    stacked = tf.concat([image, mask], axis=-1)
+    stacked = tf.image.random_flip_left_right(stacked)
+    stacked = tf.image.random_flip_up_down(stacked)
+    stacked = tf.image.rot90(stacked, k=tf.random.uniform([], 0, 4, dtype=tf.int32))
+    image, mask = stacked[:, :, :3], stacked[:, :, 3:]
+
+    image = tf.image.random_brightness(image, 0.1)
+    image = tf.image.random_contrast(image, 0.8, 1.2)
+    return tf.clip_by_value(image, 0.0, 1.0), mask
+
+
+def make_dataset(sampler, batch_size=16, augmentation=True):
+    """
+    Endless tf.data pipeline of (image, mask) batches drawn from sampler:
+    windows are read and augmented by parallel map calls and prefetched.
+    """
+    import tensorflow as tf
+
+    def read(_):
+        image, mask = tf.numpy_function(sampler.sample, [], (tf.uint8, tf.uint8))
+        image.set_shape((MODEL_INPUT, MODEL_INPUT, 3))
+        mask.set_shape((MODEL_INPUT, MODEL_INPUT, 1))
+        return tf.cast(image, tf.float32) / 255.0, tf.cast(mask, tf.float32)
+
+    dataset = tf.data.Dataset.range(1).repeat()
+    dataset = dataset.map(read, num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+    if augmentation:
+        dataset = dataset.map(augment, num_parallel_calls=tf.data.AUTOTUNE, deterministic=False)
+    return dataset.batch(batch_size, drop_remainder=True).prefetch(tf.data.AUTOTUNE)
+
+
+def fine_tune(pairs, output_path, weights=None, epochs=10, steps_per_epoch=200, batch_size=16, learning_rate=1e-4,
+              window_size=MODEL_INPUT, memory_limit=2 * 2**30, cache_dir=None, cache_limit=20 * 2**30,
+              cache_size=256, reuse=4, windows_per_visit=16, width=1.0, separable=False, workers=4, seed=0):
+    """
+    Fine-tune the road model on scene/mask pairs and save its weights.
+
+    Args:
+        pairs: (image path, mask path) tuples; masks are grayscale, road > 127
+        output_path: Where to save the weights (must end in .weights.h5)
+        weights: Weights to start from (e.g. save_best.h5); None trains from scratch
+        window_size: Scene pixels per sample, resized to the model's 256x256
+        memory_limit: Bytes of decoded JPEG/PNG scenes kept in RAM (see DecodeCache)
+        cache_dir: If given, JPEG/PNG decodes are also kept there between runs,
+            uncompressed (about 10x a JPEG's size), up to cache_limit bytes
+        cache_size, reuse, windows_per_visit: Window sampling (see WindowSampler)
+        width, separable: Architecture (see architecture.unet)
+
+    Returns:
+        The Keras training history
+    """
+    import tensorflow as tf
+    from dl_model.architecture import unet, load_model_weights
+
+    tf.keras.utils.set_random_seed(seed)
+    decode_cache = DecodeCache(memory_limit)
+    scenes = open_scenes(pairs, decode_cache, cache_dir, cache_limit, workers)
+    print(f"[+] {len(scenes)} scenes, {sum(np.prod(scene.mask.shape) for scene in scenes) / 1e6:.0f} Mpx")
+
+    sampler = WindowSampler(scenes, window_size, cache_size, reuse, windows_per_visit, seed)
+    dataset = make_dataset(sampler, batch_size)
+
+    if weights:
+        model = load_model_weights(weights, width, separable)
+    else:
+        model = unet(input_shape=(MODEL_INPUT, MODEL_INPUT, 3), output_layer=1, width=width, separable=separable)
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate), loss="binary_crossentropy",
+                  metrics=[tf.keras.metrics.BinaryIoU(target_class_ids=[1], name="iou")])
+
+    history = model.fit(dataset, epochs=epochs, steps_per_epoch=steps_per_epoch, verbose=2)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    model.save_weights(output_path)
+    print(f"[+] Saved weights to {output_path} ({sampler.reads} window reads and {decode_cache.decodes} "
+          f"scene decodes for {epochs * steps_per_epoch * batch_size} training samples, including prefetch)")
+    return history
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fine-tune the road model on large scene/mask pairs")
+    parser.add_argument("pairs", nargs="+", help="IMAGE:MASK path pairs")
+    parser.add_argument("--output", required=True, help="Weights file to write (*.weights.h5)")
+    parser.add_argument("--weights", default="dl_model/models/save_best.h5", help="Starting weights ('' for none)")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=200, help="Batches per epoch")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--learning-rate", type=float, default=1e-4)
+    parser.add_argument("--window", type=int, default=MODEL_INPUT, help="Scene pixels per sample")
+    parser.add_argument("--memory-limit-gb", type=float, default=2.0, help="Decoded JPEG/PNG scenes kept in RAM")
+    parser.add_argument("--cache-dir", help="Keep uncompressed JPEG/PNG decodes here between runs "
+                                            "(about 10x the JPEG size on disk)")
+    parser.add_argument("--cache-limit-gb", type=float, default=20.0, help="Size limit of --cache-dir")
+    parser.add_argument("--cache-size", type=int, default=256, help="Windows kept in memory")
+    parser.add_argument("--reuse", type=int, default=4, help="Servings per cached window")
+    parser.add_argument("--windows-per-visit", type=int, default=16, help="Windows read per scene visit")
+    parser.add_argument("--width", type=float, default=1.0)
+    parser.add_argument("--separable", action="store_true")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel scene decodes")
+    args = parser.parse_args()
+
+    fine_tune([tuple(pair.rsplit(":", 1)) for pair in args.pairs], args.output, args.weights or None, args.epochs,
+              args.steps, args.batch_size, args.learning_rate, args.window, int(args.memory_limit_gb * 2**30),
+              args.cache_dir, int(args.cache_limit_gb * 2**30), args.cache_size, args.reuse, args.windows_per_visit,
+              args.width, args.separable, args.workers)
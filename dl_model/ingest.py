@@ -0,0 +1,319 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+from datetime import datetime
+
+
+# New captures are dropped as <drop_dir>/<location>/<date>.<ext>, e.g.
+# dl_model/images/hyderabad/2025.jpg. Files directly in <drop_dir> (such as
+# dl_model/images/2022.jpg) belong to DEFAULT_LOCATION.
+
+DEFAULT_LOCATION = "default"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff"}
+DATE_PATTERN = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    image_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    location TEXT NOT NULL,
+    epoch TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    registered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS images_location ON images (location, epoch);
+CREATE TABLE IF NOT EXISTS comparisons (
+    comparison_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    old_image_id INTEGER NOT NULL,
+    new_image_id INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    change_percentage REAL,
+    result_path TEXT,
+    error TEXT,
+    UNIQUE (old_image_id, new_image_id)
+);
+CREATE TABLE IF NOT EXISTS seen_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT
+);
+"""
+
+
+def connect_registry(registry_path):
+    conn = sqlite3.connect(registry_path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _epoch_for(path, mtime):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if DATE_PATTERN.match(stem):
+        return stem
+    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d")
+
+
+def scan_drop_dir(drop_dir):
+    """
+    List candidate images with their stat signature.
+
+    Returns:
+        dict: path -> (location, size, mtime_ns)
+    """
+    found = {}
+
+    def add(entry, location):
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                return  # removed while scanning
+            found[entry.path] = (location, stat.st_size, stat.st_mtime_ns)
+
+    for entry in os.scandir(drop_dir):
+        if entry.is_dir():
+            try:
+                for sub in os.scandir(entry.path):
+                    add(sub, entry.name)
+            except FileNotFoundError:
+                continue
+        else:
+            add(entry, DEFAULT_LOCATION)
+    return found
+
+
+def register_image(conn, path, location, size, mtime_ns):
+    """
+    Hash a settled file and register it as a new epoch of its location,
+    scheduling a comparison against the latest earlier epoch. An epoch that
+    arrives after a later one is also compared into the next epoch, and a
+    still-pending comparison across it is marked 'superseded'.
+
+    Returns:
+        int or None: the new image id, or None if the content is already known
+    """
+    sha256 = file_sha256(path)
+    conn.execute(
+        "INSERT OR REPLACE INTO seen_files (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)",
+        (path, size, mtime_ns, sha256),
+    )
+
+    existing = conn.execute("SELECT path FROM images WHERE sha256 = ?", (sha256,)).fetchone()
+    if existing:
+        conn.commit()
+        print(f"Skipping {path}: same content as {existing[0]}")
+        return None
+
+    epoch = _epoch_for(path, mtime_ns / 1e9)
+    cursor = conn.execute(
+        "INSERT INTO images (location, epoch, path, sha256, size, registered_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (location, epoch, path, sha256, size, time.time()),
+    )
+    image_id = cursor.lastrowid
+
+    previous = conn.execute(
+        "SELECT image_id, epoch FROM images WHERE location = ? AND epoch < ? ORDER BY epoch DESC LIMIT 1",
+        (location, epoch),
+    ).fetchone()
+    following = conn.execute(
+        "SELECT image_id, epoch FROM images WHERE location = ? AND epoch > ? ORDER BY epoch LIMIT 1",
+        (location, epoch),
+    ).fetchone()
+
+    if previous:
+        conn.execute(
+            "INSERT OR IGNORE INTO comparisons (old_image_id, new_image_id) VALUES (?, ?)",
+            (previous[0], image_id),
+        )
+        print(f"Registered {location}/{epoch}; scheduled comparison against {previous[1]}")
+    else:
+        print(f"Registered {location}/{epoch} as first epoch")
+
+    if following:
+        # A late capture sits between two known epochs: compare the later one against
+        # it instead. A comparison across it that already ran is kept as history.
+        conn.execute(
+            "INSERT OR IGNORE INTO comparisons (old_image_id, new_image_id) VALUES (?, ?)",
+            (image_id, following[0]),
+        )
+        if previous:
+            conn.execute(
+                "UPDATE comparisons SET status = 'superseded' "
+                "WHERE old_image_id = ? AND new_image_id = ? AND status = 'pending'",
+                (previous[0], following[0]),
+            )
+        print(f"{location}/{epoch} arrived out of order; scheduled {following[1]} against it")
+
+    conn.commit()
+    return image_id
+
+
+def ingest_once(conn, drop_dir, pending, settle_seconds=5.0):
+    """
+    One polling pass. A file is registered only once its size and mtime have
+    stayed the same for settle_seconds, so partially written captures are
+    never read. `pending` carries the debounce state between passes.
+
+    Returns:
+        list: ids of newly registered images
+    """
+    now = time.monotonic()
+    registered = []
+
+    # Sorted so that epochs arriving in the same pass register oldest first
+    for path, (location, size, mtime_ns) in sorted(scan_drop_dir(drop_dir).items()):
+        seen = conn.execute("SELECT size, mtime_ns FROM seen_files WHERE path = ?", (path,)).fetchone()
+        if seen == (size, mtime_ns):
+            pending.pop(path, None)
+            continue
+
+        signature = (size, mtime_ns)
+        first_seen = pending.get(path)
+        if first_seen is None or first_seen[0] != signature:
+            pending[path] = (signature, now)
+            continue
+        if now - first_seen[1] < settle_seconds:
+            continue
+
+        del pending[path]
+        try:
+            image_id = register_image(conn, path, location, size, mtime_ns)
+        except FileNotFoundError:
+            # Removed between the scan and hashing; nothing was recorded for it
+            conn.rollback()
+            print(f"[!] {path} disappeared before it could be registered")
+            continue
+        if image_id is not None:
+            registered.append(image_id)
+
+    return registered
+
+
+def start_comparison(image1_path, image2_path, location=None):
+    """
+    Default comparison job: the notification pipeline. Runs the comparison,
+    queues its result image and returns a finish() that waits for the image,
+    records the change event, notifies on a significant change and returns
+    (change_percentage, result_path).
+    """
+    from dl_model.notification import start_road_change_detection, add_significant_change_to_database
+
+    finish_detection = start_road_change_detection(image1_path, image2_path, location=location)
+
+    def finish():
+        is_significant, change_percentage, result_path = finish_detection()
+        if is_significant:
+            add_significant_change_to_database(is_significant, change_percentage, image1_path, image2_path,
+                                               result_path)
+        return change_percentage, result_path
+
+    return finish
+
+
+def _record_failure(conn, comparison_id, old_path, new_path, error):
+    print(f"[!] Comparison {old_path} -> {new_path} failed: {error}")
+    conn.execute(
+        "UPDATE comparisons SET status = 'failed', error = ? WHERE comparison_id = ?",
+        (str(error), comparison_id),
+    )
+    conn.commit()
+
+
+def _finish_comparison(conn, comparison_id, old_path, new_path, finish):
+    try:
+        change_percentage, result_path = finish()
+    except Exception as e:
+        _record_failure(conn, comparison_id, old_path, new_path, e)
+        return
+    conn.execute(
+        "UPDATE comparisons SET status = 'done', change_percentage = ?, result_path = ? WHERE comparison_id = ?",
+        (float(change_percentage), result_path, comparison_id),
+    )
+    conn.commit()
+
+
+def run_pending_comparisons(conn, runner=start_comparison):
+    """
+    Run every scheduled comparison exactly once, recording its outcome.
+
+    runner(old_path, new_path, location) does the comparison and returns a
+    finish() that publishes it and returns (change_percentage, result_path).
+    Each comparison is finished after the next one has run, so its result
+    artifacts are encoded while the next scenes are inferred.
+
+    Returns:
+        int: number of comparisons run
+    """
+    jobs = conn.execute(
+        "SELECT c.comparison_id, old.path, new.path, new.location FROM comparisons c "
+        "JOIN images old ON old.image_id = c.old_image_id "
+        "JOIN images new ON new.image_id = c.new_image_id "
+        "WHERE c.status = 'pending' ORDER BY c.comparison_id"
+    ).fetchall()
+
+    previous = None
+    for comparison_id, old_path, new_path, location in jobs:
+        conn.execute("UPDATE comparisons SET status = 'running' WHERE comparison_id = ?", (comparison_id,))
+        conn.commit()
+        try:
+            started = (comparison_id, old_path, new_path, runner(old_path, new_path, location))
+        except Exception as e:
+            _record_failure(conn, comparison_id, old_path, new_path, e)
+            started = None
+
+        if previous is not None:
+            _finish_comparison(conn, *previous)
+        previous = started
+
+    if previous is not None:
+        _finish_comparison(conn, *previous)
+    return len(jobs)
+
+
+def watch(drop_dir='dl_model/images', registry_path='dl_model/ingest.db', interval=10.0, settle_seconds=5.0,
+          runner=start_comparison):
+    """
+    Poll the drop directory forever, registering settled new images and
+    running the comparisons they trigger.
+    """
+    conn = connect_registry(registry_path)
+    # A comparison left 'running' was interrupted; run it again
+    conn.execute("UPDATE comparisons SET status = 'pending' WHERE status = 'running'")
+    conn.commit()
+
+    pending = {}
+    print(f"Watching {drop_dir} every {interval}s")
+    try:
+        while True:
+            ingest_once(conn, drop_dir, pending, settle_seconds)
+            run_pending_comparisons(conn, runner)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Register new imagery in a drop directory and compare it to the previous epoch")
+    parser.add_argument("drop_dir", nargs="?", default="dl_model/images")
+    parser.add_argument("--registry", default="dl_model/ingest.db")
+    parser.add_argument("--interval", type=float, default=10.0)
+    parser.add_argument("--settle", type=float, default=5.0, help="Seconds a file must stay unchanged before ingesting")
+    args = parser.parse_args()
+
+    watch(args.drop_dir, args.registry, args.interval, args.settle)
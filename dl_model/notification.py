@@ -6,46 +6,81 @@ import mysql.connector
 from datetime import datetime
 
 from dl_model.compare import (
-    load_model_weights, 
     process_large_image, 
-    detect_road_changes
+    detect_road_changes,
+    change_heatmap
 )
+from dl_model.client import load_model
+from dl_model.events import summarize_road_changes, record_change_event
+from dl_model.artifacts import shared_writer, OVERLAY_FORMAT, OVERLAY_QUALITY
 
-def detect_significant_road_changes(image1_path, image2_path, output_dir='dl_model/results', 
-                                   tile_size=1024, overlap=3, threshold=15):
-    
+# Optional per-job RSS limit; the comparison is planned to fit it (see dl_model.budget)
+ROAD_MEMORY_BUDGET_MB = os.environ.get("ROAD_MEMORY_BUDGET_MB")
+# Side in pixels of the change heatmap cells stored with each event
+ROAD_HEATMAP_CELL = int(os.environ.get("ROAD_HEATMAP_CELL", 64))
+
+def start_road_change_detection(image1_path, image2_path, output_dir='dl_model/results',
+                                tile_size=1024, overlap=3, threshold=15, probability_dir=None,
+                                location=None, writer=None):
+    """
+    Compare two scenes and queue the result image on writer (default: the
+    shared writer), without waiting for it to be encoded.
+
+    Returns:
+        callable: finish(), which waits for the result image (raising if it
+            could not be written), records the change event for location and
+            returns (is_significant_change, change_percentage, result_path).
+            Call it after starting the next comparison to overlap the encode
+            with that comparison's inference.
+    """
     model_path = 'dl_model/models/save_best.h5'
     os.makedirs(output_dir, exist_ok=True)
     
-    model = load_model_weights(model_path)
+    model = load_model(model_path)
     
     composite_image, old_roads, new_roads, change_overlay = detect_road_changes(
-        model, image1_path, image2_path, tile_size, overlap
+        model, image1_path, image2_path, tile_size, overlap, probability_dir=probability_dir,
+        memory_budget=int(ROAD_MEMORY_BUDGET_MB) * 2**20 if ROAD_MEMORY_BUDGET_MB else None
     )
 
-    total_pixels = old_roads.size
-    old_road_pixels = np.sum(old_roads)
-    new_road_pixels = np.sum(new_roads)
-    
-    if old_road_pixels > 0:
-        change_percentage = (new_road_pixels / old_road_pixels) * 100
-    else:
-        change_percentage = 100 if new_road_pixels > 0 else 0
-    
-    is_significant_change = change_percentage > threshold
+    stats = summarize_road_changes(old_roads, new_roads, threshold)
+    change_percentage = stats["change_percentage"]
+    is_significant_change = stats["is_significant"]
     
     img1_name = Path(image1_path).stem
     img2_name = Path(image2_path).stem
-    result_filename = f"{img1_name}_{img2_name}_result.jpg"
+    result_filename = f"{img1_name}_{img2_name}_result.{OVERLAY_FORMAT}"
     result_path = os.path.join(output_dir, result_filename)
     
-    text_overlay = change_overlay.copy()
+    # change_overlay is not used past this point, so the text goes straight onto it
+    text_overlay = change_overlay
     text = f"Change: {change_percentage:.2f}% - {'SIGNIFICANT' if is_significant_change else 'NOT SIGNIFICANT'}"
     cv2.putText(text_overlay, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
     
-    cv2.imwrite(result_path, cv2.cvtColor(text_overlay, cv2.COLOR_RGB2BGR))
-    
-    return is_significant_change, change_percentage, result_path
+    written = (writer or shared_writer()).write_image(result_path, text_overlay, OVERLAY_FORMAT, OVERLAY_QUALITY)
+    heatmap = change_heatmap(old_roads, new_roads, ROAD_HEATMAP_CELL) if location is not None else None
+
+    def finish():
+        # result_path is only published once the file exists; a failed write raises here
+        written.result()
+
+        # Every comparison of a known location is kept as a typed change event
+        if location is not None:
+            record_change_event(location, image1_path, image2_path, stats, result_path, probability_dir,
+                                heatmap=heatmap)
+        return is_significant_change, change_percentage, result_path
+
+    return finish
+
+
+def detect_significant_road_changes(image1_path, image2_path, output_dir='dl_model/results', 
+                                   tile_size=1024, overlap=3, threshold=15, probability_dir=None,
+                                   location=None):
+    """
+    start_road_change_detection, waiting for the result image.
+    """
+    return start_road_change_detection(image1_path, image2_path, output_dir, tile_size, overlap, threshold,
+                                       probability_dir, location)()
 
 
 def add_significant_change_to_database(is_significant, change_percentage, image1_path, image2_path, result_path):
@@ -75,7 +110,7 @@ def add_significant_change_to_database(is_significant, change_percentage, image1
         
         query = """
         INSERT INTO notifications (id, title, message, date, location, latitude, longitude)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
         
         cursor.execute(query, (
@@ -0,0 +1,151 @@
+import os
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+import cv2
+
+from dl_model.compare import split_image_into_tiles, TilePredictor
+
+
+# Per-worker state, set once by _init_worker in each process
+_worker = {}
+
+
+def _init_worker(model_path, image_spec, mask_spec, threads_per_worker):
+    import tensorflow as tf
+    from dl_model.architecture import load_model_weights
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    image_shm = shared_memory.SharedMemory(name=image_spec[0])
+    mask_shm = shared_memory.SharedMemory(name=mask_spec[0])
+
+    _worker["predictor"] = TilePredictor(load_model_weights(model_path))
+    _worker["shm"] = (image_shm, mask_shm)
+    _worker["image"] = np.ndarray(image_spec[1], dtype=np.uint8, buffer=image_shm.buf)
+    _worker["mask"] = np.ndarray(mask_spec[1], dtype=np.uint8, buffer=mask_shm.buf)
+
+
+def _run_shard(coords):
+    """
+    Infer a shard of tiles and write road pixels straight into the shared mask.
+    Only ones are written, so overlapping tiles from different workers never
+    overwrite each other's detections and no locking is needed.
+    """
+    predictor = _worker["predictor"]
+    image = _worker["image"]
+    full_mask = _worker["mask"]
+
+    for x_start, y_start, x_end, y_end in coords:
+        mask = predictor.predict_masks([image[y_start:y_end, x_start:x_end]])[0]
+        region = full_mask[y_start:y_end, x_start:x_end, 0]
+        region[mask[:y_end - y_start, :x_end - x_start] == 1] = 1
+
+    return len(coords)
+
+
+def _tile_coords(image, tile_size, overlap):
+    coords = []
+    for tile, x_start, y_start in split_image_into_tiles(image, tile_size, overlap):
+        coords.append((x_start, y_start, x_start + tile.shape[1], y_start + tile.shape[0]))
+    return coords
+
+
+def process_large_image_parallel(model_path, image_path, tile_size=512, overlap=32,
+                                 num_workers=None, shard_size=4, threads_per_worker=1):
+    """
+    Multi-process version of compare.process_large_image.
+
+    The image and the output mask live in shared memory. Each worker loads its
+    own copy of the model and pulls shards of tile coordinates, so only tile
+    coordinates and counts cross process boundaries.
+
+    Args:
+        model_path: Path to the model weights, loaded once per worker
+        image_path: Path to the input image
+        tile_size: Size of tiles for processing
+        overlap: Overlap between tiles
+        num_workers: Number of worker processes (default: CPU count)
+        shard_size: Number of tiles handed to a worker at a time
+        threads_per_worker: TensorFlow intra-op threads in each worker
+
+    Returns:
+        tuple: (original_image, full_mask, overlay_image), as process_large_image
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+
+    original_image = cv2.imread(image_path)
+    original_image = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
+    height, width = original_image.shape[:2]
+
+    image_shm = shared_memory.SharedMemory(create=True, size=original_image.nbytes)
+    mask_shm = shared_memory.SharedMemory(create=True, size=height * width)
+    try:
+        shared_image = np.ndarray(original_image.shape, dtype=np.uint8, buffer=image_shm.buf)
+        shared_image[:] = original_image
+        full_mask = np.ndarray((height, width, 1), dtype=np.uint8, buffer=mask_shm.buf)
+        full_mask[:] = 0
+
+        coords = _tile_coords(original_image, tile_size, overlap)
+        shards = [coords[i:i + shard_size] for i in range(0, len(coords), shard_size)]
+
+        print(f"Processing {len(coords)} tiles for image {os.path.basename(image_path)} "
+              f"on {num_workers} workers...")
+
+        # spawn, not fork: TensorFlow is not fork-safe once initialised
+        ctx = mp.get_context("spawn")
+        initargs = (model_path, (image_shm.name, original_image.shape),
+                    (mask_shm.name, full_mask.shape), threads_per_worker)
+        with ctx.Pool(num_workers, initializer=_init_worker, initargs=initargs) as pool:
+            done = 0
+            for count in pool.imap_unordered(_run_shard, shards):
+                done += count
+                print(f"Processed {done}/{len(coords)} tiles")
+
+        full_mask = full_mask.copy()
+    finally:
+        image_shm.close()
+        image_shm.unlink()
+        mask_shm.close()
+        mask_shm.unlink()
+
+    yellow_mask = np.zeros_like(original_image)
+    yellow_mask[full_mask[:, :, 0] == 1] = [255, 255, 0]
+
+    overlay_image = cv2.addWeighted(original_image, 0.7, yellow_mask, 0.3, 0)
+
+    return original_image, full_mask, overlay_image
+
+
+def benchmark_scaling(model_path, image_path, max_workers=None, tile_size=256, overlap=32):
+    """
+    Time process_large_image_parallel with 1..max_workers processes and print
+    throughput and speedup relative to a single worker.
+
+    Returns:
+        list: (num_workers, seconds, speedup) for each run
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results = []
+    baseline = None
+
+    for num_workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        process_large_image_parallel(model_path, image_path, tile_size, overlap, num_workers)
+        elapsed = time.perf_counter() - start
+
+        baseline = baseline or elapsed
+        results.append((num_workers, elapsed, baseline / elapsed))
+
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+    for num_workers, elapsed, speedup in results:
+        print(f"{num_workers:>8} {elapsed:>10.2f} {speedup:>8.2f}")
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_scaling('dl_model/models/save_best.h5', 'dl_model/images/2025.jpg')
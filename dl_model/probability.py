@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+
+
+# Probabilities are stored as uint8 with 1/255 resolution, a quarter the size of float32
+PROBABILITY_SCALE = 255
+
+
+def quantize_probability(probability):
+    """
+    Quantize a float probability map in [0, 1] to uint8.
+    """
+    return np.rint(np.clip(probability, 0.0, 1.0) * PROBABILITY_SCALE).astype(np.uint8)
+
+
+def mask_from_probability(probability, threshold=0.5):
+    """
+    Threshold a uint8 probability map into a 0/1 road mask. This matches
+    `probability > threshold` on the unquantized map except within half a
+    quantization step of the threshold: p = 0.5 is stored as 128 and so
+    counts as road at the default threshold.
+    """
+    return (probability > threshold * PROBABILITY_SCALE).astype(np.uint8)
+
+
+def threshold_in_place(probability, threshold=0.5):
+    """
+    mask_from_probability without allocating: overwrites the uint8
+    probability map with its 0/1 mask and returns it.
+    """
+    # For uint8 values, p > t is p > floor(t); an integer bound and a bool view
+    # of the output keep the comparison free of cast buffers
+    limit = math.floor(threshold * PROBABILITY_SCALE)
+    if limit < 0:
+        probability.fill(1)
+    elif limit >= PROBABILITY_SCALE:
+        probability.fill(0)
+    else:
+        np.greater(probability, np.uint8(limit), out=probability.view(np.bool_))
+    return probability
+
+
+def save_probability_map(path, probability):
+    np.savez_compressed(path, probability=probability, scale=PROBABILITY_SCALE)
+    print(f"Probability map saved to '{path}'")
+
+
+def load_probability_map(path):
+    with np.load(path) as data:
+        if int(data["scale"]) != PROBABILITY_SCALE:
+            raise ValueError(f"Unsupported probability scale in {path}: {int(data['scale'])}")
+        return data["probability"]
+
+
+def joint_histogram(probability1, probability2):
+    """
+    Count pixels for every (old, new) pair of quantized probabilities in one
+    pass. Road and change counts at any threshold can then be read off the
+    256x256 table without touching the full maps again.
+    """
+    if probability1.shape != probability2.shape:
+        raise ValueError(f"Probability maps cover different extents: {probability1.shape} vs {probability2.shape}")
+
+    pairs = probability1.astype(np.uint16).ravel() * 256 + probability2.ravel()
+    return np.bincount(pairs, minlength=256 * 256).reshape(256, 256)
+
+
+def road_change_stats(histogram, threshold=0.5, significance=15):
+    """
+    Road change statistics at a given mask threshold, computed the same way as
+    detect_significant_road_changes.
+
+    Args:
+        histogram: Output of joint_histogram
+        threshold: Probability above which a pixel is a road
+        significance: Percentage threshold for considering a change significant
+
+    Returns:
+        dict: old_road_pixels, new_road_pixels, change_percentage, is_significant
+    """
+    is_road = np.arange(256) > threshold * PROBABILITY_SCALE
+
+    old_road_pixels = int(histogram[is_road].sum())
+    new_road_pixels = int(histogram[~is_road][:, is_road].sum())
+
+    if old_road_pixels > 0:
+        change_percentage = (new_road_pixels / old_road_pixels) * 100
+    else:
+        change_percentage = 100 if new_road_pixels > 0 else 0
+
+    return {
+        "threshold": threshold,
+        "old_road_pixels": old_road_pixels,
+        "new_road_pixels": new_road_pixels,
+        "change_percentage": change_percentage,
+        "is_significant": change_percentage > significance,
+    }
+
+
+def recompute_road_changes(probability_path1, probability_path2, thresholds=(0.5,), significance=15):
+    """
+    Re-run the change statistics for saved probability maps at one or more
+    thresholds, with no model in the loop.
+
+    Returns:
+        list: road_change_stats for each threshold
+    """
+    histogram = joint_histogram(load_probability_map(probability_path1), load_probability_map(probability_path2))
+    return [road_change_stats(histogram, threshold, significance) for threshold in thresholds]
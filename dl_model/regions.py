@@ -0,0 +1,156 @@
+import os
+
+import numpy as np
+import cv2
+from shapely import wkt
+from shapely.affinity import affine_transform, translate
+from shapely.geometry import box
+from shapely.ops import unary_union
+
+
+def parse_region(value):
+    """
+    Build a region from WKT (e.g. the locations.region_wkt column) or an
+    (x0, y0, x1, y1) bounding box.
+    """
+    if isinstance(value, str):
+        return wkt.loads(value)
+    x0, y0, x1, y1 = value
+    return box(x0, y0, x1, y1)
+
+
+def to_pixel_coords(geometry, geotransform):
+    """
+    Convert a region in map coordinates to an image's pixel grid using its
+    GDAL-style geotransform (north-up only).
+    """
+    origin_x, pixel_w, rot_x, origin_y, rot_y, pixel_h = geotransform
+    if rot_x or rot_y:
+        raise ValueError("Rotated geotransforms are not supported")
+    return affine_transform(geometry, [1.0 / pixel_w, 0, 0, 1.0 / pixel_h,
+                                       -origin_x / pixel_w, -origin_y / pixel_h])
+
+
+def tile_intersects(region, x_start, y_start, x_end, y_end):
+    return region.intersects(box(x_start, y_start, x_end, y_end))
+
+
+def _ring_points(ring):
+    return np.round(np.asarray(ring.coords)[:, :2]).astype(np.int32)
+
+
+def rasterize_region(region, shape):
+    """
+    Boolean mask of the pixels of an image of the given (height, width)
+    covered by the region. Vertices are rounded to whole pixels and pixels on
+    the outline count as inside, so the mask errs by at most one pixel at the
+    boundary.
+    """
+    raster = np.zeros(shape, dtype=np.uint8)
+    polygons = getattr(region, "geoms", [region])
+    for polygon in polygons:
+        if polygon.is_empty or polygon.geom_type != "Polygon":
+            continue
+        cv2.fillPoly(raster, [_ring_points(polygon.exterior)], 1)
+        for interior in polygon.interiors:
+            cv2.fillPoly(raster, [_ring_points(interior)], 0)
+    return raster.astype(bool)
+
+
+def load_location_regions(names=None):
+    """
+    Fetch region geometries from the locations table.
+
+    Args:
+        names: Location names to load (default: every location with a region)
+
+    Returns:
+        dict: location name -> shapely geometry
+    """
+    import mysql.connector
+
+    conn = mysql.connector.connect(
+        host="localhost",
+        user="root",
+        password="root",
+        database="change_detection"
+    )
+    try:
+        cursor = conn.cursor()
+        query = "SELECT name, region_wkt FROM locations WHERE region_wkt IS NOT NULL"
+        params = ()
+        if names:
+            query += " AND name IN (" + ", ".join(["%s"] * len(names)) + ")"
+            params = tuple(names)
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+
+    return {name: parse_region(region_wkt) for name, region_wkt in rows}
+
+
+def detect_region_changes(model, image1_path, image2_path, regions, tile_size=256, overlap=32, threshold=0.5,
+                          offset=None, geotransforms=None):
+    """
+    Detect road changes only inside the requested regions.
+
+    Only tiles touching the union of the regions are segmented, so inference
+    shrinks with the area the regions leave uncovered. Statistics are
+    reported per region.
+
+    Args:
+        model: The loaded road detection model
+        image1_path: Path to the earlier image
+        image2_path: Path to the later image
+        regions: dict of name -> shapely geometry in image1's pixel grid
+            (see parse_region / to_pixel_coords / load_location_regions)
+        tile_size, overlap, threshold, offset, geotransforms: as detect_road_changes
+
+    Returns:
+        tuple: (region_stats, composite_image, old_roads, new_roads, change_overlay),
+        where region_stats maps each name to its area and old/new road pixels
+        and change percentage
+    """
+    from dl_model.compare import load_image, align_epochs, segment_image, build_change_overlay
+
+    original1, original2, window1 = align_epochs(load_image(image1_path), load_image(image2_path),
+                                                 offset, geotransforms)
+    height, width = original1.shape[:2]
+
+    regions = {name: translate(geometry, -window1[0], -window1[1]) for name, geometry in regions.items()}
+    union = unary_union(list(regions.values()))
+
+    print("Processing first image...")
+    mask1 = segment_image(model, original1, tile_size, overlap, threshold,
+                          name=os.path.basename(image1_path), region=union)
+
+    print("Processing second image...")
+    mask2 = segment_image(model, original2, tile_size, overlap, threshold,
+                          name=os.path.basename(image2_path), region=union)
+
+    old_roads = mask1[:, :, 0].astype(np.bool_)
+    new_roads = np.logical_and(mask2[:, :, 0].astype(np.bool_), np.logical_not(old_roads))
+
+    region_stats = {}
+    for name, geometry in regions.items():
+        inside = rasterize_region(geometry, (height, width))
+        old_road_pixels = int(np.count_nonzero(old_roads & inside))
+        new_road_pixels = int(np.count_nonzero(new_roads & inside))
+
+        if old_road_pixels > 0:
+            change_percentage = (new_road_pixels / old_road_pixels) * 100
+        else:
+            change_percentage = 100 if new_road_pixels > 0 else 0
+
+        region_stats[name] = {
+            "area_pixels": int(np.count_nonzero(inside)),
+            "old_road_pixels": old_road_pixels,
+            "new_road_pixels": new_road_pixels,
+            "change_percentage": change_percentage,
+        }
+
+    composite_image, change_overlay = build_change_overlay(original1, original2, old_roads, new_roads)
+
+    return region_stats, composite_image, old_roads, new_roads, change_overlay
@@ -1,7 +1,7 @@
 import numpy as np
 import cv2
-import matplotlib.pyplot as plt
 from dl_model.architecture import load_model_weights
+from dl_model.util import get_pyplot
 import os
 import math
 
@@ -34,7 +34,7 @@ def split_image_into_tiles(image, tile_size=256, overlap=3):
     
     return tiles
 
-def predict_tile_road_mask(model, tile):
+def predict_tile_road_mask(model, tile, threshold=0.5):
     """
     Predict road mask for a single image tile.
     """
@@ -45,7 +45,7 @@ def predict_tile_road_mask(model, tile):
     input_tile = np.expand_dims(normalized_tile, axis=0)
     
     predicted_mask = model.predict(input_tile)
-    predicted_mask = (predicted_mask > 0.5).astype(np.uint8)[0]
+    predicted_mask = (predicted_mask > threshold).astype(np.uint8)[0]
     
     if resized_tile.shape[:2] != tile.shape[:2]:
         predicted_mask = cv2.resize(predicted_mask, (tile.shape[1], tile.shape[0]))
@@ -99,6 +99,11 @@ def visualize_road_detection(original_image, road_mask, overlay_image):
         road_mask: Binary mask of detected roads
         overlay_image: Original image with road overlay
     """
+    plt = get_pyplot()
+    if plt is None:
+        print("Headless mode: skipping visualization")
+        return
+    
     plt.figure(figsize=(15, 10))
     
     plt.subplot(1, 3, 1)
@@ -0,0 +1,152 @@
+import os
+import math
+from collections import namedtuple
+
+import numpy as np
+import cv2
+
+
+# The model is built for 256x256 inputs; tiles of this size are never resampled
+TILE_SIZE = 256
+# Pixels of context on each side of a tile that are inferred but not kept
+MARGIN = 16
+
+# tiles: (x_start, y_start, crop_x, crop_y, out_x0, out_y0, out_x1, out_y1), where
+# x_start/y_start index the padded image and crop_x/crop_y the tile itself
+TilePlan = namedtuple("TilePlan", ["height", "width", "tile_size", "margin", "pad", "tiles", "redundancy"])
+
+
+def _plan_axis(length, tile_size, margin, edge_context):
+    """
+    Split one axis into output spans of near-equal size and place a tile_size
+    input window around every span so that each span keeps `margin` pixels of
+    context. Without edge_context, the image border itself counts as context,
+    so the first and last spans may run up to the tile edge.
+    """
+    core = tile_size - 2 * margin
+    if core <= 0:
+        raise ValueError(f"margin {margin} leaves no core in a {tile_size} tile")
+
+    if length <= tile_size and not edge_context:
+        spans = [(-((tile_size - length) // 2), 0, length)]
+    else:
+        edge = 0 if edge_context else margin
+        count = max(1, math.ceil((length - 2 * edge) / core))
+        bounds = [0] + [edge + round(i * (length - 2 * edge) / count) for i in range(1, count)] + [length]
+
+        spans = []
+        for out_start, out_end in zip(bounds[:-1], bounds[1:]):
+            in_start = out_start - (tile_size - (out_end - out_start)) // 2
+            if not edge_context:
+                in_start = min(max(in_start, 0), length - tile_size)
+            spans.append((in_start, out_start, out_end))
+
+    pad_before = max(0, -spans[0][0])
+    pad_after = max(0, spans[-1][0] + tile_size - length)
+    return spans, pad_before, pad_after
+
+
+def plan_tiles(height, width, tile_size=TILE_SIZE, margin=MARGIN, edge_context=False):
+    """
+    Plan a near-minimal tile grid in which every output pixel comes from
+    exactly one tile.
+
+    Each tile keeps only its centre crop, with at least `margin` pixels of
+    context between a kept pixel and the tile edge. Spans are balanced across
+    the axis, so edge tiles are not snapped back over their neighbours as
+    split_image_into_tiles does. Reflect padding fills tiles that reach past
+    the image: images smaller than a tile, or every edge when edge_context
+    is set.
+
+    Args:
+        height: Image height
+        width: Image width
+        tile_size: Model input size
+        margin: Context pixels required around each kept pixel
+        edge_context: Also require margin pixels of (reflected) context at the image border
+
+    Returns:
+        TilePlan: the grid, the (top, bottom, left, right) padding and the
+        redundancy factor, i.e. inferred pixels per output pixel
+    """
+    y_spans, pad_top, pad_bottom = _plan_axis(height, tile_size, margin, edge_context)
+    x_spans, pad_left, pad_right = _plan_axis(width, tile_size, margin, edge_context)
+
+    tiles = []
+    for y_in, y0, y1 in y_spans:
+        for x_in, x0, x1 in x_spans:
+            tiles.append((x_in + pad_left, y_in + pad_top, x0 - x_in, y0 - y_in, x0, y0, x1, y1))
+
+    redundancy = len(tiles) * tile_size * tile_size / float(height * width)
+    return TilePlan(height, width, tile_size, margin, (pad_top, pad_bottom, pad_left, pad_right), tiles, redundancy)
+
+
+def legacy_redundancy(height, width, tile_size=256, overlap=32):
+    """
+    Redundancy factor of the grid produced by split_image_into_tiles, for comparison.
+    """
+    step = tile_size - overlap
+    tiles_x = math.ceil(width / step)
+    tiles_y = math.ceil(height / step)
+    return tiles_x * tiles_y * min(tile_size, width) * min(tile_size, height) / float(height * width)
+
+
+def pad_image(image, plan):
+    top, bottom, left, right = plan.pad
+    if not any(plan.pad):
+        return image
+    return cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_REFLECT_101)
+
+
+def iter_plan_tiles(padded_image, plan):
+    """
+    Yield (tile, tile_entry) for every tile in the plan. Tiles are views into
+    the padded image.
+    """
+    size = plan.tile_size
+    for entry in plan.tiles:
+        x_start, y_start = entry[0], entry[1]
+        yield padded_image[y_start:y_start + size, x_start:x_start + size], entry
+
+
+def stitch_tile(full_mask, tile_mask, entry):
+    """
+    Copy the centre crop of a tile prediction into its output span.
+    """
+    _, _, crop_x, crop_y, x0, y0, x1, y1 = entry
+    if len(tile_mask.shape) == 2:
+        tile_mask = tile_mask[:, :, np.newaxis]
+    full_mask[y0:y1, x0:x1] = tile_mask[crop_y:crop_y + (y1 - y0), crop_x:crop_x + (x1 - x0)]
+
+
+def process_large_image_planned(model, image_path, tile_size=TILE_SIZE, margin=MARGIN, edge_context=False):
+    """
+    Drop-in alternative to compare.process_large_image that infers each output
+    pixel once, using plan_tiles with reflect padding and centre-crop stitching.
+    """
+    from dl_model.compare import TilePredictor
+
+    original_image = cv2.imread(image_path)
+    original_image = cv2.cvtColor(original_image, cv2.COLOR_BGR2RGB)
+
+    height, width = original_image.shape[:2]
+    plan = plan_tiles(height, width, tile_size, margin, edge_context)
+    padded_image = pad_image(original_image, plan)
+
+    full_mask = np.zeros((height, width, 1), dtype=np.uint8)
+    predictor = TilePredictor(model)
+
+    print(f"Processing {len(plan.tiles)} tiles for image {os.path.basename(image_path)} "
+          f"(redundancy {plan.redundancy:.2f}x)...")
+
+    for i, (tile, entry) in enumerate(iter_plan_tiles(padded_image, plan)):
+        if i % 10 == 0:
+            print(f"Processing tile {i+1}/{len(plan.tiles)}")
+        stitch_tile(full_mask, predictor.predict_masks([tile])[0], entry)
+
+    yellow_mask = np.zeros_like(original_image)
+    yellow_mask[full_mask[:, :, 0] == 1] = [255, 255, 0]
+
+    overlay_image = cv2.addWeighted(original_image, 0.7, yellow_mask, 0.3, 0)
+
+    return original_image, full_mask, overlay_image
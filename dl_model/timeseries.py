@@ -0,0 +1,191 @@
+import os
+import json
+from datetime import datetime
+
+import numpy as np
+import cv2
+
+from dl_model.compare import load_image, segment_image
+from dl_model.alignment import estimate_shift, overlap_windows, crop
+
+
+# Series for one location live in a directory:
+#   series.json        epoch records and statistics
+#   reference.png      downsampled grayscale first epoch, used for alignment
+#   masks/<date>.npz   bit-packed road mask of each epoch
+# Full images are never kept.
+
+THUMBNAIL_SIZE = 1024
+DATE_FORMATS = ("%Y-%m-%d", "%Y-%m", "%Y")
+
+
+def parse_epoch_date(date):
+    """
+    Parse an epoch date given as 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD'; missing
+    parts count as the first month or day.
+
+    Raises:
+        ValueError: if date is in none of these formats
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(date, date_format).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised epoch date {date!r}; expected YYYY, YYYY-MM or YYYY-MM-DD")
+
+
+def _series_path(store_dir):
+    return os.path.join(store_dir, "series.json")
+
+
+def load_series(store_dir):
+    """
+    Returns:
+        dict: location metadata and the list of epoch records, oldest first
+    """
+    path = _series_path(store_dir)
+    if not os.path.exists(path):
+        return {"epochs": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_series(store_dir, series):
+    tmp_path = _series_path(store_dir) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(series, f, indent=2)
+    os.replace(tmp_path, _series_path(store_dir))
+
+
+def _mask_path(store_dir, date):
+    return os.path.join(store_dir, "masks", f"{date}.npz")
+
+
+def save_epoch_mask(store_dir, date, mask):
+    os.makedirs(os.path.join(store_dir, "masks"), exist_ok=True)
+    np.savez_compressed(_mask_path(store_dir, date), bits=np.packbits(mask.astype(bool)), shape=mask.shape)
+
+
+def load_epoch_mask(store_dir, date):
+    with np.load(_mask_path(store_dir, date)) as data:
+        height, width = data["shape"]
+        return np.unpackbits(data["bits"], count=height * width).reshape(height, width).astype(bool)
+
+
+def _thumbnail(image, scale):
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _compare(old_mask, old_offset, new_mask, new_offset):
+    """
+    Road growth between two epoch masks over their common extent. Offsets
+    are each mask's position in the reference epoch's grid.
+    """
+    relative = (new_offset[0] - old_offset[0], new_offset[1] - old_offset[1])
+    old_window, new_window = overlap_windows(old_mask.shape, new_mask.shape, relative)
+    old_roads = crop(old_mask, old_window)
+    new_roads = np.logical_and(crop(new_mask, new_window), np.logical_not(old_roads))
+
+    old_road_pixels = int(np.count_nonzero(old_roads))
+    new_road_pixels = int(np.count_nonzero(new_roads))
+
+    if old_road_pixels > 0:
+        change_percentage = (new_road_pixels / old_road_pixels) * 100
+    else:
+        change_percentage = 100 if new_road_pixels > 0 else 0
+
+    return {
+        "old_road_pixels": old_road_pixels,
+        "new_road_pixels": new_road_pixels,
+        "change_percentage": change_percentage,
+    }
+
+
+def add_epoch(store_dir, model, image_path, date, tile_size=256, overlap=32, threshold=0.5):
+    """
+    Segment a new epoch of a location and update its time series.
+
+    The image is segmented once; its mask is compared against the previous
+    epoch (per-interval growth) and the first epoch (cumulative growth) over
+    their common extents, using only the stored compact masks.
+
+    Args:
+        store_dir: Directory holding this location's series
+        model: Loaded road detection model
+        image_path: Path to the new epoch
+        date: Capture date, 'YYYY', 'YYYY-MM' or 'YYYY-MM-DD' (see parse_epoch_date);
+            must be later than every epoch already in the series
+        tile_size: Size of tiles for processing
+        overlap: Overlap between tiles
+        threshold: Probability above which a pixel is a road
+
+    Returns:
+        dict: the epoch record added to series.json
+    """
+    series = load_series(store_dir)
+    epochs = series["epochs"]
+    if epochs and parse_epoch_date(date) <= parse_epoch_date(epochs[-1]["date"]):
+        raise ValueError(f"Epoch {date} is not later than the latest epoch {epochs[-1]['date']}")
+
+    os.makedirs(store_dir, exist_ok=True)
+    image = load_image(image_path)
+
+    reference_path = os.path.join(store_dir, "reference.png")
+    if not epochs:
+        scale = min(1.0, THUMBNAIL_SIZE / float(max(image.shape[:2])))
+        series["thumbnail_scale"] = scale
+        cv2.imwrite(reference_path, _thumbnail(image, scale))
+        offset = (0, 0)
+    else:
+        scale = series["thumbnail_scale"]
+        reference = cv2.imread(reference_path, cv2.IMREAD_GRAYSCALE)
+        # Rounded once, in full-resolution pixels
+        shift_x, shift_y = estimate_shift(reference, _thumbnail(image, scale), max_size=THUMBNAIL_SIZE)
+        offset = (int(round(shift_x / scale)), int(round(shift_y / scale)))
+
+    mask = segment_image(model, image, tile_size, overlap, threshold, name=os.path.basename(image_path))[:, :, 0]
+    del image
+
+    record = {
+        "date": date,
+        "image_path": image_path,
+        "shape": list(mask.shape),
+        "offset": list(offset),
+        "road_pixels": int(np.count_nonzero(mask)),
+    }
+
+    if epochs:
+        previous = epochs[-1]
+        record["interval"] = _compare(load_epoch_mask(store_dir, previous["date"]), previous["offset"], mask, offset)
+        record["interval"]["since"] = previous["date"]
+
+        first = epochs[0]
+        if first is previous:
+            record["cumulative"] = dict(record["interval"])
+        else:
+            record["cumulative"] = _compare(load_epoch_mask(store_dir, first["date"]), first["offset"], mask, offset)
+        record["cumulative"]["since"] = first["date"]
+
+    save_epoch_mask(store_dir, date, mask)
+    epochs.append(record)
+    _save_series(store_dir, series)
+
+    print(f"Added epoch {date} ({record['road_pixels']} road pixels) to {store_dir}")
+    return record
+
+
+def build_series(store_dir, model, dated_images, tile_size=256, overlap=32, threshold=0.5):
+    """
+    Add several (date, image_path) epochs in date order. Epochs already in
+    the series are skipped, so this can be re-run as new captures arrive.
+
+    Returns:
+        list: every epoch record in the series
+    """
+    known = {parse_epoch_date(epoch["date"]) for epoch in load_series(store_dir)["epochs"]}
+    for date, image_path in sorted(dated_images, key=lambda pair: parse_epoch_date(pair[0])):
+        if parse_epoch_date(date) not in known:
+            add_epoch(store_dir, model, image_path, date, tile_size, overlap, threshold)
+    return load_series(store_dir)["epochs"]
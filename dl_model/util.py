@@ -0,0 +1,18 @@
+import os
+
+
+def is_headless():
+    """
+    Headless runs (ROAD_HEADLESS=1) never import or use matplotlib.
+    """
+    return os.environ.get("ROAD_HEADLESS", "").lower() in ("1", "true", "yes")
+
+
+def get_pyplot():
+    """
+    Import matplotlib.pyplot on first use, or return None in headless mode.
+    """
+    if is_headless():
+        return None
+    import matplotlib.pyplot as plt
+    return plt